@@ -1,14 +1,11 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context, g
 import os
 from dotenv import load_dotenv
-from groq import Groq
-import pandas as pd
-from langdetect import detect
-import faiss
-import numpy as np
-import json
 from datetime import datetime
-import uuid
+
+from finans import config, conversation, language, metrics, resources, warmup
+from finans.generation import generate_answer, stream_answer
+from finans.web import ensure_session_id, rerank_option, sse_event
 
 # Load environment variables
 load_dotenv()
@@ -16,152 +13,31 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
-# Initialize Groq client
-api_key = os.getenv("API_KEY")
-client = Groq(api_key=api_key)
-
-# Load data
-try:
-    df = pd.read_csv("data/chunked_data.csv")
-    chunked_data = df.to_dict(orient="records")
-    
-    # Load FAISS index if available
-    if os.path.exists("data/faiss_index.index"):
-        index = faiss.read_index("data/faiss_index.index")
-        with open("data/faiss_metadata.pkl", "rb") as f:
-            import pickle
-            metadata = pickle.load(f)
-    else:
-        index = None
-        metadata = None
-except Exception as e:
-    print(f"Data loading error: {e}")
-    chunked_data = []
-    index = None
-    metadata = None
-
-def search_context(question, top_k=3):
-    """Search for relevant context using FAISS or fallback to simple search"""
-    if index is not None and metadata is not None:
-        # Use FAISS for fast similarity search
-        try:
-            # For now, we'll use a simple approach
-            # In a real implementation, you'd embed the question and search
-            relevant_chunks = []
-            question_lower = question.lower()
-            
-            for chunk in chunked_data[:10]:  # Search in first 10 chunks for demo
-                if any(word in chunk.get('content', '').lower() for word in question_lower.split()):
-                    relevant_chunks.append(chunk.get('content', '')[:500])
-                    if len(relevant_chunks) >= top_k:
-                        break
-            
-            return "\n\n".join(relevant_chunks) if relevant_chunks else "Finans ve bankacılık alanında genel bilgiler."
-        except Exception as e:
-            print(f"FAISS search error: {e}")
-    
-    # Fallback to simple search
-    relevant_chunks = []
-    question_lower = question.lower()
-    
-    for chunk in chunked_data[:20]:
-        if any(word in chunk.get('content', '').lower() for word in question_lower.split()):
-            relevant_chunks.append(chunk.get('content', '')[:500])
-            if len(relevant_chunks) >= top_k:
-                break
-    
-    return "\n\n".join(relevant_chunks) if relevant_chunks else "Finans ve bankacılık alanında genel bilgiler."
-
-def generate_answer(question, conversation_history=None):
-    """Generate answer using Groq API"""
-    try:
-        context = search_context(question)
-        
-        # Detect language with character length check first
-        try:
-            if len(question) < 12:
-                lang_text = "Türkçe"
-            elif detect(question) == "tr":
-                lang_text = "Türkçe"
-            elif detect(question) == "en":
-                lang_text = "İngilizce"
-            else:
-                lang_text = "Türkçe"
-        except:
-            lang_text = "Türkçe"
-        
-        # Generate conversation summary if history exists
-        conversation_summary = ""
-        if conversation_history and len(conversation_history) > 0:
-            try:
-                summary_prompt = f"""
-Aşağıdaki konuşma geçmişini kısa bir özet haline getir. 
-Sadece önemli noktaları ve konu bağlamını belirt:
-
-{conversation_history}
-
-ÖZET:"""
-                summary_response = client.chat.completions.create(
-                    model="llama3-70b-8192",
-                    messages=[
-                        {"role": "system", "content": "Sen bir konuşma özetleyicisisin. Kısa ve öz özet yap."},
-                        {"role": "user", "content": summary_prompt}
-                    ],
-                    max_tokens=200,
-                    temperature=0.3
-                )
-                conversation_summary = summary_response.choices[0].message.content.strip()
-            except Exception as e:
-                conversation_summary = "Konuşma geçmişi yüklenemedi."
-        
-        prompt = f"""
-Sen finans, bankacılık ve ekonomi alanlarında uzmanlaşmış bir yapay zekâ danışmanısın.
-Aşağıda bir kullanıcının sorusu ve bu soruya dair bazı bilgi parçaları (bağlam) yer alıyor. 
-Görevin, bu bağlama dayanarak doğru, açık ve tekrar etmeyen bir cevap üretmek.
-
-❗️ Cevabını hazırlarken şu kurallara dikkat et:
-- Aynı kelimeleri tekrar tekrar kullanma. Anlamı koruyarak eş anlamlılarla zenginleştir.
-- Gereksiz tekrarlar, döngüsel anlatımlar ve soyut genellemelerden kaçın.
-- Uzunsa madde madde yaz.
-- Elindeki bilgi yetersizse bunu dürüstçe belirt.
-- Üst üste aynı kelimeleri kullanma.
-- Kullanıcıya yardımcı olacak pratik bilgiler ver.
-- Önceki konuşma geçmişini dikkate al ve tutarlı cevaplar ver.
-
-### DİL ###
-{lang_text}
-
-### KONUŞMA GEÇMİŞİ ###
-{conversation_summary}
-
-### BAĞLAM ###
-{context}
-
-### SORU ###
-{question}
-
-### CEVAP ###
-"""
-
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "Sen bir finans asistanısın. Soruları açık, anlaşılır ve bağlama dayalı olarak cevapla. Türkçe sorulara Türkçe, İngilizce sorulara İngilizce cevap ver."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Üzgünüm, yanıt üretirken bir hata oluştu: {str(e)}"
+# Load the language profiles now rather than on the first question
+language.warm_up()
+
+# Endpoints not worth a trace of their own (probes are polled every few seconds)
+UNTRACED_ENDPOINTS = {'static', 'prometheus_metrics', 'liveness', 'readiness'}
+
+@app.before_request
+def start_trace():
+    if request.endpoint not in UNTRACED_ENDPOINTS:
+        g.trace = metrics.start_request(request.path, request.headers.get('X-Request-ID'))
+
+@app.after_request
+def finish_trace(response):
+    trace = g.get('trace')
+    if trace is not None:
+        response.headers['X-Request-ID'] = trace['request_id']
+        # Streamed responses are finished by their generator
+        if not trace.get('streaming'):
+            metrics.finish_request(trace, response.status_code)
+    return response
 
 @app.route('/')
-def index():
+def home():
     """Main chatbot interface"""
-    if 'session_id' not in session:
-        session['session_id'] = str(uuid.uuid4())
+    ensure_session_id(session)
     return render_template('index.html')
 
 @app.route('/chat', methods=['POST'])
@@ -176,25 +52,21 @@ def chat():
         
 
         
-        # Get conversation history from session (last 10 messages = 5 pairs)
-        if 'conversation_history' not in session:
-            session['conversation_history'] = []
-        
-        conversation_history = session['conversation_history']
-        
-        # Generate response with conversation history
-        response = generate_answer(message, conversation_history)
+        session_id = ensure_session_id(session)
         
-        # Add new message pair to history
-        conversation_history.append(f"Kullanıcı: {message}")
-        conversation_history.append(f"Asistan: {response}")
+        # Generate response with the rolling summary of earlier turns
+        response = generate_answer(
+            message,
+            conversation.get_summary(session_id),
+            rerank_option(data),
+            conversation.session_language(session_id, message)
+        )
         
-        # Keep only last 10 messages (5 pairs)
-        if len(conversation_history) > 10:
-            conversation_history = conversation_history[-10:]
+        # Fold this pair into the summary after the response is sent
+        conversation.schedule_summary_update(session_id, message, response)
         
-        # Update session
-        session['conversation_history'] = conversation_history
+        # Add new message pair to history, keeping only the last 10 messages
+        conversation.record_messages(session_id, f"Kullanıcı: {message}", f"Asistan: {response}")
         
         return jsonify({
             'success': True,
@@ -205,15 +77,73 @@ def chat():
     except Exception as e:
         return jsonify({'error': f'Bir hata oluştu: {str(e)}'}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the answer token by token as server-sent events"""
+    data = request.get_json(silent=True) or {}
+    message = data.get('message', '').strip()
+
+    if not message:
+        return jsonify({'error': 'Mesaj boş olamaz'}), 400
+
+    session_id = ensure_session_id(session)
+    conversation_summary = conversation.get_summary(session_id)
+    lang_text = conversation.session_language(session_id, message)
+
+    trace = g.trace
+    trace['streaming'] = True
+
+    def generate():
+        metrics.activate(trace)
+        tokens = []
+        try:
+            for token in stream_answer(message, conversation_summary, rerank_option(data), lang_text):
+                tokens.append(token)
+                yield sse_event({'token': token})
+            yield sse_event({'timestamp': datetime.now().isoformat()}, event='done')
+        except Exception as e:
+            yield sse_event({'error': f'Üzgünüm, yanıt üretirken bir hata oluştu: {str(e)}'}, event='error')
+            metrics.finish_request(trace, 500)
+            return
+        metrics.finish_request(trace, 200)
+        answer = "".join(tokens)
+        # The session lives on the server, so the answer is stored once the stream has finished
+        conversation.record_messages(session_id, f"Kullanıcı: {message}", f"Asistan: {answer}")
+        conversation.schedule_summary_update(session_id, message, answer)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'data_loaded': len(chunked_data) > 0,
-        'faiss_available': index is not None,
-        'groq_configured': bool(api_key)
+        'data_loaded': resources.data_available(),
+        'faiss_available': resources.get_index() is not None,
+        'index_version': resources.get_snapshot()['version'],
+        'groq_configured': bool(config.API_KEY)
     })
 
+@app.route('/health/live')
+def liveness():
+    """Liveness probe: the process answers; nothing is loaded or checked"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+def readiness():
+    """Readiness probe: 503 until the index and models are loaded and warmed up"""
+    ready, details = warmup.readiness()
+    return jsonify(details), 200 if ready else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage latencies, token counts, errors and cache hits in Prometheus text format"""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,187 @@
+"""
+asgi.py
+
+Amaç:
+- app.py ile aynı endpoint'leri asyncio üzerinde sunmak
+- Groq beklenirken worker bloklanmaz; tek bir worker yüzlerce eşzamanlı
+  konuşmaya hizmet verebilir
+
+Çalıştırma:
+    hypercorn asgi:app --bind 0.0.0.0:5000 --workers 2
+
+Her worker ayrı bir süreçtir; bu yüzden SESSION_BACKEND verilmediyse
+oturumlar sqlite'ta tutulur (gunicorn.conf.py'deki gibi).
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# .env first, so the default below doesn't override what it sets
+load_dotenv()
+# A follow-up question may reach another worker than the first; set before finans reads its config
+os.environ.setdefault("SESSION_BACKEND", "sqlite")
+
+from quart import Quart, Response, g, jsonify, render_template, request, session
+
+from finans import aio, config, conversation, metrics, resources, warmup
+from finans.web import ensure_session_id, rerank_option, sse_event
+
+app = Quart(__name__)
+app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
+
+
+@app.before_serving
+async def startup():
+    # Load the index, models and language profiles now rather than on the first question
+    await asyncio.to_thread(warmup.warm_up)
+
+
+@app.after_serving
+async def shutdown():
+    await resources.close_async_client()
+
+
+# Endpoints not worth a trace of their own (probes are polled every few seconds)
+UNTRACED_ENDPOINTS = {'static', 'prometheus_metrics', 'liveness', 'readiness'}
+
+
+@app.before_request
+async def start_trace():
+    if request.endpoint not in UNTRACED_ENDPOINTS:
+        g.trace = metrics.start_request(request.path, request.headers.get('X-Request-ID'))
+
+
+@app.after_request
+async def finish_trace(response):
+    trace = g.get('trace')
+    if trace is not None:
+        response.headers['X-Request-ID'] = trace['request_id']
+        # Streamed responses are finished by their generator
+        if not trace.get('streaming'):
+            metrics.finish_request(trace, response.status_code)
+    return response
+
+
+@app.route('/')
+async def home():
+    """Main chatbot interface"""
+    ensure_session_id(session)
+    return await render_template('index.html')
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Handle chat messages"""
+    try:
+        data = await request.get_json()
+        message = data.get('message', '').strip()
+
+        if not message:
+            return jsonify({'error': 'Mesaj boş olamaz'}), 400
+
+        session_id = ensure_session_id(session)
+        # The session store may be SQLite or Redis; its calls run off the loop
+        response = await aio.generate_answer(
+            message,
+            await asyncio.to_thread(conversation.get_summary, session_id),
+            rerank_option(data),
+            await asyncio.to_thread(conversation.session_language, session_id, message)
+        )
+
+        # Fold this pair into the summary after the response is sent
+        app.add_background_task(aio.update_summary, session_id, message, response)
+
+        await asyncio.to_thread(
+            conversation.record_messages, session_id, f"Kullanıcı: {message}", f"Asistan: {response}"
+        )
+
+        return jsonify({
+            'success': True,
+            'response': response,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Bir hata oluştu: {str(e)}'}), 500
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Stream the answer token by token as server-sent events"""
+    data = await request.get_json(silent=True) or {}
+    message = data.get('message', '').strip()
+
+    if not message:
+        return jsonify({'error': 'Mesaj boş olamaz'}), 400
+
+    session_id = ensure_session_id(session)
+    conversation_summary = await asyncio.to_thread(conversation.get_summary, session_id)
+    lang_text = await asyncio.to_thread(conversation.session_language, session_id, message)
+
+    trace = g.trace
+    trace['streaming'] = True
+
+    async def generate():
+        # Quart iterates the body outside the request's context
+        metrics.activate(trace)
+        tokens = []
+        try:
+            async for token in aio.stream_answer(
+                message, conversation_summary, rerank_option(data), lang_text
+            ):
+                tokens.append(token)
+                yield sse_event({'token': token}).encode()
+            yield sse_event({'timestamp': datetime.now().isoformat()}, event='done').encode()
+        except Exception as e:
+            yield sse_event({'error': f'Üzgünüm, yanıt üretirken bir hata oluştu: {str(e)}'}, event='error').encode()
+            metrics.finish_request(trace, 500)
+            return
+        metrics.finish_request(trace, 200)
+        answer = "".join(tokens)
+        # The session lives on the server, so the answer is stored once the stream has finished
+        await asyncio.to_thread(
+            conversation.record_messages, session_id, f"Kullanıcı: {message}", f"Asistan: {answer}"
+        )
+        app.add_background_task(aio.update_summary, session_id, message, answer)
+
+    response = await app.make_response(generate())
+    response.timeout = None  # answers can take longer than Quart's default response timeout
+    response.mimetype = 'text/event-stream'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/health')
+async def health():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'data_loaded': resources.data_available(),
+        'faiss_available': resources.get_index() is not None,
+        'index_version': resources.get_snapshot()['version'],
+        'groq_configured': bool(config.API_KEY)
+    })
+
+
+@app.route('/health/live')
+async def liveness():
+    """Liveness probe: the process answers; nothing is loaded or checked"""
+    return jsonify({'status': 'alive'})
+
+
+@app.route('/health/ready')
+async def readiness():
+    """Readiness probe: 503 until the index and models are loaded and warmed up"""
+    ready, details = warmup.readiness()
+    return jsonify(details), 200 if ready else 503
+
+
+@app.route('/metrics')
+async def prometheus_metrics():
+    """Stage latencies, token counts, errors and cache hits in Prometheus text format"""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
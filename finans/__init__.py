@@ -0,0 +1,19 @@
+"""
+finans
+
+Amaç:
+- Flask uygulaması ve komut satırı (scripts/rag.py) için ortak
+  retrieval + generation kütüphanesi
+"""
+
+from .generation import generate_answer, stream_answer
+from .language import detect_language
+from .retrieval import format_context, search_context
+
+__all__ = [
+    "detect_language",
+    "format_context",
+    "generate_answer",
+    "search_context",
+    "stream_answer",
+]
@@ -0,0 +1,87 @@
+"""
+aio.py
+
+Amaç:
+- generation.py ve conversation.py'deki akışın asyncio sürümü
+- Groq çağrıları AsyncGroq ile, retrieval ve oturum deposu (SQLite/Redis)
+  ise thread havuzunda çalışır; böylece bir worker beklerken diğer
+  konuşmalara hizmet verebilir
+"""
+
+import asyncio
+import time
+
+from . import conversation, llm, resources
+from .cache import lookup_answer, store_answer
+from .generation import answer_request, build_messages, retrieve, stream_token, stream_usage, summary_request
+from .metrics import observe_stage, record_usage, stage
+
+_session_locks = None
+
+
+async def generate_answer(question, conversation_summary="", rerank=None, lang_text=None):
+    """Async counterpart of generation.generate_answer"""
+    try:
+        # Embedding and FAISS search are CPU bound, keep them off the loop
+        retrieved = await asyncio.to_thread(retrieve, question, rerank, lang_text)
+        cached = lookup_answer(retrieved, conversation_summary)
+        if cached is not None:
+            return cached
+
+        messages = build_messages(question, retrieved, conversation_summary)
+        with stage("llm_answer"):
+            async with resources.get_llm_semaphore():
+                response = await llm.acomplete("answer", answer_request(messages), question)
+        record_usage("answer", getattr(response, "usage", None))
+        answer = response.choices[0].message.content.strip()
+        store_answer(retrieved, answer, conversation_summary)
+        return answer
+    except Exception as e:
+        return f"Üzgünüm, yanıt üretirken bir hata oluştu: {str(e)}"
+
+
+async def stream_answer(question, conversation_summary="", rerank=None, lang_text=None):
+    """Async counterpart of generation.stream_answer"""
+    retrieved = await asyncio.to_thread(retrieve, question, rerank, lang_text)
+    cached = lookup_answer(retrieved, conversation_summary)
+    if cached is not None:
+        yield cached
+        return
+
+    messages = build_messages(question, retrieved, conversation_summary)
+    start = time.perf_counter()
+    tokens = []
+    with stage("llm_answer"):
+        async with resources.get_llm_semaphore():
+            async for chunk in llm.astream("answer", answer_request(messages), question, usage_of=stream_usage):
+                record_usage("answer", stream_usage(chunk))
+                token = stream_token(chunk)
+                if token:
+                    if not tokens:
+                        observe_stage("llm_first_token", time.perf_counter() - start)
+                    tokens.append(token)
+                    yield token
+    store_answer(retrieved, "".join(tokens).strip(), conversation_summary)
+
+
+def _session_lock(session_id):
+    global _session_locks
+    if _session_locks is None:
+        _session_locks = [asyncio.Lock() for _ in range(conversation.SESSION_LOCK_STRIPES)]
+    return _session_locks[conversation.session_lock_index(session_id)]
+
+
+async def update_summary(session_id, question, answer):
+    """Async counterpart of conversation.update_summary"""
+    if not session_id:
+        return
+    async with _session_lock(session_id):
+        try:
+            with stage("llm_summary"):
+                summary = await asyncio.to_thread(conversation.get_summary, session_id)
+                async with resources.get_llm_semaphore():
+                    response = await llm.acomplete("summary", summary_request(summary, question, answer))
+            record_usage("summary", getattr(response, "usage", None))
+            await asyncio.to_thread(conversation.set_summary, session_id, response.choices[0].message.content.strip())
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
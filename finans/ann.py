@@ -0,0 +1,115 @@
+"""
+ann.py
+
+Amaç:
+- FAISS index'ini düz (brute force) aramanın yanında IVF-Flat, IVF-PQ ve
+  HNSW varyantlarıyla kurabilmek, istenirse 8-bit skaler quantization ile
+- Eğitim gerektiren index'leri (IVF, PQ, SQ) embedding örneğiyle eğitmek
+- Sorgu anında nprobe / efSearch ayarlarını uygulamak
+"""
+
+import math
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# k-means wants ~39 points per centroid; more than this adds training time, not quality
+MAX_TRAINING_POINTS = 100000
+ADD_BATCH_SIZE = 65536
+
+
+def default_nlist(count):
+    """IVF list count: 4*sqrt(n), capped so each list gets enough training points"""
+    return max(1, min(int(4 * math.sqrt(count)), count // 39))
+
+
+def default_pq_m(dim):
+    """Sub-quantizer count giving 8 dimensions per PQ code, must divide dim"""
+    m = max(1, dim // 8)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def _create(index_type, dim, count, nlist=None, pq_m=None, pq_bits=8, hnsw_m=32, sq8=False):
+    if index_type == "flat":
+        if sq8:
+            return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        if sq8:
+            return faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, hnsw_m)
+        return faiss.IndexHNSWFlat(dim, hnsw_m)
+
+    nlist = nlist or default_nlist(count)
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        if sq8:
+            return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+    if index_type == "ivf_pq":
+        # PQ codes are already compressed, sq8 does not apply
+        # 2**pq_bits centroids per sub-quantizer, each wanting ~39 training points
+        pq_bits = max(1, min(pq_bits, int(math.log2(max(count // 39, 2)))))
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m or default_pq_m(dim), pq_bits)
+    raise ValueError(f"Bilinmeyen index tipi: {index_type} (seçenekler: {', '.join(INDEX_TYPES)})")
+
+
+def build_index(embeddings, vector_ids, index_type="flat", **options):
+    """Train (when needed) and fill an IndexIDMap2 of the given type.
+
+    embeddings may be a float16 memmap; rows are converted to float32
+    in batches so the whole matrix is never copied at once. options are
+    nlist, pq_m, pq_bits, hnsw_m and sq8.
+    """
+    count, dim = embeddings.shape
+    base = _create(index_type, dim, count, **options)
+
+    if not base.is_trained:
+        sample = np.arange(count)
+        if count > MAX_TRAINING_POINTS:
+            sample = np.sort(np.random.default_rng(0).choice(count, MAX_TRAINING_POINTS, replace=False))
+        base.train(np.asarray(embeddings[sample], dtype="float32"))
+
+    index = faiss.IndexIDMap2(base)
+    vector_ids = np.asarray(vector_ids, dtype="int64")
+    for start in range(0, count, ADD_BATCH_SIZE):
+        end = start + ADD_BATCH_SIZE
+        index.add_with_ids(np.asarray(embeddings[start:end], dtype="float32"), vector_ids[start:end])
+    return index
+
+
+def index_type_of(index):
+    """INDEX_TYPES name of an (ID-mapped) index, None for anything else"""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(base, (faiss.IndexFlat, faiss.IndexScalarQuantizer)):
+        return "flat"
+    return None
+
+
+def supports_removal(index):
+    """HNSW graphs cannot drop vectors; such indexes are rebuilt instead"""
+    return index_type_of(index) != "hnsw"
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Apply query-time recall/speed knobs that the index type understands"""
+    index_type = index_type_of(index)
+    params = faiss.ParameterSpace()
+    if nprobe and index_type in ("ivf_flat", "ivf_pq"):
+        params.set_index_parameter(index, "nprobe", int(nprobe))
+    if ef_search and index_type == "hnsw":
+        params.set_index_parameter(index, "efSearch", int(ef_search))
+
+
+def index_memory(index):
+    """Serialized size in bytes, a close proxy for the RAM the index needs"""
+    return int(faiss.serialize_index(index).size)
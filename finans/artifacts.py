@@ -0,0 +1,104 @@
+"""
+artifacts.py
+
+Amaç:
+- Index, chunk store ve BM25 dosyalarını önce geçici bir yola yazıp
+  rename ile yerine koymak; okuyan süreç yarım yazılmış dosya görmesin
+- Her başarılı kurulumdan sonra sürüm damgasını (index_version.json) en son yazmak
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+_umask = None
+
+
+def default_mode(mode):
+    """mode with the process umask applied, as open() and mkdir() would create it.
+
+    mkstemp and mkdtemp create private (0600/0700) paths; artifacts renamed
+    from them get the permissions a plain write would have given them, so
+    other users (a server running as another user) can read them. The
+    umask can only be read by setting it, so it is read once.
+    """
+    global _umask
+    if _umask is None:
+        _umask = os.umask(0)
+        os.umask(_umask)
+    return mode & ~_umask
+
+
+def atomic_write_file(path, write):
+    """Call write(tmp_path) and rename the result over path.
+
+    The temporary file sits next to path so os.replace stays on one
+    filesystem and is atomic; it is removed if write fails.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, default_mode(0o666))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_dir(path, write):
+    """Call write(tmp_dir) and swap the finished directory in for path.
+
+    A directory can't be replaced in one rename, so the old one is moved
+    aside first; the gap is two renames long. Files a server already has
+    memory-mapped stay valid after the old directory is deleted.
+    """
+    parent = os.path.dirname(path) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        write(tmp_dir)
+        os.chmod(tmp_dir, default_mode(0o777))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    old_dir = None
+    if os.path.exists(path):
+        old_dir = f"{tmp_dir}.old"
+        os.rename(path, old_dir)
+    os.rename(tmp_dir, path)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def new_version():
+    """Sortable, unique build id such as 20261018T013018-3f9a1c"""
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+
+
+def write_version(path, **info):
+    """Stamp a finished build; written last so it only ever names complete artifacts"""
+    stamp = {"version": new_version(), "created_at": time.time(), **info}
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stamp, f, ensure_ascii=False, indent=2)
+
+    atomic_write_file(path, write)
+    return stamp
+
+
+def read_version(path):
+    """Contents of the version stamp, None when no build has written one"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
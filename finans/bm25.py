@@ -0,0 +1,124 @@
+"""
+bm25.py
+
+Amaç:
+- Chunk'lar üzerinde BM25 ters index'i (inverted index) kurmak ve aramak
+- "KKM", "TCMB", "repo" gibi tam terimleri embedding'lerin kaçırdığı
+  durumlarda yakalamak
+
+Klasör yapısı (data/bm25/):
+    vocab.json        terim -> terim id
+    term_offsets.npy  int64, terim t'nin posting'leri [offsets[t]:offsets[t+1]]
+    postings.npy      int32, chunk satırı
+    frequencies.npy   int32, terimin o chunk'taki sayısı
+    doc_lengths.npy   int32, chunk başına terim sayısı
+    vector_ids.npy    int64, satır -> FAISS id
+    params.json       k1, b
+"""
+
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+from .text import tokenize
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR posting list, loaded memory-mapped"""
+
+    def __init__(self, vocab, term_offsets, postings, frequencies, doc_lengths, vector_ids, k1=1.5, b=0.75):
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.vector_ids = vector_ids
+        self.k1 = k1
+        self.b = b
+        self.avgdl = float(np.mean(doc_lengths)) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, texts, vector_ids, k1=1.5, b=0.75):
+        vocab = {}
+        term_postings = []  # term id -> [(row, frequency)]
+        doc_lengths = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(str(text))
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(term_postings):
+                    term_postings.append([])
+                term_postings[term_id].append((row, frequency))
+
+        term_offsets = np.zeros(len(vocab) + 1, dtype="int64")
+        term_offsets[1:] = np.cumsum([len(p) for p in term_postings])
+        flat = [entry for postings in term_postings for entry in postings]
+        postings = np.array([row for row, _ in flat], dtype="int32")
+        frequencies = np.array([frequency for _, frequency in flat], dtype="int32")
+        return cls(
+            vocab, term_offsets, postings, frequencies,
+            np.array(doc_lengths, dtype="int32"), np.array(vector_ids, dtype="int64"), k1, b
+        )
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        np.save(os.path.join(path, "term_offsets.npy"), self.term_offsets)
+        np.save(os.path.join(path, "postings.npy"), self.postings)
+        np.save(os.path.join(path, "frequencies.npy"), self.frequencies)
+        np.save(os.path.join(path, "doc_lengths.npy"), self.doc_lengths)
+        np.save(os.path.join(path, "vector_ids.npy"), self.vector_ids)
+        with open(os.path.join(path, "params.json"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(path, "params.json"), "r", encoding="utf-8") as f:
+            params = json.load(f)
+        arrays = [
+            np.load(os.path.join(path, name), mmap_mode="r")
+            for name in ("term_offsets.npy", "postings.npy", "frequencies.npy", "doc_lengths.npy", "vector_ids.npy")
+        ]
+        return cls(vocab, *arrays, k1=params["k1"], b=params["b"])
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "params.json"))
+
+    def search(self, query, top_k=20):
+        """[(vector_id, score)] of the best matching chunks, best first"""
+        term_ids = {self.vocab[term] for term in tokenize(query) if term in self.vocab}
+        if not term_ids:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        scores = np.zeros(n_docs, dtype="float32")
+        for term_id in term_ids:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            rows = self.postings[start:end]
+            frequencies = self.frequencies[start:end].astype("float32")
+            document_frequency = end - start
+            idf = np.log(1 + (n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / self.avgdl)
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(self.vector_ids[row]), float(scores[row])) for row in candidates]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
@@ -0,0 +1,154 @@
+"""
+cache.py
+
+Amaç:
+- Birbirine çok benzeyen sorular için ("vadeli mevduat nedir",
+  "vadeli mevduat ne demek") Groq'a tekrar gitmeden önceki cevabı döndürmek
+- Sorular embedding benzerliği ile küçük bir FAISS index'inde aranır
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from . import config, metrics, resources
+
+
+def context_key(results, lang_text):
+    """Identity of the retrieved context; a cached answer is only reused
+    when the new question retrieved exactly the same chunks."""
+    parts = [str(r["id"]) if r.get("id") is not None else r["text"] for r in results]
+    parts.append(lang_text)
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Answer cache keyed on question embeddings with TTL and LRU eviction.
+
+    Similarity is the cosine between L2-normalised question vectors, found
+    with an inner-product FAISS index. The whole cache is dropped when the
+    version passed to lookup/store changes (i.e. a new index build was loaded).
+    """
+
+    def __init__(self, threshold=0.92, ttl=3600, max_entries=2000, candidates=5):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.candidates = candidates
+        self._lock = threading.Lock()
+        self._index = None
+        self._entries = OrderedDict()  # id -> (answer, context key, created at)
+        self._next_id = 0
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _normalise(self, embedding):
+        vector = np.array(embedding, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _check_version(self, version, dim):
+        if version != self._version or self._index is None or self._index.d != dim:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+            self._entries.clear()
+            self._version = version
+
+    def _remove(self, ids):
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+        self._index.remove_ids(np.array(ids, dtype="int64"))
+
+    def lookup(self, embedding, key, version=None):
+        """Cached answer for a similar question with the same context, or None"""
+        vector = self._normalise(embedding)
+        with self._lock:
+            self._check_version(version, vector.shape[1])
+            if self._index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            similarities, ids = self._index.search(vector, min(self.candidates, self._index.ntotal))
+            now = time.time()
+            expired = []
+            answer = None
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                entry_id = int(entry_id)
+                if entry_id < 0 or similarity < self.threshold:
+                    break
+                cached_answer, cached_key, created = self._entries[entry_id]
+                if now - created > self.ttl:
+                    expired.append(entry_id)
+                    continue
+                if cached_key == key:
+                    self._entries.move_to_end(entry_id)
+                    answer = cached_answer
+                    break
+
+            if expired:
+                self._remove(expired)
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return answer
+
+    def store(self, embedding, key, answer, version=None):
+        vector = self._normalise(embedding)
+        with self._lock:
+            self._check_version(version, vector.shape[1])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (answer, key, time.time())
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._remove(list(self._entries)[:overflow])
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+answer_cache = SemanticCache(
+    threshold=config.ANSWER_CACHE_THRESHOLD,
+    ttl=config.ANSWER_CACHE_TTL,
+    max_entries=config.ANSWER_CACHE_SIZE
+)
+
+
+def lookup_answer(retrieved, conversation_summary=""):
+    """Cached answer for this retrieval, or None.
+
+    Only first-turn questions are cached: with a conversation summary the
+    answer depends on more than the question and its context.
+    """
+    if not config.ANSWER_CACHE_ENABLED or conversation_summary or retrieved["query_embedding"] is None:
+        return None
+    answer = answer_cache.lookup(
+        retrieved["query_embedding"],
+        context_key(retrieved["results"], retrieved["lang_text"]),
+        resources.get_snapshot()["version"]
+    )
+    metrics.record_cache("answer", answer is not None)
+    return answer
+
+
+def store_answer(retrieved, answer, conversation_summary=""):
+    if not config.ANSWER_CACHE_ENABLED or conversation_summary or retrieved["query_embedding"] is None:
+        return
+    answer_cache.store(
+        retrieved["query_embedding"],
+        context_key(retrieved["results"], retrieved["lang_text"]),
+        answer,
+        resources.get_snapshot()["version"]
+    )
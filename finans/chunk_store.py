@@ -0,0 +1,125 @@
+"""
+chunk_store.py
+
+Amaç:
+- Chunk metinlerini ve url/title/chunk_id alanlarını tek, kompakt ve
+  memory-map ile açılan bir yapıda tutmak (pickle + CSV yerine)
+- Worker'lar aynı sayfaları işletim sistemi üzerinden paylaşır,
+  FAISS id'si ile O(1) erişim sağlanır
+
+Klasör yapısı (data/chunk_store/):
+    text.bin        tüm chunk metinleri, UTF-8, art arda
+    offsets.npy     int64, satır i'nin metni text.bin[offsets[i]:offsets[i+1]]
+    vector_ids.npy  int64, satır i'nin FAISS id'si
+    chunk_ids.npy   int32, sayfa içindeki chunk sırası
+    source_ids.npy  int32, sources.json içindeki (url, title) satırı
+    id_to_row.npy   int32, FAISS id -> satır (-1: yok)
+    sources.json    [[url, title], ...]
+    token_counts.npy  int32, satır i'nin prompt tokenizer'ındaki token sayısı (opsiyonel)
+    params.json     {"tokenizer": token_counts'u üreten tokenizer} (opsiyonel)
+"""
+
+import json
+import mmap
+import os
+
+import numpy as np
+
+
+def write_chunk_store(path, chunks, token_counts=None, tokenizer=None):
+    """Write chunks (dicts with vector_id, url, title, chunk_id, text) to path.
+
+    token_counts, one per chunk, are cached for context packing together
+    with the name of the tokenizer that produced them.
+    """
+    os.makedirs(path, exist_ok=True)
+    sources = {}
+    offsets = [0]
+    vector_ids, chunk_ids, source_ids = [], [], []
+
+    with open(os.path.join(path, "text.bin"), "wb") as text_file:
+        for chunk in chunks:
+            encoded = str(chunk["text"]).encode("utf-8")
+            text_file.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+            vector_ids.append(int(chunk["vector_id"]))
+            chunk_ids.append(int(chunk.get("chunk_id", 0)))
+            source = (chunk["url"], "" if chunk.get("title") is None else str(chunk.get("title")))
+            source_ids.append(sources.setdefault(source, len(sources)))
+
+    vector_ids = np.array(vector_ids, dtype="int64")
+    id_to_row = np.full(int(vector_ids.max()) + 1 if len(vector_ids) else 0, -1, dtype="int32")
+    id_to_row[vector_ids] = np.arange(len(vector_ids), dtype="int32")
+
+    np.save(os.path.join(path, "offsets.npy"), np.array(offsets, dtype="int64"))
+    np.save(os.path.join(path, "vector_ids.npy"), vector_ids)
+    np.save(os.path.join(path, "chunk_ids.npy"), np.array(chunk_ids, dtype="int32"))
+    np.save(os.path.join(path, "source_ids.npy"), np.array(source_ids, dtype="int32"))
+    np.save(os.path.join(path, "id_to_row.npy"), id_to_row)
+    with open(os.path.join(path, "sources.json"), "w", encoding="utf-8") as f:
+        json.dump([list(source) for source in sources], f, ensure_ascii=False)
+    if token_counts is not None:
+        np.save(os.path.join(path, "token_counts.npy"), np.asarray(token_counts, dtype="int32"))
+        with open(os.path.join(path, "params.json"), "w", encoding="utf-8") as f:
+            json.dump({"tokenizer": tokenizer}, f, ensure_ascii=False)
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view of a chunk store directory.
+
+    Supports the same get(vector_id) lookup as the old metadata dict.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.vector_ids = np.load(os.path.join(path, "vector_ids.npy"), mmap_mode="r")
+        self.chunk_ids = np.load(os.path.join(path, "chunk_ids.npy"), mmap_mode="r")
+        self.source_ids = np.load(os.path.join(path, "source_ids.npy"), mmap_mode="r")
+        self.id_to_row = np.load(os.path.join(path, "id_to_row.npy"), mmap_mode="r")
+        with open(os.path.join(path, "sources.json"), "r", encoding="utf-8") as f:
+            self.sources = json.load(f)
+
+        self.token_counts = None
+        self.tokenizer = None
+        if os.path.exists(os.path.join(path, "token_counts.npy")):
+            self.token_counts = np.load(os.path.join(path, "token_counts.npy"), mmap_mode="r")
+            with open(os.path.join(path, "params.json"), "r", encoding="utf-8") as f:
+                self.tokenizer = json.load(f)["tokenizer"]
+
+        with open(os.path.join(path, "text.bin"), "rb") as text_file:
+            size = os.fstat(text_file.fileno()).st_size
+            # mmap refuses empty files
+            self._text = mmap.mmap(text_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "id_to_row.npy"))
+
+    def __len__(self):
+        return len(self.vector_ids)
+
+    def row(self, row):
+        """Chunk at storage position row"""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        url, title = self.sources[int(self.source_ids[row])]
+        return {
+            "text": self._text[start:end].decode("utf-8"),
+            "url": url,
+            "title": title,
+            "chunk_id": int(self.chunk_ids[row]),
+            "tokens": None if self.token_counts is None else int(self.token_counts[row])
+        }
+
+    def get(self, vector_id, default=None):
+        """Chunk with this FAISS id, or default"""
+        if vector_id < 0 or vector_id >= len(self.id_to_row):
+            return default
+        row = int(self.id_to_row[vector_id])
+        if row < 0:
+            return default
+        return self.row(row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.row(row)
@@ -0,0 +1,135 @@
+"""
+config.py
+
+Amaç:
+- Veri dosyalarının yollarını ve model isimlerini tek yerde toplamak
+"""
+
+import json
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+LINKS_PATH = os.path.join(DATA_DIR, "all_links.csv")
+SCRAPED_DATA_PATH = os.path.join(DATA_DIR, "scraped_data.csv")
+CHUNKED_DATA_PATH = os.path.join(DATA_DIR, "chunked_data.csv")
+EMBEDDINGS_PATH = os.path.join(DATA_DIR, "embeddings.npy")
+EMBEDDING_IDS_PATH = os.path.join(DATA_DIR, "embedding_ids.npy")
+# sha1(model name + text) of each row in embeddings.npy, reused as the embedding cache
+EMBEDDING_KEYS_PATH = os.path.join(DATA_DIR, "embedding_keys.npy")
+INDEX_PATH = os.path.join(DATA_DIR, "faiss_index.index")
+# Memory-mapped chunk texts and url/title per FAISS id (see chunk_store.py)
+CHUNK_STORE_PATH = os.path.join(DATA_DIR, "chunk_store")
+# BM25 inverted index over the same chunks (see bm25.py)
+BM25_PATH = os.path.join(DATA_DIR, "bm25")
+# Build id written by scripts/update_index.py after all of the above (see artifacts.py)
+INDEX_VERSION_PATH = os.path.join(DATA_DIR, "index_version.json")
+# Legacy pickled metadata, only read when chunk_store/ is missing
+METADATA_PATH = os.path.join(DATA_DIR, "faiss_metadata.pkl")
+# Per-URL content hashes, HTTP validators and vector ids for incremental runs
+MANIFEST_PATH = os.path.join(DATA_DIR, "manifest.json")
+# Near-duplicate chunks dropped by scripts/chunk.py and the pages they duplicate
+DEDUP_REPORT_PATH = os.path.join(DATA_DIR, "dedup_report.json")
+# Progress of an interrupted scripts/pipeline.py run, removed when it finishes
+PIPELINE_CHECKPOINT_DIR = os.path.join(DATA_DIR, "pipeline_checkpoint")
+# Labelled questions (question, |-separated relevant URLs) for scripts/benchmark.py
+EVAL_QUESTIONS_PATH = os.path.join(DATA_DIR, "eval_questions.csv")
+
+# Chunks whose estimated shingle Jaccard similarity with an earlier chunk
+# reaches this are dropped by scripts/chunk.py (1 keeps all but exact copies)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+
+# Same model as scripts/embed.py, otherwise query vectors don't match the index
+EMBEDDING_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# Tokenizer matching the Llama 3 answer model, used to count prompt tokens (see packing.py)
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "Xenova/llama3-tokenizer-new")
+
+# Question embeddings: LRU cache size and micro-batching of concurrent encodes
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+# Detected answer languages remembered per distinct question
+LANGUAGE_CACHE_SIZE = int(os.getenv("LANGUAGE_CACHE_SIZE", "10000"))
+
+# Groq models (see llm.py): summaries and short definitional questions go to
+# the small, fast model, every other answer to the large one; each is the
+# other's fallback when Groq throttles it
+SMALL_MODEL = os.getenv("SMALL_MODEL", "llama3-8b-8192")
+LARGE_MODEL = os.getenv("LARGE_MODEL", "llama3-70b-8192")
+# false sends every answer to LARGE_MODEL
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+# Per-model API quota as [requests per minute, tokens per minute], set to the
+# limits of the Groq account in use; models not listed (all by default) are not limited
+LLM_RATE_LIMITS = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+# Longest wait for quota on one model before the next model is tried (or,
+# after the last one, the request fails as busy)
+LLM_MAX_QUEUE_SECONDS = float(os.getenv("LLM_MAX_QUEUE_SECONDS", "2"))
+
+API_KEY = os.getenv("API_KEY")
+
+# Upper bound on concurrent Groq calls from one async worker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# httpx connection pool shared by all async Groq calls in a worker
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "16"))
+
+# Sessions (recent messages, summary, language) cached in memory per process,
+# least recently used dropped first
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+# Where sessions live beyond that cache (see sessions.py): memory (this process
+# only), sqlite (shared by the workers of one machine) or redis
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(DATA_DIR, "sessions.db"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))  # seconds idle before a session expires
+# Seconds a cached session is trusted before re-reading a shared backend
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "2"))
+# Background threads updating summaries after the answer is sent
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+
+# Semantic answer cache for first-turn questions
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity between two questions to reuse an answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+
+# Hybrid retrieval: fuse FAISS and BM25 rankings with reciprocal rank fusion
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+# Hits taken from each retriever before fusion
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# FAISS index variant built by scripts/update_index.py (see ann.py):
+# flat, ivf_flat, ivf_pq or hnsw; FAISS_SQ8=true stores flat/ivf_flat/hnsw vectors as 8-bit
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_SQ8 = os.getenv("FAISS_SQ8", "false").lower() == "true"
+# Query-time recall/speed trade-off: IVF lists probed, HNSW candidate list size
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+# Seconds between checks of index_version.json for a new build to hot-reload (0 = never)
+INDEX_RELOAD_INTERVAL = float(os.getenv("INDEX_RELOAD_INTERVAL", "30"))
+
+# Context packing: chunks retrieved per question and the prompt tokens they may fill
+CONTEXT_MAX_CHUNKS = int(os.getenv("CONTEXT_MAX_CHUNKS", "8"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2048"))
+# A chunk that doesn't fit is trimmed only if at least this many tokens are left
+CONTEXT_MIN_TRIM_TOKENS = int(os.getenv("CONTEXT_MIN_TRIM_TOKENS", "48"))
+
+# Cross-encoder re-ranking of RERANK_CANDIDATES search hits down to RERANK_TOP_K
+# (default for requests that don't set "rerank" themselves)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "3"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+# Past this, scoring stops and the search order is used
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "200"))
+
+# One JSON line per request (request id, stage timings, tokens, errors) on stdout
+REQUEST_LOG = os.getenv("REQUEST_LOG", "false").lower() == "true"
@@ -0,0 +1,109 @@
+"""
+conversation.py
+
+Amaç:
+- Her oturum için kısa bir konuşma özeti (rolling summary) tutmak
+- Özeti, cevap kullanıcıya gönderildikten sonra arka planda
+  önceki özet + son soru/cevap çiftinden güncellemek
+- Oturumun cevap dilini hatırlamak; kısa takip soruları aynı dilde cevaplansın
+- Oturumun son mesajlarını tutmak
+- Hepsi sunucu tarafındaki oturum deposunda durur (sessions.py)
+"""
+
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config, llm
+from .generation import summary_request
+from .language import DEFAULT_LANGUAGE, detect_language
+from .metrics import record_usage, stage
+from .sessions import get_store
+from .web import append_history
+
+# Updates for the same session must run one after another, otherwise the
+# second one starts from a summary that misses the first pair.
+SESSION_LOCK_STRIPES = 64
+_session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+# Appends to one session's history, kept apart from the locks held during a summary call
+_history_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+_executor = ThreadPoolExecutor(max_workers=config.SUMMARY_WORKERS, thread_name_prefix="summary")
+
+
+def _after_fork():
+    """A forked worker gets its own summary threads and session locks"""
+    global _executor, _session_locks, _history_locks
+    _executor = ThreadPoolExecutor(max_workers=config.SUMMARY_WORKERS, thread_name_prefix="summary")
+    _session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+    _history_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def session_lock_index(session_id):
+    """Stripe index shared by the thread and asyncio lock pools"""
+    return zlib.crc32(session_id.encode()) % SESSION_LOCK_STRIPES
+
+
+def get_summary(session_id):
+    """Current summary of the session, empty for a new conversation"""
+    if not session_id:
+        return ""
+    return get_store().get(session_id, "summary", "")
+
+
+def set_summary(session_id, summary):
+    get_store().set(session_id, summary=summary)
+
+
+def get_history(session_id):
+    """Last messages of the session ("Kullanıcı: ..." / "Asistan: ..."), oldest first"""
+    if not session_id:
+        return []
+    return get_store().get(session_id, "history", [])
+
+
+def record_messages(session_id, *messages):
+    """Append messages to the session history, keeping the last MAX_HISTORY_MESSAGES.
+
+    Two requests of one session appending at once would both start from
+    the same history and one's messages would be lost, so appends to a
+    session run one after another.
+    """
+    if session_id:
+        with _history_locks[session_lock_index(session_id)]:
+            get_store().set(session_id, history=append_history(get_history(session_id), *messages))
+
+
+def session_language(session_id, question):
+    """Answer language for this question, detected once and remembered per session.
+
+    Questions too short to detect reuse the session's last language.
+    """
+    previous = get_store().get(session_id, "language", DEFAULT_LANGUAGE) if session_id else DEFAULT_LANGUAGE
+    with stage("language"):
+        language = detect_language(question, fallback=previous)
+    if session_id and language != previous:
+        get_store().set(session_id, language=language)
+    return language
+
+
+def update_summary(session_id, question, answer):
+    """Fold the newest question/answer pair into the session summary"""
+    with _session_locks[session_lock_index(session_id)]:
+        try:
+            with stage("llm_summary"):
+                response = llm.complete("summary", summary_request(get_summary(session_id), question, answer))
+            record_usage("summary", getattr(response, "usage", None))
+            set_summary(session_id, response.choices[0].message.content.strip())
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
+
+
+def schedule_summary_update(session_id, question, answer):
+    """Update the summary in the background so the answer isn't delayed"""
+    if session_id:
+        _executor.submit(update_summary, session_id, question, answer)
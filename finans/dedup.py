@@ -0,0 +1,96 @@
+"""
+dedup.py
+
+Amaç:
+- Neredeyse aynı chunk'ları (Wikipedia taslakları, bankaların ortak
+  şablon metinleri, aynı sayfanın farklı URL'leri) index'e girmeden bulmak
+- Her chunk için MinHash imzası çıkarıp LSH bantlarıyla sadece aday
+  çiftleri karşılaştırmak; böylece chunk sayısı artsa da karşılaştırma
+  sayısı doğrusal kalır
+"""
+
+import zlib
+
+import numpy as np
+
+from .text import tokenize
+
+# Mersenne prime 2**31 - 1: (a * x + b) mod p is a universal hash family,
+# and a * x stays below 2**62 so it never overflows uint64
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text, size=3):
+    """Set of size-word shingles of the folded, stopword-free terms"""
+    terms = tokenize(text)
+    if len(terms) < size:
+        return {" ".join(terms)} if terms else set()
+    return {" ".join(terms[i:i + size]) for i in range(len(terms) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with LSH banding over the chunks added so far.
+
+    find() returns (key, similarity) for the earlier chunk with the highest
+    estimated Jaccard similarity to the text, when that is at least
+    threshold, and (None, 0.0) otherwise. With the default 32 bands of 4
+    rows, pairs above ~0.45 similarity become candidates with high
+    probability; candidates are then checked against the full signature.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=32, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def signature(self, text):
+        """MinHash signature: uint32 array of num_perm values, None for empty text"""
+        items = shingles(text)
+        if not items:
+            return None
+        hashes = np.fromiter((zlib.crc32(item.encode("utf-8")) % _PRIME for item in items),
+                             dtype=np.uint64, count=len(items))
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return values.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, text, signature=None):
+        """(key of a near-duplicate added earlier, estimated similarity) or (None, 0.0)"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None, 0.0
+        best, best_similarity = None, 0.0
+        seen = set()
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            for key in bucket.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity > best_similarity:
+                    best, best_similarity = key, similarity
+        if best_similarity >= self.threshold:
+            return best, best_similarity
+        return None, 0.0
+
+    def add(self, key, text, signature=None):
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return
+        self._signatures[key] = signature
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band, []).append(key)
+
+    def __len__(self):
+        return len(self._signatures)
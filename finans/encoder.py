@@ -0,0 +1,136 @@
+"""
+encoder.py
+
+Amaç:
+- Soru embedding'lerini süreç içinde tek bir servisten üretmek
+- Aynı (normalize edilmiş) soru tekrar gelirse modeli hiç çalıştırmadan
+  LRU cache'ten dönmek
+- Birkaç milisaniye içinde gelen eşzamanlı soruları tek bir batch
+  encode çağrısında birleştirmek
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from . import config, metrics, resources
+
+
+def normalize_question(question):
+    """Cache key: case and whitespace differences don't change the question"""
+    return " ".join(str(question).split()).lower()
+
+
+class QueryEncoder:
+    """Cached, micro-batching front end for the SentenceTransformer.
+
+    encode() may be called from any number of threads. Cache misses are
+    queued; a single worker thread waits up to max_wait seconds (or until
+    max_batch questions are queued) and encodes them with one model call.
+    A question already waiting in the queue is not queued twice.
+    """
+
+    def __init__(self, cache_size=10000, max_batch=32, max_wait=0.005):
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # normalized question -> (1, dim) float32
+        self._pending = {}  # normalized question -> Future
+        self._queue = queue.Queue()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def encode(self, question):
+        """(1, dim) float32 vector of question; raises if the model fails"""
+        key = normalize_question(question)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                metrics.record_cache("query_embedding", True)
+                return vector
+            self.misses += 1
+            metrics.record_cache("query_embedding", False)
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = Future()
+                self._queue.put(key)
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+                    self._worker.start()
+        return future.result()
+
+    def _next_batch(self):
+        keys = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(keys) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                keys.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return keys
+
+    def _run(self):
+        while True:
+            keys = self._next_batch()
+            try:
+                vectors = resources.get_embedder().encode(keys, batch_size=len(keys))
+                vectors = np.asarray(vectors, dtype="float32")
+                error = None
+            except Exception as e:
+                error = e
+
+            with self._lock:
+                self.batches += 1
+                futures = [self._pending.pop(key) for key in keys]
+                if error is None:
+                    results = []
+                    for key, vector in zip(keys, vectors):
+                        vector = vector.reshape(1, -1)
+                        # Shared between callers, so nobody may modify it in place
+                        vector.flags.writeable = False
+                        self._cache[key] = vector
+                        results.append(vector)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+            for i, future in enumerate(futures):
+                if error is None:
+                    future.set_result(results[i])
+                else:
+                    future.set_exception(error)
+
+    def _after_fork(self):
+        """The worker thread stays behind in the parent; a forked child starts its own"""
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+query_encoder = QueryEncoder(
+    cache_size=config.QUERY_CACHE_SIZE,
+    max_batch=config.EMBED_BATCH_MAX,
+    max_wait=config.EMBED_BATCH_WAIT_MS / 1000
+)
+# Pre-fork servers warm the encoder up in the master (see warmup.py)
+os.register_at_fork(after_in_child=query_encoder._after_fork)
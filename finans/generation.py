@@ -0,0 +1,189 @@
+"""
+generation.py
+
+Amaç:
+- Prompt oluştur
+- Groq ChatCompletion ile yanıt ve konuşma özeti üret
+"""
+
+import time
+
+from . import config, llm
+from .cache import lookup_answer, store_answer
+from .language import detect_language
+from .metrics import observe_stage, record_usage, stage
+from .rerank import rerank as rerank_results
+from .retrieval import embed_question, format_context, search_context
+
+SYSTEM_PROMPT = "Sen bir finans asistanısın. Soruları açık, anlaşılır ve bağlama dayalı olarak cevapla. Türkçe sorulara Türkçe, İngilizce sorulara İngilizce cevap ver."
+
+
+def summary_request(previous_summary, question, answer):
+    """Completion arguments for updating the rolling conversation summary.
+
+    Only the previous summary and the newest question/answer pair are sent,
+    so the cost of a summary update does not grow with the conversation.
+    """
+    summary_prompt = f"""
+Aşağıda bir konuşmanın şimdiye kadarki özeti ve son soru-cevap çifti var.
+Özeti son çiftteki yeni bilgilerle güncelle. 
+Sadece önemli noktaları ve konu bağlamını belirt:
+
+### ÖNCEKİ ÖZET ###
+{previous_summary if previous_summary else "Yeni konuşma"}
+
+### SON SORU ###
+{question}
+
+### SON CEVAP ###
+{answer}
+
+GÜNCEL ÖZET:"""
+    return {
+        "messages": [
+            {"role": "system", "content": "Sen bir konuşma özetleyicisisin. Kısa ve öz özet yap."},
+            {"role": "user", "content": summary_prompt}
+        ],
+        "max_tokens": 200,
+        "temperature": 0.3
+    }
+
+
+def answer_request(messages):
+    """Completion arguments for the answer call; llm.py picks the model"""
+    return {
+        "messages": messages,
+        "max_tokens": 1000,
+        "temperature": 0.7
+    }
+
+
+def build_prompt(question, context, lang_text, conversation_summary=""):
+    """Main prompt with context and conversation summary"""
+    return f"""
+Sen finans, bankacılık ve ekonomi alanlarında uzmanlaşmış bir yapay zekâ danışmanısın.
+Aşağıda bir kullanıcının sorusu ve bu soruya dair bazı bilgi parçaları (bağlam) yer alıyor. 
+Görevin, bu bağlama dayanarak doğru, açık ve tekrar etmeyen bir cevap üretmek.
+
+❗️ Cevabını hazırlarken şu kurallara dikkat et:
+- Aynı kelimeleri tekrar tekrar kullanma. Anlamı koruyarak eş anlamlılarla zenginleştir.
+- Gereksiz tekrarlar, döngüsel anlatımlar ve soyut genellemelerden kaçın.
+- Uzunsa madde madde yaz.
+- Elindeki bilgi yetersizse bunu dürüstçe belirt.
+- Üst üste aynı kelimeleri kullanma.
+- Kullanıcıya yardımcı olacak pratik bilgiler ver.
+- Önceki konuşma geçmişini dikkate al ve tutarlı cevaplar ver.
+
+### DİL ###
+{lang_text}
+
+### KONUŞMA GEÇMİŞİ ###
+{conversation_summary if conversation_summary else "Yeni konuşma"}
+
+### BAĞLAM ###
+{context}
+
+### SORU ###
+{question}
+
+### CEVAP ###
+"""
+
+
+def retrieve(question, rerank=None, lang_text=None):
+    """Retrieved chunks, context block and answer language for the question.
+
+    lang_text is detected here unless the caller already knows it (e.g.
+    from conversation.session_language). With rerank (config.RERANK_ENABLED
+    when None) RERANK_CANDIDATES hits are re-scored by the cross-encoder and
+    only the best RERANK_TOP_K go into the context.
+    """
+    if rerank is None:
+        rerank = config.RERANK_ENABLED
+    with stage("embed"):
+        query_embedding = embed_question(question)
+    with stage("search"):
+        top_k = config.RERANK_CANDIDATES if rerank else config.CONTEXT_MAX_CHUNKS
+        results = search_context(question, top_k=top_k, query_embedding=query_embedding)
+    if rerank:
+        with stage("rerank"):
+            results = rerank_results(question, results)
+    with stage("pack"):
+        context = format_context(results)
+    if not lang_text:
+        with stage("language"):
+            lang_text = detect_language(question)
+    return {
+        "query_embedding": query_embedding,
+        "results": results,
+        "context": context,
+        "lang_text": lang_text
+    }
+
+
+def build_messages(question, retrieved, conversation_summary=""):
+    """Chat messages for the answer call"""
+    prompt = build_prompt(question, retrieved["context"], retrieved["lang_text"], conversation_summary)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def generate_answer(question, conversation_summary="", rerank=None, lang_text=None):
+    """Generate answer using Groq API with RAG context"""
+    try:
+        retrieved = retrieve(question, rerank, lang_text)
+        cached = lookup_answer(retrieved, conversation_summary)
+        if cached is not None:
+            return cached
+
+        messages = build_messages(question, retrieved, conversation_summary)
+        with stage("llm_answer"):
+            response = llm.complete("answer", answer_request(messages), question)
+        record_usage("answer", getattr(response, "usage", None))
+        answer = response.choices[0].message.content.strip()
+        store_answer(retrieved, answer, conversation_summary)
+        return answer
+    except Exception as e:
+        return f"Üzgünüm, yanıt üretirken bir hata oluştu: {str(e)}"
+
+
+def stream_answer(question, conversation_summary="", rerank=None, lang_text=None):
+    """Yield answer tokens as Groq streams them.
+
+    A cached answer is yielded as a single token. Errors are raised to the
+    caller, which has already started sending the response and decides how
+    to report them.
+    """
+    retrieved = retrieve(question, rerank, lang_text)
+    cached = lookup_answer(retrieved, conversation_summary)
+    if cached is not None:
+        yield cached
+        return
+
+    messages = build_messages(question, retrieved, conversation_summary)
+    start = time.perf_counter()
+    tokens = []
+    with stage("llm_answer"):
+        for chunk in llm.stream("answer", answer_request(messages), question, usage_of=stream_usage):
+            record_usage("answer", stream_usage(chunk))
+            token = stream_token(chunk)
+            if token:
+                if not tokens:
+                    observe_stage("llm_first_token", time.perf_counter() - start)
+                tokens.append(token)
+                yield token
+    store_answer(retrieved, "".join(tokens).strip(), conversation_summary)
+
+
+def stream_usage(chunk):
+    """Token usage Groq attaches to the last streamed chunk, or None"""
+    return getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+def stream_token(chunk):
+    """Text delta of one streamed completion chunk, or None"""
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
@@ -0,0 +1,76 @@
+"""
+language.py
+
+Amaç:
+- Sorunun dilini belirleyip cevap dilini seçmek
+- Aynı soruya her zaman aynı sonucu vermek (sabit seed, sadece tr/en profilleri)
+- Profilleri uygulama açılırken yükleyip ilk isteği yavaşlatmamak
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+
+from . import config
+
+# Only two answer languages exist, so only their profiles are loaded
+LANGUAGES = {"tr": "Türkçe", "en": "İngilizce"}
+DEFAULT_LANGUAGE = "Türkçe"
+# Short questions are unreliable for langdetect
+MIN_DETECT_LENGTH = 12
+# Letters English text never contains
+_TURKISH_LETTERS = frozenset("çğıöşüÇĞİÖŞÜ")
+
+_lock = threading.Lock()
+_factory = None
+
+
+def _get_factory():
+    global _factory
+    if _factory is None:
+        with _lock:
+            if _factory is None:
+                profiles = []
+                for lang in LANGUAGES:
+                    with open(os.path.join(PROFILES_DIRECTORY, lang), encoding="utf-8") as f:
+                        profiles.append(f.read())
+                factory = DetectorFactory()
+                factory.load_json_profile(profiles)
+                # langdetect samples n-grams randomly; a fixed seed makes it deterministic
+                factory.set_seed(0)
+                _factory = factory
+    return _factory
+
+
+@lru_cache(maxsize=config.LANGUAGE_CACHE_SIZE)
+def _detect(text):
+    if _TURKISH_LETTERS.intersection(text):
+        return "tr"
+    detector = _get_factory().create()
+    detector.append(text)
+    return detector.detect()
+
+
+def detect_language(question, fallback=DEFAULT_LANGUAGE):
+    """Return the answer language label used in the prompt.
+
+    fallback is returned when the question is too short or detection
+    fails; callers pass the session's language so a short follow-up keeps
+    the language of the conversation.
+    """
+    text = " ".join(str(question).split())
+    if len(text) < MIN_DETECT_LENGTH:
+        return fallback
+    try:
+        lang = _detect(text)
+    except Exception:
+        return fallback
+    return LANGUAGES.get(lang, DEFAULT_LANGUAGE)
+
+
+def warm_up():
+    """Load the language profiles before the first request needs them"""
+    _get_factory()
+    detect_language("What is a time deposit account?")
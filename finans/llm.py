@@ -0,0 +1,336 @@
+"""
+llm.py
+
+Amaç:
+- Groq çağrılarını tek bir kapıdan geçirmek
+- Modeli göreve ve soruya göre seçmek: özetler ve kısa tanım soruları
+  küçük/hızlı modele, diğerleri büyük modele
+- Aynı anda gelen birebir aynı istekleri tek bir API çağrısında birleştirmek
+- Model başına dakikalık istek ve token kotasını token bucket ile uygulamak
+- 429 (rate limit) gelince ya da kota dolunca diğer modele geçmek; hiçbir
+  modelde yer yoksa istekleri dakikalarca bekletmek yerine hemen hata vermek
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from . import config, metrics, resources
+
+# Definitional questions this short are answered well by the small model
+SIMPLE_MAX_WORDS = 10
+_DEFINITION = re.compile(r"\b(nedir|ne demek|ne demektir|anlamı nedir|what is|what's|what are|define|meaning of)\b")
+_COMPLEX = re.compile(
+    r"\b(fark|farkı|farkları|karşılaştır|hesapla|neden|nasıl|avantaj|dezavantaj|"
+    r"difference|compare|versus|vs|calculate|why|how|pros|cons)\b"
+)
+# Seconds a model is skipped after a 429 without a Retry-After header
+RATE_LIMIT_COOLDOWN = 5.0
+
+_lock = threading.Lock()
+_limiters = {}
+_cooldowns = {}  # model -> monotonic time it may be used again
+_flights = {}  # request key -> Future of the call serving everyone asking it
+_async_flights = {}
+
+
+class LLMBusyError(Exception):
+    """Every model's quota is used up for longer than LLM_MAX_QUEUE_SECONDS"""
+
+    def __init__(self):
+        super().__init__("Şu anda çok fazla istek var, lütfen biraz sonra tekrar deneyin")
+
+
+class TokenBucket:
+    """rate units per second, up to capacity saved up.
+
+    take() always succeeds and may leave the bucket in debt; the returned
+    delay is how long the caller has to wait for its share to be earned.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount):
+        """Seconds until amount could be taken without waiting"""
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        self._refill()
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate)
+
+    def give_back(self, amount):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets of one model"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+
+    def take(self, tokens, max_wait):
+        """Seconds to wait before the call, or None (nothing taken) if that would exceed max_wait"""
+        with self._lock:
+            if max(self.requests.delay(1), self.tokens.delay(tokens)) > max_wait:
+                return None
+            return max(self.requests.take(1), self.tokens.take(tokens))
+
+    def give_back(self, tokens):
+        with self._lock:
+            self.tokens.give_back(tokens)
+
+
+def get_limiter(model):
+    """RateLimiter for model from LLM_RATE_LIMITS, None when it has no quota"""
+    with _lock:
+        if model not in _limiters:
+            limits = config.LLM_RATE_LIMITS.get(model)
+            _limiters[model] = RateLimiter(*limits) if limits else None
+        return _limiters[model]
+
+
+def is_simple(question):
+    """Short definitional question ("kredi notu nedir?") without comparison or calculation"""
+    text = " ".join(str(question or "").lower().split())
+    return (
+        len(text.split()) <= SIMPLE_MAX_WORDS
+        and _DEFINITION.search(text) is not None
+        and _COMPLEX.search(text) is None
+    )
+
+
+def route(task, question=None):
+    """Models to try for a call, preferred first"""
+    small = task == "summary" or (config.MODEL_ROUTING and is_simple(question))
+    preferred, fallback = (
+        (config.SMALL_MODEL, config.LARGE_MODEL) if small else (config.LARGE_MODEL, config.SMALL_MODEL)
+    )
+    return [preferred] if fallback == preferred else [preferred, fallback]
+
+
+def estimate_tokens(request):
+    """Tokens a call may use: ~3 characters per prompt token plus max_tokens.
+
+    The unused part is given back when Groq reports the real usage.
+    """
+    prompt = sum(len(message["content"]) for message in request["messages"])
+    return prompt // 3 + request.get("max_tokens", 0)
+
+
+def _plan(task, question):
+    """route() with models cooling down after a 429 moved to the end"""
+    models = route(task, question)
+    now = time.monotonic()
+    with _lock:
+        return sorted(models, key=lambda model: _cooldowns.get(model, 0) > now)
+
+
+def _admit(model, cost):
+    """Seconds to wait before calling model, or None to try the next model instead"""
+    limiter = get_limiter(model)
+    if limiter is None:
+        return 0.0
+    wait = limiter.take(cost, config.LLM_MAX_QUEUE_SECONDS)
+    if wait is None:
+        metrics.record_llm_call(model, "quota_skipped")
+    return wait
+
+
+def is_rate_limit(error):
+    return getattr(error, "status_code", None) == 429
+
+
+def _cool_down(model, error):
+    retry_after = RATE_LIMIT_COOLDOWN
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", retry_after))
+        except (TypeError, ValueError):
+            pass
+    with _lock:
+        _cooldowns[model] = time.monotonic() + retry_after
+    metrics.record_llm_call(model, "rate_limited")
+
+
+def settle_usage(model, cost, usage):
+    """Give back the tokens reserved for a call but not used by it"""
+    limiter = get_limiter(model)
+    if limiter is None or usage is None:
+        return
+    used = getattr(usage, "total_tokens", None)
+    if used is None:
+        used = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+    if used < cost:
+        limiter.give_back(cost - used)
+
+
+def release_tokens(model, cost):
+    """Give back all the tokens reserved for a call that failed; it served nothing"""
+    limiter = get_limiter(model)
+    if limiter is not None:
+        limiter.give_back(cost)
+
+
+def _call(task, request, question, stream=False):
+    """(model, response) from the first model of the plan that isn't throttled.
+
+    Raises the last 429, or LLMBusyError when every model's quota is used up.
+    """
+    cost = estimate_tokens(request)
+    models = _plan(task, question)
+    last_error = None
+    for model in models:
+        wait = _admit(model, cost)
+        if wait is None:
+            continue
+        if wait:
+            metrics.observe_stage("llm_queue", wait)
+            time.sleep(wait)
+        try:
+            response = resources.get_client().chat.completions.create(model=model, stream=stream, **request)
+        except Exception as e:
+            release_tokens(model, cost)
+            if not is_rate_limit(e):
+                metrics.record_llm_call(model, "error")
+                raise
+            _cool_down(model, e)
+            last_error = e
+            continue
+        metrics.record_llm_call(model, "ok")
+        return model, response
+    raise last_error or LLMBusyError()
+
+
+async def _acall(task, request, question, stream=False):
+    """Async counterpart of _call, on the AsyncGroq client"""
+    cost = estimate_tokens(request)
+    models = _plan(task, question)
+    last_error = None
+    for model in models:
+        wait = _admit(model, cost)
+        if wait is None:
+            continue
+        if wait:
+            metrics.observe_stage("llm_queue", wait)
+            await asyncio.sleep(wait)
+        try:
+            response = await resources.get_async_client().chat.completions.create(
+                model=model, stream=stream, **request
+            )
+        except Exception as e:
+            release_tokens(model, cost)
+            if not is_rate_limit(e):
+                metrics.record_llm_call(model, "error")
+                raise
+            _cool_down(model, e)
+            last_error = e
+            continue
+        metrics.record_llm_call(model, "ok")
+        return model, response
+    raise last_error or LLMBusyError()
+
+
+def flight_key(task, request, question):
+    """Identical calls (same task, route and arguments) share one key"""
+    payload = json.dumps([task, route(task, question), request], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def complete(task, request, question=None):
+    """Chat completion for task ("answer" or "summary").
+
+    request holds the completion arguments except model and stream.
+    Callers asking for the same completion while it is in flight wait for
+    that call instead of making their own.
+    """
+    key = flight_key(task, request, question)
+    with _lock:
+        future = _flights.get(key)
+        leader = future is None
+        if leader:
+            future = _flights[key] = Future()
+    if not leader:
+        metrics.record_llm_call(route(task, question)[0], "coalesced")
+        return future.result()
+
+    try:
+        model, response = _call(task, request, question)
+        settle_usage(model, estimate_tokens(request), getattr(response, "usage", None))
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _flights.pop(key, None)
+
+
+async def acomplete(task, request, question=None):
+    """Async counterpart of complete; in-flight calls are shared within one event loop"""
+    key = flight_key(task, request, question)
+    future = _async_flights.get(key)
+    if future is not None:
+        metrics.record_llm_call(route(task, question)[0], "coalesced")
+        return await asyncio.shield(future)
+
+    future = _async_flights[key] = asyncio.get_running_loop().create_future()
+    try:
+        model, response = await _acall(task, request, question)
+        settle_usage(model, estimate_tokens(request), getattr(response, "usage", None))
+        future.set_result(response)
+        return response
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Nobody may be waiting; don't let asyncio report the exception as lost
+        future.exception()
+        raise
+    finally:
+        _async_flights.pop(key, None)
+
+
+def stream(task, request, question=None, usage_of=None):
+    """Streamed completion chunks for task.
+
+    Routing, quota and 429 failover apply as for complete(); streams are
+    not shared. usage_of(chunk) extracts the usage Groq reports at the end
+    so unused reserved tokens can be given back.
+    """
+    model, chunks = _call(task, request, question, stream=True)
+    cost = estimate_tokens(request)
+    for chunk in chunks:
+        if usage_of is not None:
+            settle_usage(model, cost, usage_of(chunk))
+        yield chunk
+
+
+async def astream(task, request, question=None, usage_of=None):
+    """Async counterpart of stream"""
+    model, chunks = await _acall(task, request, question, stream=True)
+    cost = estimate_tokens(request)
+    async for chunk in chunks:
+        if usage_of is not None:
+            settle_usage(model, cost, usage_of(chunk))
+        yield chunk
@@ -0,0 +1,69 @@
+"""
+manifest.py
+
+Amaç:
+- Pipeline'ın artımlı çalışması için URL başına durum tutmak:
+  içerik hash'i, ETag/Last-Modified ve FAISS'teki chunk (vektör) id'leri
+- Böylece değişmeyen sayfalar yeniden çekilmez, chunk'lanmaz ve embed edilmez
+
+Format (data/manifest.json):
+    {
+        "next_vector_id": 1200,
+        "pages": {
+            "https://...": {
+                "etag": "...",
+                "last_modified": "...",
+                "content_hash": "...",
+                "vector_ids": [0, 1, 2]
+            }
+        }
+    }
+"""
+
+import hashlib
+import json
+import os
+
+from . import config
+from .artifacts import atomic_write_file
+
+
+def load_manifest(path=None):
+    """Manifest dict; an empty one on the first run"""
+    path = path or config.MANIFEST_PATH
+    if not os.path.exists(path):
+        return {"next_vector_id": 0, "pages": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest.setdefault("next_vector_id", 0)
+    manifest.setdefault("pages", {})
+    return manifest
+
+
+def save_manifest(manifest, path=None):
+    """Write the manifest atomically; a truncated one would hand out vector ids twice"""
+    path = path or config.MANIFEST_PATH
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    atomic_write_file(path, write)
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_vector_ids(chunks):
+    """Vector ids of chunk rows; their row numbers for a chunked_data.csv written before vector ids existed"""
+    if chunks and "vector_id" not in chunks[0]:
+        return list(range(len(chunks)))
+    return [int(chunk["vector_id"]) for chunk in chunks]
+
+
+def allocate_vector_ids(manifest, count):
+    """Reserve count new vector ids; ids are never reused"""
+    start = manifest["next_vector_id"]
+    manifest["next_vector_id"] = start + count
+    return list(range(start, start + count))
@@ -0,0 +1,169 @@
+"""
+metrics.py
+
+Amaç:
+- İstek başına aşama sürelerini (dil, embedding, arama, rerank, bağlam,
+  LLM cevap/özet) ölçmek ve Prometheus histogramlarına yazmak
+- LLM token sayılarını, model başına çağrıları, hata sayılarını ve cache
+  isabet oranlarını saymak
+- /metrics için Prometheus metin formatını üretmek
+- İstenirse her isteği request id'li tek satırlık JSON log olarak yazmak
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+
+from . import config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_SECONDS = Histogram(
+    "finans_request_seconds", "End-to-end request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter("finans_requests_total", "Requests served", ["endpoint", "status"])
+STAGE_SECONDS = Histogram(
+    "finans_stage_seconds", "Latency of one pipeline stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+ERRORS = Counter("finans_errors_total", "Exceptions raised inside a stage", ["stage"])
+LLM_TOKENS = Counter("finans_llm_tokens_total", "Tokens reported by Groq", ["call", "kind"])
+CACHE_LOOKUPS = Counter("finans_cache_lookups_total", "Cache lookups", ["cache", "result"])
+LLM_CALLS = Counter(
+    "finans_llm_calls_total", "Groq calls by model: ok, error, rate_limited, quota_skipped, coalesced",
+    ["model", "result"]
+)
+
+logger = logging.getLogger("finans.requests")
+
+# Trace of the request being handled; asyncio.to_thread copies it into worker threads
+_current = contextvars.ContextVar("finans_trace", default=None)
+
+
+def start_request(endpoint, request_id=None):
+    """Begin timing a request; stages run after this are recorded in its trace"""
+    trace = {
+        "request_id": request_id or uuid.uuid4().hex,
+        "endpoint": endpoint,
+        "start": time.perf_counter(),
+        "stages": {},
+        "tokens": {},
+        "errors": [],
+    }
+    _current.set(trace)
+    return trace
+
+
+def activate(trace):
+    """Make trace current again, e.g. in a streaming generator run later"""
+    _current.set(trace)
+
+
+def finish_request(trace, status):
+    """Record the request's total latency and write its log line"""
+    if trace.get("finished"):
+        return
+    trace["finished"] = True
+    elapsed = time.perf_counter() - trace["start"]
+    REQUEST_SECONDS.labels(trace["endpoint"]).observe(elapsed)
+    REQUESTS.labels(trace["endpoint"], str(status)).inc()
+    if config.REQUEST_LOG:
+        logger.info(json.dumps({
+            "request_id": trace["request_id"],
+            "endpoint": trace["endpoint"],
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in trace["stages"].items()},
+            "tokens": trace["tokens"],
+            "models": trace.get("models", []),
+            "errors": trace["errors"],
+        }, ensure_ascii=False))
+
+
+@contextmanager
+def stage(name):
+    """Time a block as pipeline stage name; exceptions are counted and re-raised"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        count_error(name, e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        trace = _current.get()
+        if trace is not None:
+            trace["stages"][name] = trace["stages"].get(name, 0.0) + elapsed
+
+
+def count_error(name, error):
+    """Count an exception that a stage handled itself (fallbacks, logged errors)"""
+    ERRORS.labels(name).inc()
+    trace = _current.get()
+    if trace is not None:
+        trace["errors"].append(f"{name}: {type(error).__name__}")
+
+
+def observe_stage(name, seconds):
+    """Record a stage measured by hand (e.g. time to first streamed token)"""
+    STAGE_SECONDS.labels(name).observe(seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace["stages"][name] = trace["stages"].get(name, 0.0) + seconds
+
+
+def record_usage(call, usage):
+    """Count prompt/completion tokens from a Groq usage object (None is ignored)"""
+    if usage is None:
+        return
+    trace = _current.get()
+    for kind in ("prompt", "completion"):
+        count = getattr(usage, f"{kind}_tokens", None)
+        if count:
+            LLM_TOKENS.labels(call, kind).inc(count)
+            if trace is not None:
+                key = f"{call}_{kind}"
+                trace["tokens"][key] = trace["tokens"].get(key, 0) + count
+
+
+def record_cache(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_llm_call(model, result):
+    LLM_CALLS.labels(model, result).inc()
+    trace = _current.get()
+    if trace is not None and result in ("ok", "coalesced"):
+        trace.setdefault("models", []).append(model)
+
+
+def render():
+    """(body, content type) for the /metrics endpoint.
+
+    With several worker processes set PROMETHEUS_MULTIPROC_DIR so every
+    worker writes its samples there and each scrape sums all of them.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+if config.REQUEST_LOG and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
@@ -0,0 +1,119 @@
+"""
+packing.py
+
+Amaç:
+- Prompt'a girecek bağlamı karakter yerine token bütçesiyle sınırlamak
+- En yüksek skorlu chunk'lardan başlayıp tekrar edenleri atlamak
+- Sığmayan son chunk'ı cümle (yoksa kelime) sınırından kırpmak
+"""
+
+import math
+import re
+
+from . import config, resources
+
+SEPARATOR = "\n\n"
+# Same chunk reached through overlapping pages / near-identical pages
+DUPLICATE_SIMILARITY = 0.8
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def tokenizer_name():
+    """Name of the tokenizer behind count_tokens; cached counts must match it"""
+    return config.CONTEXT_TOKENIZER if resources.get_tokenizer() is not None else "estimate"
+
+
+def count_tokens(texts):
+    """Token counts for a list of texts in one tokenizer call.
+
+    Without the tokenizer, ~3 characters per token: a slight overestimate
+    for Llama 3 on Turkish text, so the budget still holds.
+    """
+    texts = [str(text) for text in texts]
+    if not texts:
+        return []
+    tokenizer = resources.get_tokenizer()
+    if tokenizer is None:
+        return [math.ceil(len(text) / 3) for text in texts]
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+
+def _shingles(text):
+    words = text.lower().split()
+    return {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+
+def _is_duplicate(shingles, selected):
+    for other in selected:
+        overlap = len(shingles & other)
+        if overlap and overlap / min(len(shingles), len(other)) >= DUPLICATE_SIMILARITY:
+            return True
+    return False
+
+
+def trim_to_tokens(text, max_tokens):
+    """Longest prefix of text within max_tokens, cut after a sentence when possible.
+
+    Scraped text has its punctuation stripped by clean_text, so chunks
+    without sentence ends are cut between words instead. Returns "" when
+    not even one piece fits. A prefix never has fewer tokens than a shorter
+    one, so the cut is binary searched: log n tokenizer calls, not one per
+    prefix.
+    """
+    for pieces, joiner in ((_SENTENCE_END.split(text.strip()), " "), (text.split(), " ")):
+        if len(pieces) < 2:
+            continue
+        fits, too_long = 0, len(pieces) + 1  # number of pieces known to fit / known not to
+        while too_long - fits > 1:
+            middle = (fits + too_long) // 2
+            if count_tokens([joiner.join(pieces[:middle])])[0] <= max_tokens:
+                fits = middle
+            else:
+                too_long = middle
+        if fits:
+            return joiner.join(pieces[:fits])
+    return ""
+
+
+def pack_context(results, budget=None):
+    """Fill the token budget with the best chunks of results.
+
+    results are in rank order, as returned by search_context. Near-duplicate
+    chunks are skipped. The first chunk that doesn't fit is trimmed (when
+    at least CONTEXT_MIN_TRIM_TOKENS remain) and packing stops there.
+    Token counts come from the chunk store when they were cached with the
+    same tokenizer, the rest are counted in one batch.
+    """
+    budget = config.CONTEXT_TOKEN_BUDGET if budget is None else budget
+    missing = [result["text"] for result in results if result.get("tokens") is None]
+    counted = iter(count_tokens(missing))
+    separator_tokens = count_tokens([SEPARATOR])[0]
+
+    selected = []
+    selected_shingles = []
+    used = 0
+    for result in results:
+        text = str(result["text"])
+        tokens = result.get("tokens")
+        if tokens is None:
+            tokens = next(counted)
+        shingles = _shingles(text)
+        if _is_duplicate(shingles, selected_shingles):
+            continue
+
+        cost = tokens + (separator_tokens if selected else 0)
+        if used + cost <= budget:
+            selected.append(text)
+            selected_shingles.append(shingles)
+            used += cost
+            continue
+
+        remaining = budget - used - (separator_tokens if selected else 0)
+        if remaining >= config.CONTEXT_MIN_TRIM_TOKENS:
+            trimmed = trim_to_tokens(text, remaining)
+            if trimmed:
+                selected.append(trimmed)
+        break
+
+    return SEPARATOR.join(selected)
@@ -0,0 +1,51 @@
+"""
+rerank.py
+
+Amaç:
+- Index'ten gelen aday chunk'ları (soru, chunk) çiftlerini puanlayan çok
+  dilli bir cross-encoder ile yeniden sıralamak
+- Puanlamayı batch'ler halinde yapmak ve bir gecikme bütçesiyle sınırlamak;
+  bütçe aşılırsa ya da model yoksa arama sırasına geri dönmek
+"""
+
+import time
+
+from . import config, metrics, resources
+
+
+def rerank(question, results, top_k=None, budget_ms=None):
+    """The top_k results by cross-encoder score, or the first top_k in search order.
+
+    Pairs are scored RERANK_BATCH_SIZE at a time. When the elapsed time
+    passes budget_ms before every candidate is scored, the partial scores
+    are discarded and the search (vector / fused) order is kept, so a slow
+    model never delays the answer by more than about one batch. Reranked
+    results carry their cross-encoder score in rerank_score.
+    """
+    top_k = config.RERANK_TOP_K if top_k is None else top_k
+    budget_ms = config.RERANK_BUDGET_MS if budget_ms is None else budget_ms
+    if len(results) <= 1:
+        return results[:top_k]
+
+    model = resources.get_reranker()
+    if model is None:
+        return results[:top_k]
+
+    start = time.perf_counter()
+    scores = []
+    try:
+        for i in range(0, len(results), config.RERANK_BATCH_SIZE):
+            batch = results[i:i + config.RERANK_BATCH_SIZE]
+            scores.extend(float(score) for score in model.predict(
+                [(question, result["text"]) for result in batch], batch_size=len(batch)
+            ))
+            if (time.perf_counter() - start) * 1000 > budget_ms and len(scores) < len(results):
+                print(f"⚠️  Rerank bütçesi aşıldı ({budget_ms} ms), arama sırası kullanılıyor")
+                return results[:top_k]
+    except Exception as e:
+        metrics.count_error("rerank", e)
+        print(f"Rerank error: {e}")
+        return results[:top_k]
+
+    order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+    return [dict(results[i], rerank_score=scores[i]) for i in order[:top_k]]
@@ -0,0 +1,328 @@
+"""
+resources.py
+
+Amaç:
+- FAISS index, metadata, embedding modeli ve Groq istemcilerini
+  süreç başına bir kez ve ilk kullanımda yüklemek
+- Veri dosyalarını sadece okumak; kurmak scripts/update_index.py'nin işi
+- Yeni bir index sürümü yazıldığında arka planda yükleyip çalışan
+  istekleri bozmadan yerine koymak (yeniden başlatma gerekmeden)
+- Pre-fork sunucuda master'da yüklenenleri worker'lara bırakmak; fork'tan
+  sağ çıkmayan thread'leri ve bağlantıları worker'da yeniden kurmak
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from . import config
+from .artifacts import read_version
+from .bm25 import BM25Index
+from .chunk_store import ChunkStore
+
+_lock = threading.Lock()
+_reload_lock = threading.Lock()
+# Current {index, metadata, bm25, version}; replaced as a whole, never mutated
+_snapshot = None
+_watcher = None
+_chunked_data = None
+_embedder = None
+_embedder_error = None
+_tokenizer = None
+_reranker = None
+_reranker_loaded = False
+_tokenizer_loaded = False
+_client = None
+_async_client = None
+_llm_semaphore = None
+
+
+def _load_snapshot(strict=False):
+    """Open the artifacts on disk as one consistent snapshot.
+
+    The version stamp is read before the files, so a build finishing
+    mid-load is picked up again by the next reload check. At startup a
+    missing or broken index means keyword fallback; with strict (reloads)
+    it raises instead, so the snapshot being served is kept.
+    """
+    version = index_version()
+    index = None
+    metadata = None
+    bm25 = None
+    if os.path.exists(config.INDEX_PATH):
+        import faiss
+
+        try:
+            from .ann import set_search_params
+
+            index = faiss.read_index(config.INDEX_PATH)
+            set_search_params(index, config.FAISS_NPROBE, config.FAISS_EF_SEARCH)
+            if ChunkStore.exists(config.CHUNK_STORE_PATH):
+                metadata = ChunkStore(config.CHUNK_STORE_PATH)
+            else:
+                with open(config.METADATA_PATH, "rb") as f:
+                    metadata = pickle.load(f)
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Data loading error: {e}")
+            index = None
+            metadata = None
+        if BM25Index.exists(config.BM25_PATH):
+            bm25 = BM25Index.load(config.BM25_PATH)
+        else:
+            print("⚠️  BM25 index bulunamadı, sadece vektör araması yapılıyor")
+    elif strict:
+        raise FileNotFoundError(config.INDEX_PATH)
+    else:
+        print("⚠️  FAISS index bulunamadı, basit arama kullanılıyor")
+    return {"index": index, "metadata": metadata, "bm25": bm25, "version": version}
+
+
+def get_snapshot():
+    """Index, metadata and BM25 of one build, loaded on first use.
+
+    A request should take the snapshot once and use it throughout: a
+    reload swaps in a new dict, and requests still holding the old one
+    finish on it undisturbed.
+    """
+    global _snapshot
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = _load_snapshot()
+                _start_watcher()
+    return _snapshot
+
+
+def get_index():
+    """FAISS index or None when data/faiss_index.index is missing"""
+    return get_snapshot()["index"]
+
+
+def get_metadata():
+    """ChunkStore (or legacy pickled metadata) for the FAISS index, or None"""
+    return get_snapshot()["metadata"]
+
+
+def get_bm25():
+    """BM25 index from data/bm25/, or None (vector-only search) when it is missing"""
+    return get_snapshot()["bm25"]
+
+
+def reload_if_changed():
+    """Load and swap in a new snapshot when update_index.py wrote a new build.
+
+    Loading happens outside _lock so searches keep running on the old
+    snapshot meanwhile; the swap itself is a single reference assignment.
+    Returns True when a new snapshot was installed.
+    """
+    global _snapshot
+    if _snapshot is None or not _reload_lock.acquire(blocking=False):
+        return False
+    try:
+        if index_version() == _snapshot["version"]:
+            return False
+        try:
+            # The version is not recorded on failure, so the next check tries again
+            snapshot = _load_snapshot(strict=True)
+        except Exception as e:
+            print(f"❌ Index yeniden yüklenemedi, eski sürüm kullanılıyor: {e}")
+            return False
+        _snapshot = snapshot
+        print(f"✅ Index yeniden yüklendi: {snapshot['version']}")
+        return True
+    finally:
+        _reload_lock.release()
+
+
+def _watch():
+    while True:
+        time.sleep(config.INDEX_RELOAD_INTERVAL)
+        reload_if_changed()
+
+
+def _start_watcher():
+    """Poll the version stamp in a daemon thread (INDEX_RELOAD_INTERVAL=0 disables)"""
+    global _watcher
+    if _watcher is None and config.INDEX_RELOAD_INTERVAL > 0:
+        _watcher = threading.Thread(target=_watch, name="index-reload", daemon=True)
+        _watcher.start()
+
+
+def get_chunked_data():
+    """Rows of chunked_data.csv, only needed by the keyword fallback"""
+    global _chunked_data
+    if _chunked_data is None:
+        with _lock:
+            if _chunked_data is None:
+                try:
+                    import pandas as pd
+
+                    _chunked_data = pd.read_csv(config.CHUNKED_DATA_PATH).to_dict(orient="records")
+                except Exception as e:
+                    print(f"Data loading error: {e}")
+                    _chunked_data = []
+    return _chunked_data
+
+
+def get_embedder():
+    """SentenceTransformer used to embed questions.
+
+    A failed load is remembered and re-raised, so with the model hub
+    unreachable each question fails fast instead of retrying the download.
+    """
+    global _embedder, _embedder_error
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                if _embedder_error is not None:
+                    raise _embedder_error
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    _embedder = SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+                except Exception as e:
+                    _embedder_error = e
+                    raise
+    return _embedder
+
+
+def get_tokenizer():
+    """Prompt tokenizer (config.CONTEXT_TOKENIZER), None when it can't be loaded.
+
+    Loaded once per process; without it packing.py falls back to an
+    estimate from the character count.
+    """
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _lock:
+            if not _tokenizer_loaded:
+                try:
+                    from transformers import AutoTokenizer
+
+                    _tokenizer = AutoTokenizer.from_pretrained(config.CONTEXT_TOKENIZER)
+                except Exception as e:
+                    print(f"⚠️  Tokenizer yüklenemedi, token sayıları tahmin ediliyor: {e}")
+                _tokenizer_loaded = True
+    return _tokenizer
+
+
+def get_reranker():
+    """CrossEncoder for config.RERANK_MODEL, None when it can't be loaded"""
+    global _reranker, _reranker_loaded
+    if not _reranker_loaded:
+        with _lock:
+            if not _reranker_loaded:
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    _reranker = CrossEncoder(config.RERANK_MODEL, max_length=512)
+                except Exception as e:
+                    print(f"⚠️  Rerank modeli yüklenemedi, arama sırası kullanılıyor: {e}")
+                _reranker_loaded = True
+    return _reranker
+
+
+def get_client():
+    """Groq client shared by every request in the process"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from groq import Groq
+
+                _client = Groq(api_key=config.API_KEY)
+    return _client
+
+
+def get_async_client():
+    """AsyncGroq client with a pooled httpx transport, for the asgi.py path.
+
+    Must be first called from inside the event loop that will use it.
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+
+        _async_client = AsyncGroq(
+            api_key=config.API_KEY,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=config.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+    return _async_client
+
+
+def get_llm_semaphore():
+    """Caps in-flight async Groq calls at config.LLM_MAX_CONCURRENCY"""
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        import asyncio
+
+        _llm_semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+
+async def close_async_client():
+    """Release pooled connections when the async server shuts down"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def index_version():
+    """Build id from data/index_version.json, None when there is no index.
+
+    Indexes built before version stamps existed fall back to the index
+    file's modification time.
+    """
+    stamp = read_version(config.INDEX_VERSION_PATH)
+    if stamp is not None:
+        return stamp["version"]
+    try:
+        return str(os.stat(config.INDEX_PATH).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def status():
+    """What has been loaded so far; unlike the getters, never loads anything"""
+    snapshot = _snapshot
+    return {
+        "index_loaded": snapshot is not None and snapshot["index"] is not None,
+        "index_version": None if snapshot is None else snapshot["version"],
+        "embedder_loaded": _embedder is not None
+    }
+
+
+def data_available():
+    """True when either the index or the chunk CSV can be served"""
+    return get_metadata() is not None or os.path.exists(config.CHUNKED_DATA_PATH)
+
+
+def _after_fork():
+    """Reset what a forked worker can't take over from the master.
+
+    Only the forking thread survives fork, so the reload watcher is
+    started again and locks another thread may have held are replaced.
+    Groq clients hold open connections and are created anew per process.
+    """
+    global _lock, _reload_lock, _watcher, _client, _async_client, _llm_semaphore
+    _lock = threading.Lock()
+    _reload_lock = threading.Lock()
+    _watcher = None
+    _client = None
+    _async_client = None
+    _llm_semaphore = None
+    if _snapshot is not None:
+        _start_watcher()
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,146 @@
+"""
+retrieval.py
+
+Amaç:
+- Kullanıcının sorusunu embed et
+- FAISS index üzerinde en yakın chunk'ları bul
+- BM25 anahtar kelime sonuçlarıyla birleştir (hybrid arama)
+"""
+
+from . import config, metrics, resources
+from .bm25 import reciprocal_rank_fusion
+from .encoder import query_encoder
+from .packing import pack_context, tokenizer_name
+
+DEFAULT_CONTEXT = "Finans ve bankacılık alanında genel bilgiler."
+
+
+def embed_question(question):
+    """Question vector as a (1, dim) float32 array.
+
+    None when there is no index to search (keyword fallback) or the model
+    could not be loaded. Goes through the shared query encoder, so repeated
+    questions are served from its cache and concurrent ones share a batch.
+    """
+    if resources.get_index() is None:
+        return None
+    try:
+        return query_encoder.encode(question)
+    except Exception as e:
+        metrics.count_error("embed", e)
+        print(f"Embedding error: {e}")
+        return None
+
+
+def lookup_chunk(metadata, idx):
+    """Metadata of one search hit.
+
+    The chunk store (and the pickled dict it replaced) is keyed by vector
+    id; the oldest pickles are lists indexed by row number.
+    FAISS pads missing neighbours with -1.
+    """
+    if not isinstance(metadata, list):
+        return metadata.get(idx)
+    if 0 <= idx < len(metadata):
+        return metadata[idx]
+    return None
+
+
+def vector_search(index, query_embedding, k):
+    """[(vector_id, L2 distance)] of the k nearest chunks"""
+    distances, ids = index.search(query_embedding, k)
+    return [(int(idx), float(distance)) for distance, idx in zip(distances[0], ids[0]) if idx >= 0]
+
+
+def search_context(question, top_k=3, query_embedding=None):
+    """Return the top_k best chunks as dicts with id, text, url, title, score, distance and tokens.
+
+    The question is embedded once (or the given query_embedding is reused)
+    and searched against the whole FAISS index with a single k-NN call.
+    With HYBRID_SEARCH the BM25 index is queried too and both rankings are
+    merged with reciprocal rank fusion. score is the fused score (larger is
+    better), distance the L2 distance for chunks found by FAISS, tokens the
+    token count cached in the chunk store (None if it was counted with a
+    different tokenizer).
+    """
+    # One snapshot for the whole search, so a hot reload can't mix builds
+    snapshot = resources.get_snapshot()
+    index = snapshot["index"]
+    metadata = snapshot["metadata"]
+    if index is None or metadata is None:
+        return keyword_search(question, top_k)
+
+    candidates = max(config.RETRIEVAL_CANDIDATES, top_k) if config.HYBRID_SEARCH else top_k
+
+    vector_hits = []
+    if query_embedding is None:
+        query_embedding = embed_question(question)
+    if query_embedding is not None:
+        try:
+            vector_hits = vector_search(index, query_embedding, candidates)
+        except Exception as e:
+            metrics.count_error("search", e)
+            print(f"FAISS search error: {e}")
+
+    keyword_hits = []
+    bm25 = snapshot["bm25"] if config.HYBRID_SEARCH else None
+    if bm25 is not None:
+        keyword_hits = bm25.search(question, candidates)
+
+    if not vector_hits and not keyword_hits:
+        return keyword_search(question, top_k)
+
+    distances = dict(vector_hits)
+    store_tokenizer = getattr(metadata, "tokenizer", None)
+    cached_tokens = store_tokenizer is not None and store_tokenizer == tokenizer_name()
+    fused = reciprocal_rank_fusion(
+        [[idx for idx, _ in vector_hits], [idx for idx, _ in keyword_hits]], k=config.RRF_K
+    )
+
+    results = []
+    for idx, score in fused:
+        chunk = lookup_chunk(metadata, idx)
+        if chunk is None:
+            continue
+        results.append({
+            "id": idx,
+            "text": chunk["text"],
+            "url": chunk.get("url", ""),
+            "title": chunk.get("title", ""),
+            "score": score,
+            "distance": distances.get(idx),
+            "tokens": chunk.get("tokens") if cached_tokens else None
+        })
+        if len(results) >= top_k:
+            break
+    return results
+
+
+def keyword_search(question, top_k=3):
+    """Fallback used when the index is unavailable"""
+    results = []
+    question_words = question.lower().split()
+
+    for chunk in resources.get_chunked_data():
+        text = str(chunk.get("text", ""))
+        if any(word in text for word in question_words):
+            results.append({
+                "id": None,
+                "text": text,
+                "url": chunk.get("url", ""),
+                "title": chunk.get("title", ""),
+                "score": None,
+                "distance": None,
+                "tokens": None
+            })
+            if len(results) >= top_k:
+                break
+
+    return results
+
+
+def format_context(results):
+    """Prompt context block: results packed into CONTEXT_TOKEN_BUDGET tokens"""
+    if not results:
+        return DEFAULT_CONTEXT
+    return pack_context(results) or DEFAULT_CONTEXT
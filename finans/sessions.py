@@ -0,0 +1,234 @@
+"""
+sessions.py
+
+Amaç:
+- Oturum durumunu (son mesajlar, konuşma özeti, cevap dili) imzalı cookie
+  yerine sunucu tarafında tutmak; cookie'de sadece session_id kalır
+- Süreç içi bir LRU katmanının arkasında, worker'ların paylaştığı kalıcı
+  bir katman kullanmak: sqlite (aynı makinedeki worker'lar) veya redis
+  (Redis protokolünü konuşan herhangi bir sunucu)
+- Değerleri sıkıştırılmış JSON olarak saklamak
+
+Her alan ayrı yazılır; arka planda güncellenen özet ile istek sırasında
+eklenen mesajlar birbirinin üzerine yazmaz.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from . import config, metrics
+
+_lock = threading.Lock()
+_store = None
+
+
+def encode(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class SQLiteBackend:
+    """Session fields in one SQLite table, shared by the workers of one machine.
+
+    Each thread of each process gets its own connection; WAL mode lets
+    readers run while another worker writes. Sessions idle for longer than
+    ttl seconds are ignored on read and deleted now and then on write.
+    """
+
+    PRUNE_INTERVAL = 600  # seconds
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._last_prune = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_fields ("
+                "session_id TEXT NOT NULL, field TEXT NOT NULL, value BLOB NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (session_id, field)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS session_fields_updated ON session_fields (updated)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited through fork belongs to the parent; the child opens its own
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, session_id):
+        rows = self._connection().execute(
+            "SELECT field, value FROM session_fields WHERE session_id = ? AND updated > ?",
+            (session_id, time.time() - self.ttl)
+        ).fetchall()
+        return dict(rows)
+
+    def save(self, session_id, fields):
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO session_fields (session_id, field, value, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id, field) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                [(session_id, field, value, now) for field, value in fields.items()]
+            )
+            # The whole session stays alive as long as any part of it is used
+            conn.execute("UPDATE session_fields SET updated = ? WHERE session_id = ?", (now, session_id))
+            if now - self._last_prune > self.PRUNE_INTERVAL:
+                self._last_prune = now
+                conn.execute("DELETE FROM session_fields WHERE updated <= ?", (now - self.ttl,))
+
+    def delete(self, session_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+
+
+class RedisBackend:
+    """Session fields in one Redis hash per session, expiring after ttl seconds idle"""
+
+    PREFIX = "finans:session:"
+
+    def __init__(self, url, ttl):
+        import redis
+
+        self.ttl = int(ttl)
+        self._client = redis.Redis.from_url(url)
+
+    def load(self, session_id):
+        return {
+            field.decode(): value
+            for field, value in self._client.hgetall(self.PREFIX + session_id).items()
+        }
+
+    def save(self, session_id, fields):
+        key = self.PREFIX + session_id
+        pipe = self._client.pipeline()
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, session_id):
+        self._client.delete(self.PREFIX + session_id)
+
+
+class SessionStore:
+    """Session fields in an LRU cache in front of an optional shared backend.
+
+    Without a backend the cache is the store, and evicted sessions start
+    over (the behaviour of a single process). With one, writes go through
+    to the backend and cached entries are reused for cache_ttl seconds
+    only, so a conversation moving between workers sees the other
+    worker's updates after at most that long. Backend errors are counted
+    and logged; the request then continues with the cached state.
+    """
+
+    def __init__(self, backend=None, cache_size=10000, cache_ttl=2.0):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # session id -> (loaded at, {field: value})
+
+    def _remember(self, session_id, fields):
+        self._cache[session_id] = (time.monotonic(), fields)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, session_id):
+        with self._lock:
+            entry = self._cache.get(session_id)
+            if entry is not None and (self.backend is None or time.monotonic() - entry[0] < self.cache_ttl):
+                self._cache.move_to_end(session_id)
+                return entry[1]
+        if self.backend is None:
+            return {}
+        started = time.monotonic()
+        try:
+            fields = {field: decode(value) for field, value in self.backend.load(session_id).items()}
+        except Exception as e:
+            metrics.count_error("session_store", e)
+            print(f"Session store error: {e}")
+            return entry[1] if entry is not None else {}
+        with self._lock:
+            latest = self._cache.get(session_id)
+            # A set() that ran while the backend was read is newer than what was read
+            if latest is not None and latest[0] >= started:
+                return latest[1]
+            self._remember(session_id, fields)
+        return fields
+
+    def get(self, session_id, field, default=None):
+        value = self._load(session_id).get(field)
+        return default if value is None else value
+
+    def set(self, session_id, **fields):
+        """Replace the given fields of the session; the others are kept.
+
+        The cached entry is merged under the lock, and only the given fields
+        are written to the backend, so concurrent writes of different fields
+        don't drop each other's.
+        """
+        if self.backend is not None:
+            # Refresh a stale cached entry before merging into it
+            self._load(session_id)
+        with self._lock:
+            entry = self._cache.get(session_id)
+            current = dict(entry[1]) if entry is not None else {}
+            current.update(fields)
+            self._remember(session_id, current)
+        if self.backend is not None:
+            try:
+                self.backend.save(session_id, {field: encode(value) for field, value in fields.items()})
+            except Exception as e:
+                metrics.count_error("session_store", e)
+                print(f"Session store error: {e}")
+
+    def delete(self, session_id):
+        with self._lock:
+            self._cache.pop(session_id, None)
+        if self.backend is not None:
+            self.backend.delete(session_id)
+
+    def __len__(self):
+        return len(self._cache)
+
+
+def create_backend(name):
+    """Backend for SESSION_BACKEND: memory (None), sqlite or redis"""
+    if name == "memory":
+        return None
+    if name == "sqlite":
+        return SQLiteBackend(config.SESSION_DB_PATH, config.SESSION_TTL)
+    if name == "redis":
+        return RedisBackend(config.REDIS_URL, config.SESSION_TTL)
+    raise ValueError(f"Unknown SESSION_BACKEND: {name}")
+
+
+def get_store():
+    """Process-wide SessionStore, created on first use"""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = SessionStore(
+                    create_backend(config.SESSION_BACKEND),
+                    cache_size=config.MAX_SESSIONS,
+                    cache_ttl=config.SESSION_CACHE_TTL
+                )
+    return _store
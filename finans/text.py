@@ -0,0 +1,84 @@
+"""
+text.py
+
+Amaç:
+- Scraping sırasında kullanılan metin temizliği (scrape_clean.py); cümle
+  ve paragraf sınırları chunk'lama için korunur
+- Arama için aynı temizliğe dayanan, Türkçe'ye duyarlı tokenizer
+"""
+
+import re
+
+
+def clean_text(text):
+    if not text:
+        return ""
+
+    # Clean HTML tags
+    text = re.sub(r'<[^>]+>', ' ', text)
+
+    # Delete punctuations
+    text = re.sub(r'[^\w\s]', ' ', text)
+
+    # Lowercase
+    text = text.lower()
+
+    # Delete unnecessary spaces
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def clean_document(text):
+    """clean_text for whole pages: same cleanup, but sentence punctuation and
+    paragraph breaks are kept so chunk.py can cut at them.
+
+    Paragraphs (lines of the extracted text) are joined with a blank line.
+    """
+    if not text:
+        return ""
+    text = re.sub(r'<[^>]+>', ' ', text)
+    paragraphs = []
+    for line in text.splitlines():
+        # Keep the characters that end or structure a sentence
+        line = re.sub(r"[^\w\s.,;:!?…%'()-]", ' ', line).lower()
+        line = re.sub(r'\s+', ' ', line).strip()
+        if re.search(r'\w', line):
+            paragraphs.append(line)
+    return "\n\n".join(paragraphs)
+
+
+def split_paragraphs(text):
+    """Non-empty paragraphs of a clean_document text"""
+    return [paragraph.strip() for paragraph in re.split(r'\n\s*\n', text) if paragraph.strip()]
+
+
+def split_sentences(paragraph):
+    """Sentences of one paragraph; text without punctuation is a single sentence"""
+    return [sentence for sentence in _SENTENCE_END.split(paragraph) if sentence]
+
+
+# Very frequent question words that only add noise to keyword matching
+STOPWORDS = {
+    "acaba", "ama", "bana", "ben", "bir", "bu", "da", "de", "demek", "derece",
+    "en", "gibi", "hangi", "icin", "ile", "ise", "kadar", "mi", "mu", "nasil",
+    "ne", "nedir", "neden", "nelerdir", "o", "sekilde", "su", "ve", "veya", "ya",
+    "an", "and", "are", "does", "for", "how", "the", "what", "why",
+}
+
+# Fold Turkish letters to their ASCII base so that text lowercased with
+# str.lower() ("I" -> "i", "İ" -> "i̇") and text typed without Turkish
+# characters ("kredi karti") produce the same terms.
+_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c", "̇": None})
+
+
+def tokenize(text):
+    """Terms for the keyword index: Turkish folding, then clean_text"""
+    # Fold before clean_text, which would turn the combining dot into a space
+    return [
+        token for token in clean_text(text.lower().translate(_FOLD)).split()
+        if token not in STOPWORDS
+    ]
@@ -0,0 +1,105 @@
+"""
+warmup.py
+
+Amaç:
+- Sunucu açılırken index'i, chunk store'u, BM25'i, soru encoder'ını ve dil
+  profillerini yükleyip örnek bir soruyla retrieval'ı baştan sona bir kez
+  çalıştırmak; ilk kullanıcı isteği model yüklemesini beklemesin
+- Pre-fork sunucuda (gunicorn.conf.py) bunu master süreçte fork'tan önce
+  yapmak; worker'lar yüklenen her şeyi copy-on-write paylaşır
+- Readiness kontrolü için sürecin ısınıp ısınmadığını tutmak
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from . import language, resources
+from .generation import retrieve
+
+WARMUP_QUESTION = "Vadeli mevduat hesabı nedir?"
+
+_lock = threading.Lock()
+_thread = None
+_state = {"warmed": False, "seconds": None, "error": None}
+
+
+@contextmanager
+def single_threaded():
+    """Keep torch and FAISS from starting their OpenMP thread pools.
+
+    Those threads don't survive fork, and a child using a pool its parent
+    started can hang; a master about to fork its workers warms up on one
+    thread instead. The thread counts are restored afterwards, so workers
+    start their own pools at full size.
+    """
+    restore = []
+    try:
+        import torch
+
+        restore.append((torch.set_num_threads, torch.get_num_threads()))
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    try:
+        import faiss
+
+        restore.append((faiss.omp_set_num_threads, faiss.omp_get_max_threads()))
+        faiss.omp_set_num_threads(1)
+    except ImportError:
+        pass
+    try:
+        yield
+    finally:
+        for set_threads, threads in restore:
+            set_threads(threads)
+
+
+def warm_up(question=WARMUP_QUESTION, fork_safe=False):
+    """Load what a question needs and retrieve context for question once (no Groq call).
+
+    fork_safe is for a process that forks afterwards (see single_threaded).
+    Returns the seconds it took, None when it failed; a failure is kept
+    for the readiness probe instead of being raised.
+    """
+    started = time.perf_counter()
+    try:
+        language.warm_up()
+        with single_threaded() if fork_safe else nullcontext():
+            retrieve(question)
+    except Exception as e:
+        print(f"❌ Isınma başarısız: {e}")
+        _state.update(error=str(e))
+        return None
+    seconds = time.perf_counter() - started
+    _state.update(warmed=True, seconds=round(seconds, 3), error=None)
+    print(f"✅ Sunucu ısındı ({seconds:.1f} sn, index: {resources.status()['index_version']})")
+    return seconds
+
+
+def start():
+    """Warm up on a background thread, unless that is done or already running"""
+    global _thread
+    with _lock:
+        if _state["warmed"] or (_thread is not None and _thread.is_alive()):
+            return
+        _thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+        _thread.start()
+
+
+def readiness():
+    """(ready, details) for the readiness probe.
+
+    A server that didn't warm up at start (one without gunicorn.conf.py's
+    hooks) is warmed up by the first probe, so it still turns ready.
+    """
+    start()
+    ready = _state["warmed"] and resources.data_available()
+    details = {
+        "status": "ready" if ready else "warming_up",
+        "warmup_seconds": _state["seconds"],
+        **resources.status()
+    }
+    if _state["error"]:
+        details["error"] = _state["error"]
+    return ready, details
@@ -0,0 +1,40 @@
+"""
+web.py
+
+Amaç:
+- app.py (Flask) ve asgi.py (Quart) tarafından paylaşılan yardımcılar
+"""
+
+import json
+import uuid
+
+# Last 10 messages = 5 question/answer pairs
+MAX_HISTORY_MESSAGES = 10
+
+
+def sse_event(payload, event=None):
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def append_history(conversation_history, *messages):
+    """Return the history with the new messages, trimmed to the last 10"""
+    return (list(conversation_history) + list(messages))[-MAX_HISTORY_MESSAGES:]
+
+
+def ensure_session_id(session):
+    """Session id keying the server-side session store; the only value in the cookie"""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+
+def rerank_option(data):
+    """Per-request "rerank" switch from the JSON body; None leaves it to RERANK_ENABLED"""
+    value = data.get('rerank')
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
@@ -0,0 +1,83 @@
+"""
+gunicorn.conf.py
+
+Amaç:
+- app.py'yi pre-fork production modunda çalıştırmak; gunicorn bu dosyayı
+  çalışma dizininden kendisi okur:
+    gunicorn app:app
+- Index'i, chunk store'u, BM25'i ve soru encoder'ını master süreçte bir kez
+  yükleyip örnek bir soruyla ısıtmak; worker'lar fork ile bu belleği
+  copy-on-write paylaşır, her biri kendi kopyasını yüklemez
+- Her worker'ı istek almadan önce ısıtmak; yeniden başlayan ya da yeni
+  eklenen worker'ların ilk isteği de yavaş olmasın
+- Worker'ların ortak paylaşması gereken durumu ayarlamak: oturumlar SQLite'ta
+  (tek süreçlik "memory" ile birden çok worker başlatılmaz), Prometheus
+  metrikleri PROMETHEUS_MULTIPROC_DIR'de; /metrics tüm worker'ların toplamını
+  gösterir
+"""
+
+import gc
+import glob
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# .env first, so the defaults below don't override what it sets
+load_dotenv()
+
+# The tokenizer is used before fork; without this it warns in every worker and turns parallelism off
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+# Each worker is a separate process; a follow-up question may reach another one than the first
+os.environ.setdefault("SESSION_BACKEND", "sqlite")
+# Every worker writes its metric samples here and a scrape sums them (finans/metrics.py);
+# set before app.py imports prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "finans_prometheus"))
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+if workers > 1 and os.environ["SESSION_BACKEND"] == "memory":
+    raise SystemExit(
+        "❌ SESSION_BACKEND=memory tek süreçliktir; birden çok worker için sqlite ya da redis kullanın"
+    )
+# Threads per worker; a streamed answer holds one for as long as it runs
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Import app.py in the master, so what it loads is inherited by the workers
+preload_app = True
+# Long answers are streamed for a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+accesslog = "-"
+
+
+def on_starting(server):
+    """Runs once in the master; samples left by an earlier run would be summed into this one's"""
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(path)
+
+
+def when_ready(server):
+    """Runs in the master after app.py is imported, before the first worker is forked"""
+    from finans import warmup
+
+    warmup.warm_up(fork_safe=True)
+    # Objects loaded so far are left alone by the garbage collector, so its
+    # passes don't write to (and copy) the pages the workers share
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Runs in each worker before it accepts requests"""
+    from finans import warmup
+
+    warmup.warm_up()
+
+
+def child_exit(server, worker):
+    """Runs in the master when a worker exits"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
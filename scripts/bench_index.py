@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+bench_index.py
+
+Amaç:
+- FAISS index varyantlarını (flat, ivf_flat, ivf_pq, hnsw, +sq8) aynı
+  embedding'ler üzerinde kurup karşılaştırmak
+- Her varyant ve nprobe / efSearch değeri için düz index'e göre recall@k,
+  tek sorgu QPS'i, kurulum süresi ve bellek kullanımını raporlamak
+
+Kullanım:
+    python scripts/bench_index.py                    # data/embeddings.npy
+    python scripts/bench_index.py --synthetic 500000 # büyük korpus denemesi
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.ann import build_index, index_memory, set_search_params
+
+VARIANTS = {
+    "flat": {"index_type": "flat"},
+    "flat_sq8": {"index_type": "flat", "sq8": True},
+    "ivf_flat": {"index_type": "ivf_flat"},
+    "ivf_sq8": {"index_type": "ivf_flat", "sq8": True},
+    "ivf_pq": {"index_type": "ivf_pq"},
+    "hnsw": {"index_type": "hnsw"},
+    "hnsw_sq8": {"index_type": "hnsw", "sq8": True},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FAISS index varyantları için recall / QPS / bellek ölçümü")
+    parser.add_argument("--embeddings", default=config.EMBEDDINGS_PATH)
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Embedding dosyası yerine bu kadar sentetik vektör üret")
+    parser.add_argument("--dim", type=int, default=384, help="Sentetik vektör boyutu")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--ef-search", default="16,64,256")
+    parser.add_argument("--output", default=None, help="Sonuçları JSON olarak yaz")
+    return parser.parse_args()
+
+
+def synthetic_embeddings(count, dim, seed=0):
+    """Clustered random vectors, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 100), dim)).astype("float32")
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors += 0.3 * rng.normal(size=(count, dim)).astype("float32")
+    return vectors
+
+
+def make_queries(embeddings, count, seed=0):
+    """Corpus vectors with noise, so the nearest neighbour isn't trivially itself"""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(embeddings), min(count, len(embeddings)), replace=False))
+    queries = np.asarray(embeddings[rows], dtype="float32")
+    return queries + 0.1 * queries.std() * rng.normal(size=queries.shape).astype("float32")
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def measure(index, queries, truth, k):
+    """Serving searches one question at a time, so QPS is single-query"""
+    found = np.empty((len(queries), k), dtype="int64")
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        found[i] = index.search(queries[i:i + 1], k)[1][0]
+    elapsed = time.perf_counter() - start
+    return {
+        "recall": round(recall_at_k(found, truth), 4),
+        "qps": round(len(queries) / elapsed, 1),
+        "latency_ms": round(1000 * elapsed / len(queries), 3),
+    }
+
+
+def main():
+    args = parse_args()
+    if args.synthetic:
+        embeddings = synthetic_embeddings(args.synthetic, args.dim)
+    else:
+        embeddings = np.load(args.embeddings, mmap_mode="r")
+    ids = np.arange(len(embeddings), dtype="int64")
+    queries = make_queries(embeddings, args.queries)
+
+    exact = build_index(embeddings, ids, "flat")
+    truth = exact.search(queries, args.k)[1]
+    print(f"📊 {len(embeddings)} vektör, boyut {embeddings.shape[1]}, {len(queries)} sorgu, k={args.k}")
+
+    sweeps = {
+        "ivf_flat": ("nprobe", [int(v) for v in args.nprobe.split(",")]),
+        "ivf_pq": ("nprobe", [int(v) for v in args.nprobe.split(",")]),
+        "hnsw": ("efSearch", [int(v) for v in args.ef_search.split(",")]),
+    }
+    results = []
+    print(f"{'varyant':<10} {'ayar':<14} {'recall@k':>9} {'QPS':>10} {'ms/sorgu':>9} {'MB':>8} {'kurulum s':>10}")
+    for name in args.variants.split(","):
+        options = VARIANTS[name]
+        start = time.perf_counter()
+        index = build_index(embeddings, ids, **options)
+        build_seconds = time.perf_counter() - start
+        memory = index_memory(index)
+
+        param, values = sweeps.get(options["index_type"], (None, [None]))
+        for value in values:
+            if param == "nprobe":
+                set_search_params(index, nprobe=value)
+            elif param == "efSearch":
+                set_search_params(index, ef_search=value)
+            row = {
+                "variant": name,
+                "param": param,
+                "value": value,
+                "memory_bytes": memory,
+                "build_seconds": round(build_seconds, 3),
+                **measure(index, queries, truth, args.k),
+            }
+            results.append(row)
+            setting = f"{param}={value}" if param else "-"
+            print(f"{name:<10} {setting:<14} {row['recall']:>9.4f} {row['qps']:>10.1f} "
+                  f"{row['latency_ms']:>9.3f} {memory / 2**20:>8.1f} {build_seconds:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(embeddings), "k": args.k, "results": results}, f, indent=2)
+        print(f"✅ Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
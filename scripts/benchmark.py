@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+"""
+benchmark.py
+
+Amaç:
+- Gerçek data/ dosyaları üzerinde, Groq yerine yerel bir sahte istemciyle
+  uçtan uca performans ölçmek (ağ ve API anahtarı gerekmez)
+- Etiketli soru setinde (data/eval_questions.csv) arama gecikmesi ve recall@k
+- Eşzamanlı yük altında /chat throughput'u ve gecikme dağılımı
+- Açılış süresi ve worker başına bellek (ayrı bir süreçte)
+- Sonuçları commit'ler arasında diff'lenebilen bir JSON dosyasına yazmak
+
+Kullanım:
+    python scripts/benchmark.py --output bench/$(git rev-parse --short HEAD).json
+    python scripts/benchmark.py --concurrency 1,8,32 --llm-latency-ms 500
+    python scripts/benchmark.py --skip-chat --skip-startup   # sadece arama
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from finans import config, llm, resources
+from finans.encoder import query_encoder
+from finans.generation import retrieve
+from finans.retrieval import search_context
+
+PROBE_QUESTION = "Vadeli mevduat hesabı nedir?"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Arama kalitesi, /chat throughput'u, açılış süresi ve bellek ölçümü")
+    parser.add_argument("--questions", default=config.EVAL_QUESTIONS_PATH)
+    parser.add_argument("-k", default="1,3,5,10", help="recall@k için k değerleri")
+    parser.add_argument("--concurrency", default="1,4,16", help="/chat için eşzamanlı istemci sayıları")
+    parser.add_argument("--requests", type=int, default=120, help="Her eşzamanlılık seviyesinde istek sayısı")
+    parser.add_argument("--llm-latency-ms", type=float, default=300,
+                        help="Sahte Groq istemcisinin cevap başına bekleme süresi")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="Cevap cache'ini açık bırak (varsayılan: kapalı, her istek LLM'e gider)")
+    parser.add_argument("--skip-chat", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", default="benchmark.json")
+    return parser.parse_args()
+
+
+class StubCompletions:
+    """Stands in for client.chat.completions: waits latency seconds, then answers.
+
+    Usage is reported like Groq does (response.usage, or x_groq.usage on
+    the last streamed chunk) with prompt tokens estimated from characters.
+    """
+
+    ANSWER = "Bu cevap benchmark için sahte Groq istemcisi tarafından üretildi."
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, messages, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(self.ANSWER.split()))
+        time.sleep(self.latency)
+        if not stream:
+            message = SimpleNamespace(content=self.ANSWER)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        return self._stream(usage)
+
+    def _stream(self, usage):
+        for word in self.ANSWER.split():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))], x_groq=None)
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
+
+
+def stub_client(latency):
+    return SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(latency)))
+
+
+def load_questions(path):
+    """[(question, set of relevant URLs)] from the labelled CSV"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["question"], set(filter(None, row["relevant_urls"].split("|"))))
+            for row in csv.DictReader(f)
+        ]
+
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def embedder_available():
+    try:
+        resources.get_embedder()
+        return True
+    except Exception as e:
+        print(f"⚠️  Embedding modeli yüklenemedi, sadece BM25 ile ölçülüyor: {e}")
+        return False
+
+
+def bench_retrieval(questions, ks):
+    """recall@k / hit@k / MRR of search_context plus search and retrieve() latency.
+
+    Both passes start with an empty query embedding cache, so the latency
+    includes encoding every question once.
+    """
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    recall = {k: 0.0 for k in ks}
+    reciprocal_ranks = []
+    misses = []
+    search_seconds = []
+
+    query_encoder.clear()
+    for question, relevant in questions:
+        start = time.perf_counter()
+        results = search_context(question, top_k=depth)
+        search_seconds.append(time.perf_counter() - start)
+
+        urls = [result["url"] for result in results]
+        ranks = [i for i, url in enumerate(urls) if url in relevant]
+        reciprocal_ranks.append(1 / (ranks[0] + 1) if ranks else 0.0)
+        if not ranks:
+            misses.append(question)
+        for k in ks:
+            found = set(urls[:k]) & relevant
+            hits[k] += bool(found)
+            recall[k] += len(found) / len(relevant)
+
+    query_encoder.clear()
+    retrieve_seconds = []
+    for question, _ in questions:
+        start = time.perf_counter()
+        retrieve(question)
+        retrieve_seconds.append(time.perf_counter() - start)
+
+    count = len(questions)
+    return {
+        "questions": count,
+        "hit_at_k": {str(k): round(hits[k] / count, 4) for k in ks},
+        "recall_at_k": {str(k): round(recall[k] / count, 4) for k in ks},
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "misses": misses,
+        "search_latency": latency_summary(search_seconds),
+        "retrieve_latency": latency_summary(retrieve_seconds),
+    }
+
+
+def bench_chat(questions, levels, total, latency, answer_cache):
+    """Requests per second and latency of POST /chat at each concurrency level.
+
+    The Flask app runs in a threaded werkzeug server on a free local port,
+    like the development server; every client thread keeps its own cookie
+    session, so conversation summaries are exercised too.
+    """
+    import requests
+    from werkzeug.serving import make_server
+
+    import app as chatbot_app
+
+    completions = stub_client(latency)
+    resources._client = completions
+    # The stub has no quota; the gateway's token buckets would only throttle the benchmark
+    config.LLM_RATE_LIMITS = {}
+    llm._limiters.clear()
+    config.ANSWER_CACHE_ENABLED = answer_cache
+    # One access log line per request would dominate the output
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, chatbot_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/chat"
+
+    local = threading.local()
+
+    def post(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        response = local.session.post(url, json={"message": questions[i % len(questions)][0]}, timeout=60)
+        ok = response.status_code == 200 and response.json().get("success", False)
+        return time.perf_counter() - start, ok
+
+    results = []
+    try:
+        for concurrency in levels:
+            with ThreadPoolExecutor(concurrency) as pool:
+                start = time.perf_counter()
+                samples = list(pool.map(post, range(total)))
+                elapsed = time.perf_counter() - start
+            row = {
+                "concurrency": concurrency,
+                "requests": total,
+                "errors": sum(not ok for _, ok in samples),
+                "rps": round(total / elapsed, 2),
+                **latency_summary([seconds for seconds, _ in samples]),
+            }
+            results.append(row)
+            print(f"   {concurrency:>4} istemci: {row['rps']:>8.2f} istek/s  p50 {row['p50_ms']:>8.1f} ms  "
+                  f"p95 {row['p95_ms']:>8.1f} ms  hata {row['errors']}")
+    finally:
+        server.shutdown()
+    return {"llm_latency_ms": latency * 1000, "answer_cache": answer_cache,
+            "llm_calls": completions.chat.completions.calls, "levels": results}
+
+
+def startup_probe():
+    """Run in a fresh interpreter: time each startup step and report memory as JSON"""
+    import psutil
+
+    timings = {}
+    start = time.perf_counter()
+    import app  # noqa: F401  (loads Flask, langdetect profiles and the finans modules)
+    timings["import_s"] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    resources.get_snapshot()
+    timings["load_index_s"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    retrieve(PROBE_QUESTION)
+    timings["first_query_s"] = time.perf_counter() - step
+    timings["total_s"] = time.perf_counter() - start
+
+    memory = psutil.Process().memory_full_info()
+    report = {name: round(value, 3) for name, value in timings.items()}
+    report["rss_mb"] = round(memory.rss / 2**20, 1)
+    report["uss_mb"] = round(memory.uss / 2**20, 1)
+    # Proportional set size: shared pages split between processes, the fair per-worker figure
+    if hasattr(memory, "pss"):
+        report["pss_mb"] = round(memory.pss / 2**20, 1)
+    print(json.dumps(report))
+
+
+def bench_startup():
+    """Startup timings and memory of one worker, measured in a new process"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--startup-probe"],
+        capture_output=True, text=True, cwd=os.getcwd(), check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=ROOT, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    if args.startup_probe:
+        startup_probe()
+        return
+
+    ks = [int(k) for k in args.k.split(",")]
+    questions = load_questions(args.questions)
+    report = {
+        "commit": git_commit(),
+        "index_version": resources.index_version(),
+        "config": {
+            "faiss_index_type": config.FAISS_INDEX_TYPE,
+            "hybrid_search": config.HYBRID_SEARCH,
+            "retrieval_candidates": config.RETRIEVAL_CANDIDATES,
+            "rerank_enabled": config.RERANK_ENABLED,
+            "context_token_budget": config.CONTEXT_TOKEN_BUDGET,
+        },
+    }
+
+    print(f"📊 {len(questions)} etiketli soru, k={ks}")
+    report["embedder"] = embedder_available()
+    report["retrieval"] = bench_retrieval(questions, ks)
+    retrieval = report["retrieval"]
+    print(f"   hit@k {retrieval['hit_at_k']}  recall@k {retrieval['recall_at_k']}  MRR {retrieval['mrr']}")
+    print(f"   arama p50 {retrieval['search_latency']['p50_ms']} ms, "
+          f"retrieve p50 {retrieval['retrieve_latency']['p50_ms']} ms")
+
+    if not args.skip_chat:
+        print(f"🚀 /chat yük testi ({args.requests} istek, sahte LLM {args.llm_latency_ms:.0f} ms)")
+        report["chat"] = bench_chat(
+            questions, [int(c) for c in args.concurrency.split(",")], args.requests,
+            args.llm_latency_ms / 1000, args.answer_cache
+        )
+
+    if not args.skip_startup:
+        report["startup"] = bench_startup()
+        startup = report["startup"]
+        print(f"⏱️  Açılış {startup['total_s']} s (import {startup['import_s']} s, index {startup['load_index_s']} s, "
+              f"ilk sorgu {startup['first_query_s']} s), RSS {startup['rss_mb']} MB")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    print(f"✅ Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,49 +6,287 @@
 chunk.py
 
 Amaç:
-- Uzun metinleri belirli büyüklükte parçalara bölmek
+- Uzun metinleri belirli büyüklükte parçalara bölmek; parçaları cümle ve
+  paragraf sonlarından kesmek
+- Neredeyse aynı chunk'ları (MinHash) index'e almamak ve ne kadarının
+  atıldığını data/dedup_report.json'a yazmak
+- Sayfaları scraped_data.csv'den parça parça okuyup chunk'ları dosyaya
+  akıtmak; tüm korpusu bellekte tutmamak
+- Sadece içeriği değişen sayfaları yeniden chunk'lamak; değişmeyen
+  sayfaların chunk'ları ve vektör id'leri aynen korunur
 """
 
-import pandas as pd
+import csv
+import json
+import os
+import sys
 
 import pandas as pd
 
-# Upload "scraped_data.csv"
-df_scraped = pd.read_csv("data/scraped_data.csv")
-scraped = df_scraped.to_dict(orient="records")
-print(f"✅ {len(scraped)} içerik yüklendi.")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.artifacts import atomic_write_file
+from finans.dedup import NearDuplicateIndex
+from finans.manifest import allocate_vector_ids, content_hash, load_manifest, save_manifest
+from finans.text import split_paragraphs, split_sentences
+
+COLUMNS = ["url", "title", "chunk_id", "text", "vector_id"]
+# Pages read from scraped_data.csv at a time
+READ_BATCH = 64
+
+
+def word_windows(words, max_length, overlap):
+    """Fixed windows of max_length words, each repeating overlap words of the previous one"""
+    return [words[i:i + max_length] for i in range(0, len(words), max_length - overlap)]
+
+
+def overlap_tail(sentences, overlap):
+    """Trailing whole sentences of a chunk, at most overlap words"""
+    tail = []
+    size = 0
+    for words in reversed(sentences):
+        if size + len(words) > overlap:
+            break
+        tail.insert(0, words)
+        size += len(words)
+    return tail
 
 
 def chunk_text(text, max_length=500, overlap=50): # Used overlap so that at the end of the every chunk same words are used to provide context
 # I tried with different chunk and overlape lengths(400/80 and 500/50), It did not affect the output quality
-    words = text.split()
+    """Chunks of at most max_length words, cut at sentence ends.
+
+    Sentences are packed greedily. A chunk already half full is closed at
+    a paragraph end instead of splitting the next paragraph, if that one
+    would not fit. The last sentences of a chunk (up to overlap words) are
+    repeated at the start of the next. A sentence longer than max_length,
+    e.g. a page scraped before punctuation was kept, is cut into fixed
+    word windows.
+    """
     chunks = []
-    i = 0
-    while i < len(words):
-        chunk = words[i:i+max_length]
-        chunks.append(" ".join(chunk))
-        i += max_length - overlap
+    current = []  # word lists of the sentences in the open chunk
+    size = 0
+    fresh = False  # the open chunk has sentences not emitted yet
+
+    def close():
+        nonlocal current, size, fresh
+        if fresh:
+            chunks.append(" ".join(word for words in current for word in words))
+        current = overlap_tail(current, overlap)
+        size = sum(len(words) for words in current)
+        fresh = False
+
+    for paragraph in split_paragraphs(text):
+        sentences = [sentence.split() for sentence in split_sentences(paragraph)]
+        paragraph_size = sum(len(words) for words in sentences)
+        if size >= max_length // 2 and size + paragraph_size > max_length:
+            close()
+        for words in sentences:
+            if len(words) > max_length:
+                close()
+                chunks.extend(" ".join(window) for window in word_windows(words, max_length, overlap))
+                current, size = [], 0
+                continue
+            if size + len(words) > max_length:
+                close()
+                while current and size + len(words) > max_length:
+                    size -= len(current.pop(0))
+            current.append(words)
+            size += len(words)
+            fresh = True
+    close()
     return chunks
 
 
-# Merge the chunked texts inside "chunked_data", which looks like this [ {"url": "https://...", "title": "Mevduat", "chunk_id": 0, "text": "..."}, ....]
-chunked_data = []
+def iter_documents(path):
+    """Rows of scraped_data.csv, read READ_BATCH pages at a time"""
+    for batch in pd.read_csv(path, chunksize=READ_BATCH):
+        yield from batch.to_dict(orient="records")
+
+
+def load_previous_chunks():
+    """Previous chunk rows grouped by url; empty if they carry no vector ids"""
+    if not os.path.exists(config.CHUNKED_DATA_PATH):
+        return {}
+    df = pd.read_csv(config.CHUNKED_DATA_PATH)
+    if "vector_id" not in df.columns:
+        return {}
+    grouped = {}
+    for row in df.to_dict(orient="records"):
+        grouped.setdefault(row["url"], []).append(row)
+    return grouped
+
+
+def load_previous_duplicates():
+    """Duplicates dropped by the last run grouped by url, kept for unchanged pages"""
+    if not os.path.exists(config.DEDUP_REPORT_PATH):
+        return {}
+    with open(config.DEDUP_REPORT_PATH, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    grouped = {}
+    for duplicate in report.get("duplicates", []):
+        grouped.setdefault(duplicate["url"], []).append(duplicate)
+    return grouped
+
+
+def write_report(stats, duplicates):
+    report = {
+        "chunks": stats["chunks"],
+        "kept": stats["chunks"] - len(duplicates),
+        "dropped": len(duplicates),
+        "threshold": config.DEDUP_THRESHOLD,
+        "duplicates": duplicates
+    }
+    atomic_write_file(config.DEDUP_REPORT_PATH, lambda path: _dump_json(report, path))
+
+
+def _dump_json(data, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+class PageChunker:
+    """Chunks pages one at a time and allocates vector ids for the new chunks.
+
+    Pages whose content hash and vector ids match the manifest keep the
+    rows previous_rows(url) returns for them, as long as the chunks they
+    dropped as duplicates still have one. Every chunk is checked
+    against the chunks kept so far; near-duplicates are dropped and
+    listed in duplicates.
+    """
+
+    def __init__(self, manifest, previous_rows, previous_duplicates=None):
+        self.manifest = manifest
+        self.pages = manifest["pages"]
+        self.previous_rows = previous_rows
+        self.previous_duplicates = previous_duplicates or {}
+        self.near_duplicates = NearDuplicateIndex(threshold=config.DEDUP_THRESHOLD)
+        self.stats = {"pages": 0, "reused": 0, "rechunked": 0, "chunks": 0}
+        self.duplicates = []
+        self.urls = set()
+
+    def remember(self, rows):
+        """Check later pages against rows chunked before (e.g. by an interrupted run)"""
+        for row in rows:
+            self.urls.add(row["url"])
+            self.near_duplicates.add((row["url"], int(row["chunk_id"])), row["text"])
+
+    def recheck_duplicates(self, url, text, dropped):
+        """Dropped chunks of an unchanged page, if each still has a near-duplicate; else None.
+
+        The chunk a duplicate was dropped for may belong to a page that
+        changed, was removed or hasn't been chunked yet in this run; the
+        dropped text would then be in the index nowhere, so the page has to
+        be chunked again. Duplicates of the page's own chunks stay valid.
+        """
+        if not dropped:
+            return dropped
+        chunks = chunk_text(text)
+        rechecked = []
+        for duplicate in dropped:
+            if duplicate["duplicate_of"]["url"] == url:
+                rechecked.append(duplicate)
+                continue
+            if duplicate["chunk_id"] >= len(chunks):
+                return None
+            original, similarity = self.near_duplicates.find(chunks[duplicate["chunk_id"]])
+            if original is None:
+                return None
+            rechecked.append({
+                **duplicate,
+                "duplicate_of": {"url": original[0], "chunk_id": original[1]},
+                "similarity": round(similarity, 3)
+            })
+        return rechecked
+
+    def chunk_page(self, entry):
+        """(chunk rows, duplicates dropped) of one scraped page"""
+        text = entry["content"] if isinstance(entry["content"], str) else ""
+        url = entry["url"]
+        title = entry.get("title", "")
+        self.urls.add(url)
+        self.stats["pages"] += 1
+        page = self.pages.setdefault(url, {})
+        digest = content_hash(text)
+
+        old_rows = self.previous_rows(url)
+        if page.get("content_hash") == digest and [row["vector_id"] for row in old_rows] == page.get("vector_ids"):
+            dropped = self.recheck_duplicates(url, text, self.previous_duplicates.get(url, []))
+            if dropped is not None:
+                # Deduplicated when they were written; later pages are checked against them
+                self.remember(old_rows)
+                self.duplicates.extend(dropped)
+                self.stats["reused"] += 1
+                self.stats["chunks"] += len(old_rows) + len(dropped)
+                return old_rows, dropped
+
+        kept = []
+        dropped = []
+        for i, chunk in enumerate(chunk_text(text)):
+            self.stats["chunks"] += 1
+            signature = self.near_duplicates.signature(chunk)
+            original, similarity = self.near_duplicates.find(chunk, signature)
+            if original is not None:
+                dropped.append({
+                    "url": url, "chunk_id": i,
+                    "duplicate_of": {"url": original[0], "chunk_id": original[1]},
+                    "similarity": round(similarity, 3)
+                })
+                continue
+            self.near_duplicates.add((url, i), chunk, signature)
+            kept.append((i, chunk))
+
+        vector_ids = allocate_vector_ids(self.manifest, len(kept))
+        rows = [
+            {"url": url, "title": title, "chunk_id": i, "text": chunk, "vector_id": vector_id}
+            for (i, chunk), vector_id in zip(kept, vector_ids)
+        ]
+        page["content_hash"] = digest
+        page["vector_ids"] = vector_ids
+        self.duplicates.extend(dropped)
+        self.stats["rechunked"] += 1
+        return rows, dropped
+
+    def remove_missing(self):
+        """Drop pages not chunked in this run from the manifest; their vectors go with them"""
+        removed = [url for url in self.pages if url not in self.urls]
+        for url in removed:
+            del self.pages[url]
+        return removed
+
+
+def report_chunking(stats, duplicates, removed):
+    print(f"✅ Chunk işlemi tamamlandı. ({stats['rechunked']} sayfa yeniden chunk'landı, {stats['reused']} aynen kaldı, {len(removed)} silindi)")
+    if stats["chunks"]:
+        print(f"🧹 {len(duplicates)} / {stats['chunks']} chunk neredeyse aynı olduğu için atıldı "
+              f"(%{100 * len(duplicates) / stats['chunks']:.1f}), rapor: {config.DEDUP_REPORT_PATH}")
+
+
+def main():
+    manifest = load_manifest()
+    previous = load_previous_chunks()
+    chunker = PageChunker(manifest, lambda url: previous.get(url, []), load_previous_duplicates())
+
+    # Merge the chunked texts inside "chunked_data", which looks like this
+    # [ {"url": "https://...", "title": "Mevduat", "chunk_id": 0, "text": "...", "vector_id": 17}, ....]
+    def write_chunks(path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            for entry in iter_documents(config.SCRAPED_DATA_PATH):
+                rows, _ = chunker.chunk_page(entry)
+                writer.writerows(rows)
 
-for entry in scraped:
-    text = entry["content"]
-    url = entry["url"]
-    title = entry.get("title", "")
+    atomic_write_file(config.CHUNKED_DATA_PATH, write_chunks)
+    print(f"✅ {chunker.stats['pages']} içerik yüklendi.")
 
-    chunks = chunk_text(text)
-    for i, chunk in enumerate(chunks):
-        chunked_data.append({
-            "url": url,
-            "title": title,
-            "chunk_id": i,
-            "text": chunk
-        })
+    # Pages that disappeared from the scrape take their vectors with them
+    removed = chunker.remove_missing()
+    save_manifest(manifest)
+    write_report(chunker.stats, chunker.duplicates)
+    report_chunking(chunker.stats, chunker.duplicates, removed)
 
 
-out_df = pd.DataFrame(chunked_data)
-out_df.to_csv('data/chunked_data.csv', index=False)
-print("✅ Chunk işlemi tamamlandı.")
+if __name__ == "__main__":
+    main()
@@ -6,40 +6,94 @@
 embed.py
 
 Amaç:
-- Groq Embedding API ile metni vektörleştir
-- JSONL olarak kaydet
+- Chunk'ları SentenceTransformer ile vektörleştir
+- Metni ve modeli değişmeyen chunk'ları tekrar encode etme
+  (cache anahtarı: sha1(model adı + metin))
+- Tüm vektörleri memory-map ile açılabilen tek bir .npy dosyasına yaz
+
+Kullanım:
+    python3 scripts/embed.py --batch-size 64 --processes 4 --dtype float16
 """
 
-import pandas as pd
-import json
+import argparse
+import hashlib
 import os
-from groq import Groq
-from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+import sys
+
 import numpy as np
+import pandas as pd
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.manifest import chunk_vector_ids
+
+
+def embedding_key(text, model_name=config.EMBEDDING_MODEL_NAME):
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest().encode("ascii")
+
+
+def load_embedding_cache():
+    """Vectors of the last run keyed by embedding_key, memory-mapped"""
+    if not (os.path.exists(config.EMBEDDINGS_PATH) and os.path.exists(config.EMBEDDING_KEYS_PATH)):
+        return {}, None
+    embeddings = np.load(config.EMBEDDINGS_PATH, mmap_mode="r")
+    keys = np.load(config.EMBEDDING_KEYS_PATH)
+    if len(keys) != len(embeddings):
+        return {}, None
+    return {key: row for row, key in enumerate(keys.tolist())}, embeddings
+
+
+def encode(model, texts, batch_size, processes):
+    """Encode in batches, on a pool of CPU processes when processes > 1"""
+    if processes <= 1:
+        return model.encode(texts, batch_size=batch_size, show_progress_bar=True, convert_to_numpy=True)
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * processes)
+    try:
+        return model.encode(texts, batch_size=batch_size, pool=pool, show_progress_bar=True)
+    finally:
+        model.stop_multi_process_pool(pool)
+
 
-df_chunked = pd.read_csv("data/chunked_data.csv")
-chunked_data = df_chunked.to_dict(orient="records")
+def main():
+    parser = argparse.ArgumentParser(description="Chunk'ları embed et")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBED_BATCH_SIZE", "64")))
+    parser.add_argument("--processes", type=int, default=int(os.getenv("EMBED_PROCESSES", "1")))
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=os.getenv("EMBED_DTYPE", "float32"))
+    args = parser.parse_args()
 
-load_dotenv()
+    chunked_data = pd.read_csv(config.CHUNKED_DATA_PATH).to_dict(orient="records")
+    texts = [str(chunk["text"]) for chunk in chunked_data]
+    keys = [embedding_key(text) for text in texts]
 
-api_key = os.getenv("API_KEY")  # .env dosyasından API anahtarını al
-if not api_key:
-    raise ValueError("API_KEY environment variable not set.")
+    cache, cached_embeddings = load_embedding_cache()
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    print(f"🧠 {len(missing)} chunk encode edilecek, {len(keys) - len(missing)} chunk cache'ten alınıyor.")
 
-client = Groq(api_key=api_key)
+    # Nothing to encode means the model doesn't even need to be loaded
+    model = None
+    if missing or cached_embeddings is None:
+        model = SentenceTransformer(config.EMBEDDING_MODEL_NAME) # Also tried with "paraphrase-multilingual-MiniLM-L12-v2" or "paraphrase-multilingual-mpnet-base-v2"
+        dim = model.get_sentence_embedding_dimension()
+    else:
+        dim = cached_embeddings.shape[1]
 
-model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2") # Also tried with "paraphrase-multilingual-MiniLM-L12-v2" or "paraphrase-multilingual-mpnet-base-v2"
+    embeddings = np.empty((len(texts), dim), dtype=args.dtype)
+    for row, key in enumerate(keys):
+        if key in cache:
+            embeddings[row] = cached_embeddings[cache[key]]
+    if missing:
+        embeddings[missing] = encode(model, [texts[i] for i in missing], args.batch_size, args.processes)
 
-texts = [chunk["text"] for chunk in chunked_data]
-embeddings = model.encode(texts, show_progress_bar=True)
+    # Release the memory map before overwriting the file it points to
+    del cached_embeddings, cache
 
-# Merge all embeddings in a Numpy array. (all text in one matrix)
-np.save("./data/embeddings.npy", embeddings)  # Save the embeddings to a file
-print("✅ Embeddings saved to embeddings.npy")
+    np.save(config.EMBEDDINGS_PATH, embeddings) # Open with np.load(..., mmap_mode="r")
+    np.save(config.EMBEDDING_IDS_PATH, np.array(chunk_vector_ids(chunked_data), dtype="int64"))
+    np.save(config.EMBEDDING_KEYS_PATH, np.array(keys, dtype="S40"))
+    print(f"✅ {len(texts)} embedding ({args.dtype}) embeddings.npy dosyasına kaydedildi")
 
 
-embedding_array = np.array(embeddings).astype("float32") # FAISS only accepts float32 type arrays
-# Save
-np.save("./data/embedding_array.npy", embedding_array)
-print("✅ Embedding array is saved to embedding_array.npy")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+# scripts/pipeline.py
+
+#!/usr/bin/env python3
+
+"""
+pipeline.py
+
+Amaç:
+- Scraping, temizleme, chunking ve embedding adımlarını tek süreçte
+  çalıştırmak: her adım bir generator, adımlar birbirine sınırlı
+  kuyruklarla bağlı; sayfalar indikçe chunk'lanır ve embed edilir
+- Ara CSV'leri yazıp bir sonraki adımda yeniden okumamak; toplam süre
+  adımların toplamına değil en yavaş adıma yaklaşır
+- Belleği korpus boyutundan bağımsız tutmak: kuyruklarda en fazla birkaç
+  düzine sayfa bekler, vektörler ve satırlar diske akıtılır
+- Her sayfa bitince ilerlemeyi data/pipeline_checkpoint/ altına yazmak;
+  yarıda kesilen çalıştırma kaldığı sayfadan devam eder
+
+Çıktılar scrape_clean.py, chunk.py ve embed.py'nin yazdıklarıyla aynıdır
+(sayfalar indirilme sırasıyla yazılır); sonraki adım update_index.py.
+
+Kullanım:
+    python3 scripts/pipeline.py --batch-size 64 --dtype float16
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.artifacts import atomic_write_file
+from finans.chunk_store import ChunkStore
+from finans.manifest import load_manifest, save_manifest
+
+from chunk import COLUMNS, PageChunker, load_previous_duplicates, report_chunking, write_report
+from embed import embedding_key, load_embedding_cache
+from scrape_clean import FETCH_WORKERS, extract_clean_text, fetch_page, get_title_from_url, links
+
+# Pages waiting between two stages
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "16"))
+# Pages being extracted at once
+EXTRACT_IN_FLIGHT = 2 * (os.cpu_count() or 1)
+SCRAPED_COLUMNS = ["url", "content", "title"]
+
+# Some pages are longer than the csv module's default 128 KB per field
+csv.field_size_limit(2 ** 31 - 1)
+
+
+def threaded(items, maxsize=QUEUE_SIZE):
+    """Iterate items on a thread of its own, at most maxsize results ahead of the consumer.
+
+    Errors of the producer are raised in the consumer. When the consumer
+    stops early, the producer stops at its next result and closes items.
+    """
+    results = queue.Queue(maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                results.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = results.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def finished(pending, block=True):
+    """Pop the finished futures of pending ({future: tag}) as (tag, result) pairs.
+
+    With block, waits until at least one has finished.
+    """
+    done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future.result()
+
+
+class PreviousScrape:
+    """Rows of the last scraped_data.csv, read from disk by url when needed.
+
+    Only the byte span of each row is kept in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = SCRAPED_COLUMNS
+        self.spans = {}
+        if os.path.exists(path):
+            self._index()
+
+    def _index(self):
+        with open(self.path, "rb") as f:
+            first = f.readline()
+            self.header = next(csv.reader(io.StringIO(first.decode("utf-8"))))
+            url_column = self.header.index("url")
+            start = position = len(first)
+            quotes = 0
+            for line in iter(f.readline, b""):
+                position += len(line)
+                quotes += line.count(b'"')
+                if quotes % 2:  # the line ends inside a quoted field
+                    continue
+                f.seek(start)
+                record = f.read(position - start)
+                row = next(csv.reader(io.StringIO(record.decode("utf-8"))), None)
+                if row:
+                    self.spans[row[url_column]] = (start, position)
+                start = position
+                quotes = 0
+
+    def __contains__(self, url):
+        return url in self.spans
+
+    def read(self, url):
+        start, end = self.spans[url]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            record = f.read(end - start).decode("utf-8")
+        return dict(zip(self.header, next(csv.reader(io.StringIO(record)))))
+
+
+def stored_rows(pages):
+    """previous_rows for PageChunker: chunks of the page's vector ids in the chunk store.
+
+    Empty when a chunk is missing, so the page is chunked again.
+    """
+    store = ChunkStore(config.CHUNK_STORE_PATH) if ChunkStore.exists(config.CHUNK_STORE_PATH) else None
+
+    def previous_rows(url):
+        vector_ids = pages.get(url, {}).get("vector_ids") or []
+        if store is None:
+            return []
+        rows = []
+        for vector_id in vector_ids:
+            chunk = store.get(vector_id)
+            if chunk is None:
+                return []
+            rows.append({
+                "url": url, "title": chunk["title"], "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"], "vector_id": vector_id
+            })
+        return rows
+
+    return previous_rows
+
+
+def fetch_pages(todo, validators):
+    """(link, (status, html, validators)) as fetches finish, 2 * FETCH_WORKERS in flight"""
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        pending = {}
+        for link in todo:
+            pending[pool.submit(fetch_page, link, validators.get(link))] = link
+            if len(pending) >= 2 * FETCH_WORKERS:
+                yield from finished(pending)
+        while pending:
+            yield from finished(pending)
+
+
+def extract_pages(fetched, previous, total):
+    """(scraped row, validators) of each page; validators is None for a row of the previous scrape"""
+    with ProcessPoolExecutor() as pool:
+        pending = {}
+        for i, (link, (status, html, validators)) in enumerate(fetched):
+            print(f"[{i+1}/{total}] {status}: {link}")
+            if status == "ok":
+                pending[pool.submit(extract_clean_text, html)] = (link, validators)
+            elif status in ("not_modified", "error") and link in previous:
+                # Unchanged (or temporarily unreachable): keep the previous content
+                yield previous.read(link), None
+            ready = finished(pending, block=len(pending) >= EXTRACT_IN_FLIGHT) if pending else ()
+            yield from scraped_rows(ready)
+        while pending:
+            yield from scraped_rows(finished(pending))
+
+
+def scraped_rows(extracted):
+    for (link, validators), text in extracted:
+        if text:  # If text is not empty.
+            yield {"url": link, "content": text, "title": get_title_from_url(link)}, validators
+
+
+def chunk_pages(scraped, chunker):
+    """Pages with their chunk rows and the manifest state after them"""
+    for entry, validators in scraped:
+        if validators is not None:
+            chunker.pages.setdefault(entry["url"], {}).update(validators)
+        rows, dropped = chunker.chunk_page(entry)
+        yield {
+            "entry": entry,
+            "fetched": validators is not None,
+            "rows": rows,
+            "dropped": dropped,
+            "page": dict(chunker.pages[entry["url"]]),
+            "next_vector_id": chunker.manifest["next_vector_id"],
+            "stats": dict(chunker.stats)
+        }
+
+
+class Embedder:
+    """Vectors of chunk texts: taken from the last embeddings.npy when the key matches, encoded otherwise"""
+
+    def __init__(self, dtype, batch_size):
+        self.dtype = dtype
+        self.batch_size = batch_size
+        self.cache, self.cached_embeddings = load_embedding_cache()
+        self.model = None
+
+    def get_model(self):
+        # Nothing to encode means the model doesn't even need to be loaded
+        if self.model is None:
+            self.model = SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+        return self.model
+
+    def dimension(self):
+        if self.model is None and self.cached_embeddings is not None:
+            return self.cached_embeddings.shape[1]
+        return self.get_model().get_sentence_embedding_dimension()
+
+    def is_cached(self, key):
+        return key in self.cache
+
+    def embed(self, pages):
+        """Set "keys", "vectors" and "encoded" of pages, encoding their new chunks in one call"""
+        missing = [
+            (page, row) for page in pages for row, key in enumerate(page["keys"]) if key not in self.cache
+        ]
+        encoded = None
+        if missing:
+            texts = [str(page["rows"][row]["text"]) for page, row in missing]
+            encoded = self.get_model().encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        if encoded is not None:
+            dim = encoded.shape[1]
+        else:
+            # Every row is cached, or there are no rows at all
+            dim = self.cached_embeddings.shape[1] if self.cached_embeddings is not None else 0
+        for page in pages:
+            page["vectors"] = np.empty((len(page["rows"]), dim), dtype=self.dtype)
+            page["encoded"] = 0
+            for row, key in enumerate(page["keys"]):
+                if key in self.cache:
+                    page["vectors"][row] = self.cached_embeddings[self.cache[key]]
+        for i, (page, row) in enumerate(missing):
+            page["vectors"][row] = encoded[i]
+            page["encoded"] += 1
+        return pages
+
+
+def embed_pages(chunked, embedder):
+    """Pages with vectors for their rows; new chunks are encoded batch_size at a time"""
+    batch = []
+    missing = 0
+    for page in chunked:
+        page["keys"] = [embedding_key(str(row["text"])) for row in page["rows"]]
+        missing += sum(not embedder.is_cached(key) for key in page["keys"])
+        batch.append(page)
+        if missing >= embedder.batch_size:
+            yield from embedder.embed(batch)
+            batch, missing = [], 0
+    if batch:
+        yield from embedder.embed(batch)
+
+
+class Checkpoint:
+    """Outputs of the finished pages, appended to files in path.
+
+    After a page's rows are flushed to disk, progress.jsonl gets a line
+    with the manifest state and the size of every file at that point. A
+    resumed run cuts the files back to the sizes of the last complete
+    line, so a page is either fully in the outputs or done again.
+    """
+
+    FILES = {
+        "scraped": "scraped.csv",
+        "chunks": "chunks.csv",
+        "duplicates": "duplicates.jsonl",
+        "vectors": "vectors.bin",
+        "ids": "ids.bin",
+        "keys": "keys.bin"
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.progress = None
+
+    def file_path(self, name):
+        return os.path.join(self.path, self.FILES.get(name, name))
+
+    def start(self, dtype):
+        """Begin a new run: progress line 0 holds dtype and the sizes with only CSV headers"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        for name, columns in (("scraped", SCRAPED_COLUMNS), ("chunks", COLUMNS)):
+            with open(self.file_path(name), "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(columns)
+        for name in ("duplicates", "vectors", "ids", "keys"):
+            open(self.file_path(name), "wb").close()
+        self._open()
+        header = {"dtype": dtype, "sizes": self._sizes()}
+        self._log(header)
+        return header, []
+
+    def resume(self):
+        """(header, page lines) of an interrupted run, None if there is none"""
+        lines = []
+        try:
+            with open(self.file_path("progress.jsonl"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # cut off while being written
+        except FileNotFoundError:
+            return None
+        if not lines:
+            return None
+        last = lines[-1]
+        for name, size in last["sizes"].items():
+            with open(self.file_path(name), "r+b") as f:
+                f.truncate(size)
+        with open(self.file_path("progress.jsonl"), "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+        self._open()
+        return lines[0], lines[1:]
+
+    def _open(self):
+        for name in self.FILES:
+            text = name in ("scraped", "chunks", "duplicates")
+            self.files[name] = open(self.file_path(name), "a", newline="", encoding="utf-8") if text \
+                else open(self.file_path(name), "ab")
+        self.progress = open(self.file_path("progress.jsonl"), "a", encoding="utf-8")
+
+    def _sizes(self):
+        return {name: os.fstat(f.fileno()).st_size for name, f in self.files.items()}
+
+    def _log(self, line):
+        self.progress.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.progress.flush()
+        os.fsync(self.progress.fileno())
+
+    def add(self, page, totals):
+        """Append a finished page; it counts as done once its progress line is written"""
+        csv.DictWriter(self.files["scraped"], fieldnames=SCRAPED_COLUMNS).writerow(
+            {column: page["entry"].get(column, "") for column in SCRAPED_COLUMNS}
+        )
+        csv.DictWriter(self.files["chunks"], fieldnames=COLUMNS).writerows(page["rows"])
+        for duplicate in page["dropped"]:
+            self.files["duplicates"].write(json.dumps(duplicate, ensure_ascii=False) + "\n")
+        self.files["vectors"].write(np.ascontiguousarray(page["vectors"]).tobytes())
+        self.files["ids"].write(np.array([int(row["vector_id"]) for row in page["rows"]], dtype="int64").tobytes())
+        self.files["keys"].write(np.array(page["keys"], dtype="S40").tobytes())
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self._log({
+            "url": page["entry"]["url"],
+            "page": page["page"],
+            "next_vector_id": page["next_vector_id"],
+            "stats": page["stats"],
+            "totals": dict(totals),
+            "dim": page["vectors"].shape[1] if len(page["vectors"]) else None,
+            "sizes": self._sizes()
+        })
+
+    def close(self):
+        for f in list(self.files.values()) + [self.progress]:
+            if f is not None:
+                f.close()
+
+    def iter_chunks(self):
+        with open(self.file_path("chunks"), "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield row
+
+    def iter_duplicates(self):
+        with open(self.file_path("duplicates"), "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def write_embeddings(self, path, dtype, dim, block=4096):
+        """Copy vectors.bin into a .npy file, block rows at a time"""
+        count = os.path.getsize(self.file_path("ids")) // 8
+        vectors = np.memmap(self.file_path("vectors"), dtype=dtype, mode="r", shape=(count, dim)) if count else None
+        output = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(count, dim))
+        for start in range(0, count, block):
+            output[start:start + block] = vectors[start:start + block]
+        output.flush()
+        del output, vectors
+
+    def remove(self):
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def copy_to(source):
+    return lambda path: shutil.copyfile(source, path)
+
+
+def save_npy(array):
+    def write(path):
+        with open(path, "wb") as f:
+            np.save(f, array)
+    return write
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraping, chunking ve embedding'i akış halinde çalıştır")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBED_BATCH_SIZE", "64")))
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=os.getenv("EMBED_DTYPE", "float32"))
+    parser.add_argument("--fresh", action="store_true", help="Yarım kalan çalıştırmayı yok say, baştan başla")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    manifest = load_manifest()
+    pages = manifest["pages"]
+    previous = PreviousScrape(config.SCRAPED_DATA_PATH)
+    chunker = PageChunker(manifest, stored_rows(pages), load_previous_duplicates())
+    totals = {"fetched": 0, "unchanged": 0, "encoded": 0, "cached": 0}
+
+    checkpoint = Checkpoint(config.PIPELINE_CHECKPOINT_DIR)
+    resumed = None if args.fresh else checkpoint.resume()
+    header, done = resumed or checkpoint.start(args.dtype)
+    dtype = header["dtype"]
+    dim = None
+    if done:
+        # Continue from the last finished page of the interrupted run
+        for line in done:
+            pages[line["url"]] = line["page"]
+            dim = line["dim"] or dim
+        manifest["next_vector_id"] = done[-1]["next_vector_id"]
+        chunker.stats = dict(done[-1]["stats"])
+        totals.update(done[-1]["totals"])
+        chunker.remember(checkpoint.iter_chunks())
+        chunker.urls.update(line["url"] for line in done)
+        chunker.duplicates.extend(checkpoint.iter_duplicates())
+        print(f"⚠️  Yarım kalan çalıştırma bulundu, {len(done)} sayfa atlanıyor (--fresh baştan başlatır)")
+
+    finished_urls = {line["url"] for line in done}
+    todo = [link for link in links if link not in finished_urls]
+    # Only send validators when we still have the old content to fall back on
+    validators = {link: dict(pages.get(link, {})) for link in todo if link in previous}
+
+    embedder = Embedder(dtype, args.batch_size)
+    fetched = threaded(fetch_pages(todo, validators))
+    scraped = threaded(extract_pages(fetched, previous, len(todo)))
+    chunked = threaded(chunk_pages(scraped, chunker))
+    embedded = threaded(embed_pages(chunked, embedder))
+    for page in embedded:
+        totals["fetched" if page["fetched"] else "unchanged"] += 1
+        totals["encoded"] += page["encoded"]
+        totals["cached"] += len(page["rows"]) - page["encoded"]
+        if len(page["rows"]):
+            dim = page["vectors"].shape[1]
+        checkpoint.add(page, totals)
+    checkpoint.close()
+
+    if dim is None:
+        dim = embedder.dimension()
+    # Release the memory map of the old embeddings before replacing the file
+    embedder.cached_embeddings = None
+    atomic_write_file(config.SCRAPED_DATA_PATH, copy_to(checkpoint.file_path("scraped")))
+    atomic_write_file(config.CHUNKED_DATA_PATH, copy_to(checkpoint.file_path("chunks")))
+    atomic_write_file(config.EMBEDDINGS_PATH, lambda path: checkpoint.write_embeddings(path, dtype, dim))
+    atomic_write_file(config.EMBEDDING_IDS_PATH, save_npy(np.fromfile(checkpoint.file_path("ids"), dtype="int64")))
+    atomic_write_file(config.EMBEDDING_KEYS_PATH, save_npy(np.fromfile(checkpoint.file_path("keys"), dtype="S40")))
+
+    # Pages that disappeared from the scrape take their vectors with them
+    removed = chunker.remove_missing()
+    save_manifest(manifest)
+    write_report(chunker.stats, chunker.duplicates)
+    checkpoint.remove()
+
+    print(f"✅ Scraped data saved to scraped_data.csv ({totals['fetched']} indirildi, {totals['unchanged']} değişmedi)")
+    report_chunking(chunker.stats, chunker.duplicates, removed)
+    print(f"🧠 {totals['encoded']} chunk encode edildi, {totals['cached']} chunk cache'ten alındı ({dtype})")
+    print(f"⏱️  Pipeline {time.perf_counter() - started:.1f} sn sürdü")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,12 @@ echo "📌 Pipeline başlatılıyor..."
 echo "📥 1. Scraping başlatılıyor..."
 python3 scripts/read_links.py
 
-echo "🧼 2. Temizleme işlemi başlatılıyor..."
-python3 scripts/scrape_clean.py
+# Scraping, temizleme, chunking ve embedding tek süreçte, sayfa sayfa akar;
+# yarıda kesilirse bir sonraki çalıştırma kaldığı yerden devam eder
+echo "🧼 2-4. Temizleme, chunking ve embedding başlatılıyor..."
+python3 scripts/pipeline.py || exit 1
 
-echo "🔪 3. Chunking işlemi başlatılıyor..."
-python3 scripts/chunk.py
-
-echo "🧠 4. Embedding başlatılıyor..."
-python3 scripts/embed.py
+echo "🗂️  5. FAISS index güncelleniyor..."
+python3 scripts/update_index.py
 
 echo "✅ Pipeline tamamlandı."
@@ -10,73 +10,169 @@ Amaç:
 - Sayfa başlığı, içerik ve URL'i almak
 - Title almak için URL'den path kısmını kullanmak
 - Datayı temizlemek ve düzenlemek.
+- Sayfaları paralel çekmek (host başına sınırlı), HTML'den metin
+  çıkarmayı ayrı süreçlerde yapmak
 
 """
 
 import trafilatura
 import requests
 import pandas as pd
-import re
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from read_links import links
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.text import clean_document
+from finans.manifest import load_manifest, save_manifest
+
 headers = {
     "User-Agent": "Mozilla/5.0"
 }
 
-def fetch_clean_text(url):
+FETCH_WORKERS = int(os.getenv("SCRAPE_WORKERS", "16"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPE_PER_HOST", "4")) # Parallel requests to the same site
+TIMEOUT = (5, 10) # (connect, read) seconds
+
+_thread_local = threading.local()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_session():
+    """One pooled Session per fetch thread, retrying 429/5xx with backoff"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=1, # 1s, 2s, 4s
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=PER_HOST_LIMIT, pool_maxsize=PER_HOST_LIMIT, max_retries=retry)
+        session = requests.Session()
+        session.headers.update(headers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _thread_local.session = session
+    return session
+
+
+def host_slot(url):
+    """Semaphore limiting concurrent requests to one host"""
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_slots[host]
+
+
+def fetch_page(url, page=None):
+    """Conditional GET using the ETag/Last-Modified saved in the manifest.
+
+    Returns (status, html, validators) where status is "ok", "not_modified",
+    "gone" (4xx answer) or "error" (network problem or 5xx/429 after retries).
+    """
+    request_headers = {}
+    if page:
+        if page.get("etag"):
+            request_headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            request_headers["If-Modified-Since"] = page["last_modified"]
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        with host_slot(url):
+            response = get_session().get(url, headers=request_headers, timeout=TIMEOUT)
+        if response.status_code == 304: # 304 means unchanged since the last run
+            return "not_modified", None, {}
         if response.status_code == 200: # 200 means success
-            downloaded = trafilatura.extract(response.text) # Extracts the clean text.
-            return downloaded
-        else:
-            print(f"[!] {url} status code: {response.status_code}")
-            return None
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+            return "ok", response.content, validators # bytes: trafilatura detects the encoding
+        print(f"[!] {url} status code: {response.status_code}")
+        if response.status_code == 429 or response.status_code >= 500:
+            return "error", None, {}
+        return "gone", None, {}
     except Exception as e:
         print(f"[X] Error fetching {url}: {e}")
-        return None
-
-
-def clean_text(text):
-    if not text:
-        return ""
+        return "error", None, {}
 
-    # Clean HTML tags
-    text = re.sub(r'<[^>]+>', ' ', text)
 
-    # Delete punctuations
-    text = re.sub(r'[^\w\s]', ' ', text)
+def extract_clean_text(html):
+    """Runs in a worker process so extraction doesn't serialize on the GIL"""
+    # Sentence and paragraph breaks are kept for chunk.py
+    return clean_document(trafilatura.extract(html)) # Extracts the clean text.
 
-    # Lowercase
-    text = text.lower()
-
-    # Delete unnecessary spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    return text
 
 def get_title_from_url(url): # Extract the title from the website.
     path = urlparse(url).path # Only takes the path part of the link
     return path.strip("/").split("/")[-1].replace("-", " ").replace("_", " ").title()
 
 
+def load_previous_scrape():
+    """Rows of the last scraped_data.csv keyed by url"""
+    if not os.path.exists(config.SCRAPED_DATA_PATH):
+        return {}
+    previous = pd.read_csv(config.SCRAPED_DATA_PATH).to_dict(orient="records")
+    return {row["url"]: row for row in previous}
+
+
 def main():
-    scraped = []
-
-    for i, link in enumerate(links):
-        print(f"[{i+1}/{len(links)}] Fetching: {link}")
-        text = clean_text(fetch_clean_text(link))
-        if text: # If text is not empty.
-            scraped.append({
-                "url": link,
-                "content": text,
-                "title": get_title_from_url(link)
-            })
+    manifest = load_manifest()
+    pages = manifest["pages"]
+    previous = load_previous_scrape()
+    statuses = {}
+    extractions = {}
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetch_pool, ProcessPoolExecutor() as extract_pool:
+        # Only send validators when we still have the old content to fall back on
+        fetches = {
+            fetch_pool.submit(fetch_page, link, pages.get(link) if link in previous else None): link
+            for link in links
+        }
+        for i, future in enumerate(as_completed(fetches)):
+            link = fetches[future]
+            status, html, validators = future.result()
+            print(f"[{i+1}/{len(links)}] {status}: {link}")
+            statuses[link] = status
+            if status == "ok":
+                extractions[link] = (extract_pool.submit(extract_clean_text, html), validators)
+
+        # Keep the order of all_links.csv in the output
+        scraped = []
+        fetched = unchanged = 0
+        for link in links:
+            status = statuses[link]
+            if status == "ok":
+                future, validators = extractions[link]
+                text = future.result()
+                if text: # If text is not empty.
+                    scraped.append({
+                        "url": link,
+                        "content": text,
+                        "title": get_title_from_url(link)
+                    })
+                    pages.setdefault(link, {}).update(validators)
+                    fetched += 1
+            elif status in ("not_modified", "error") and link in previous:
+                # Unchanged (or temporarily unreachable): keep the previous content
+                scraped.append(previous[link])
+                unchanged += 1
 
     scraped_data = pd.DataFrame(scraped)
-    scraped_data.to_csv('./data/scraped_data.csv', index=False)
-    print("✅ Scraped data saved to scraped_data.csv")
+    scraped_data.to_csv(config.SCRAPED_DATA_PATH, index=False)
+    save_manifest(manifest)
+    print(f"✅ Scraped data saved to scraped_data.csv ({fetched} indirildi, {unchanged} değişmedi)")
 
 
 if __name__ == "__main__":
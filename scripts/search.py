@@ -8,71 +8,49 @@ search.py
 Amaç:
 - Kullanıcının sorusunu embed et
 - En yakın chunk'ları bul ve göster
-"""
-
-import pandas as pd
-import numpy as np
-import json
-from groq import Groq
-from dotenv import load_dotenv
-import os
-import faiss
-import numpy as np
-import pickle
-import openai
-from embed import model
-from transformers import AutoTokenizer
 
+Index'i kurmaz ve dosyalara yazmaz; scripts/update_index.py'nin kurduğu
+data/faiss_index.index, chunk_store/ ve bm25/ dosyalarını okur.
 
-load_dotenv()
-api_key = os.getenv("API_KEY")  # .env dosyasından API anahtarını al
-client = Groq(api_key=api_key)
-
-df_chunked = pd.read_csv("data/chunked_data.csv")
-chunked_data = df_chunked.to_dict(orient="records")
-embedding_array = np.load("data/embedding_array.npy").astype("float32") # load the embeddings from the file
-embedding_dim = embedding_array.shape[1] #dimension of vector (size)
-index = faiss.IndexFlatL2(embedding_dim) # create index
-index.add(embedding_array) # add faiss indexes to array
+Kullanım:
+    python scripts/search.py "kredi kartı aidatı nedir"
+"""
 
+import os
+import sys
 
-metadata = [
-    {
-        "text": chunk["text"],
-        "title": chunk.get("title", ""),
-        "url": chunk["url"]
-    }
-    for chunk in chunked_data
-] # create a metadata with all embeddings, titles, and faiss index
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from finans import resources
+from finans.packing import pack_context
+from finans.retrieval import search_context as search_chunks
 
-# write FAISS index in the file
-faiss.write_index(index, "data/faiss_index.index")
 
-# save Metadata with pickle
-with open("data/faiss_metadata.pkl", "wb") as f:
-    pickle.dump(metadata, f)
+def search_context(query, k=5, max_token_limit=512):
+    """Context block of the k best chunks, packed into max_token_limit prompt tokens"""
+    return pack_context(search_chunks(query, top_k=k), max_token_limit)
 
-def search_context(query, k=5):
-    query_embedding = model.encode([query]).astype("float32")
-    D, I = index.search(query_embedding, k)
-    from transformers import AutoTokenizer
 
-    tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-    max_token_limit = 512 
+def score_label(result):
+    """Score of a result, its vector distance without one; keyword fallback results have neither"""
+    if result["score"] is not None:
+        return f"{result['score']:.4f}"
+    if result.get("distance") is not None:
+        return f"d={result['distance']:.4f}"
+    return "anahtar kelime"
 
-    current_tokens = 0
-    selected_chunks = []
 
-    context_chunks = [metadata[i]["text"] for i in I[0]]
+def main():
+    if len(sys.argv) < 2:
+        print('Kullanım: python scripts/search.py "soru"')
+        sys.exit(1)
+    query = " ".join(sys.argv[1:])
 
+    print(f"🏷️  Index sürümü: {resources.index_version()}")
+    for result in search_chunks(query, top_k=5):
+        print(f"\n[{score_label(result)}] {result['title']} - {result['url']}")
+        print(result["text"][:300])
 
-    for chunk in context_chunks:
-        tokens = len(tokenizer.tokenize(chunk))
-        if current_tokens + tokens > max_token_limit:
-            break
-        selected_chunks.append(chunk)
-        current_tokens += tokens
 
-    joined_context = "\n\n".join(selected_chunks)
-    return joined_context
+if __name__ == "__main__":
+    main()
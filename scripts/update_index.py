@@ -0,0 +1,148 @@
+# scripts/update_index.py
+
+#!/usr/bin/env python3
+
+"""
+update_index.py
+
+Amaç:
+- FAISS index'ini baştan kurmak yerine vector_id ile güncellemek:
+  silinen chunk'ların vektörlerini çıkar, yenilerini ekle
+- Chunk metinlerini ve url/title bilgilerini vector_id ile erişilen
+  memory-mapped chunk store'a yaz (finans/chunk_store.py)
+- Aynı chunk'lar için BM25 ters index'ini kur (finans/bm25.py)
+- Chunk'ların prompt tokenizer'ındaki token sayılarını bir kez sayıp
+  chunk store'a yaz (finans/packing.py)
+- Index tipi değiştiğinde (flat, ivf_flat, ivf_pq, hnsw) ya da --rebuild
+  verildiğinde index'i tüm embedding'lerden eğitip yeniden kur (finans/ann.py)
+- Dosyaları geçici yola yazıp rename ile değiştir, en son sürüm damgasını
+  yaz (finans/artifacts.py); sunucu yarım kalmış bir kurulumu okumasın
+"""
+
+import argparse
+import os
+import sys
+
+import faiss
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finans import config
+from finans.ann import INDEX_TYPES, build_index, index_type_of, supports_removal
+from finans.artifacts import atomic_write_dir, atomic_write_file, write_version
+from finans.bm25 import BM25Index
+from finans.chunk_store import write_chunk_store
+from finans.manifest import chunk_vector_ids
+from finans.packing import count_tokens, tokenizer_name
+
+
+def load_id_mapped_index(dim):
+    """Existing ID-mapped index, or None when it has to be built from scratch.
+
+    Indexes written before vector ids existed (plain IndexFlatL2, whose
+    row numbers are not stable) are discarded and rebuilt.
+    """
+    if os.path.exists(config.INDEX_PATH):
+        index = faiss.read_index(config.INDEX_PATH)
+        if isinstance(index, faiss.IndexIDMap) and index.d == dim:
+            return index
+        print("⚠️  Eski index id'siz, baştan kuruluyor")
+    return None
+
+
+def load_embedding_ids(chunked_data, count):
+    """Vector ids of the embeddings.npy rows.
+
+    Files written before vector ids existed have no embedding_ids.npy and
+    no vector_id column; their rows are numbered in order, which only
+    works while embeddings.npy still matches chunked_data.csv row by row.
+    The rows get the ids as their vector_id.
+    """
+    ids = chunk_vector_ids(chunked_data)
+    for chunk, vector_id in zip(chunked_data, ids):
+        chunk["vector_id"] = vector_id
+    if os.path.exists(config.EMBEDDING_IDS_PATH):
+        return np.load(config.EMBEDDING_IDS_PATH)
+    if count != len(chunked_data):
+        raise SystemExit(
+            f"❌ embeddings.npy ({count} satır) chunked_data.csv ({len(chunked_data)} satır) ile uyuşmuyor; "
+            "önce scripts/embed.py çalıştırın"
+        )
+    print("⚠️  embedding_ids.npy yok, vektör id'leri satır sırasından veriliyor")
+    return np.array(ids, dtype="int64")
+
+
+def indexed_ids(index):
+    return set(faiss.vector_to_array(index.id_map).tolist())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FAISS index, chunk store ve BM25 güncelleme")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=config.FAISS_INDEX_TYPE)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF liste sayısı (varsayılan 4*sqrt(n))")
+    parser.add_argument("--pq-m", type=int, default=None, help="IVF-PQ alt quantizer sayısı")
+    parser.add_argument("--pq-bits", type=int, default=8)
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW komşu sayısı")
+    parser.add_argument("--sq8", action="store_true", default=config.FAISS_SQ8,
+                        help="Vektörleri 8-bit skaler quantization ile sakla")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Index'i yeniden eğit ve baştan kur (IVF merkezleri eskidiğinde)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    chunked_data = pd.read_csv(config.CHUNKED_DATA_PATH).to_dict(orient="records")
+    embeddings = np.load(config.EMBEDDINGS_PATH, mmap_mode="r")
+    embedding_ids = load_embedding_ids(chunked_data, len(embeddings))
+
+    index = None if args.rebuild else load_id_mapped_index(embeddings.shape[1])
+    if index is not None and index_type_of(index) != args.index_type:
+        print(f"⚠️  Index tipi {index_type_of(index)} -> {args.index_type}, baştan kuruluyor")
+        index = None
+
+    current = set(embedding_ids.tolist())
+    existing = indexed_ids(index) if index is not None else set()
+    removed = np.array(sorted(existing - current), dtype="int64")
+    if index is not None and len(removed) and not supports_removal(index):
+        print("⚠️  HNSW index'ten vektör silinemiyor, baştan kuruluyor")
+        index = None
+
+    if index is None:
+        index = build_index(
+            embeddings, embedding_ids, args.index_type,
+            nlist=args.nlist, pq_m=args.pq_m, pq_bits=args.pq_bits, hnsw_m=args.hnsw_m, sq8=args.sq8
+        )
+        added_rows, removed = embedding_ids, []
+    else:
+        if len(removed):
+            index.remove_ids(removed)
+        added_rows = [i for i, vector_id in enumerate(embedding_ids) if int(vector_id) not in existing]
+        if added_rows:
+            # FAISS only accepts float32; embeddings.npy may be stored as float16
+            index.add_with_ids(np.asarray(embeddings[added_rows], dtype="float32"), embedding_ids[added_rows].astype("int64"))
+
+    bm25 = BM25Index.build(
+        (chunk["text"] for chunk in chunked_data), [chunk["vector_id"] for chunk in chunked_data]
+    )
+    # Counted once here so serving only has to add them up
+    token_counts = count_tokens([chunk["text"] for chunk in chunked_data])
+
+    # Chunk store first: a server loading in between only misses text for brand new ids
+    atomic_write_dir(
+        config.CHUNK_STORE_PATH,
+        lambda path: write_chunk_store(path, chunked_data, token_counts, tokenizer_name())
+    )
+    atomic_write_dir(config.BM25_PATH, bm25.save)
+    atomic_write_file(config.INDEX_PATH, lambda path: faiss.write_index(index, path))
+    stamp = write_version(
+        config.INDEX_VERSION_PATH, index_type=args.index_type, vectors=int(index.ntotal), chunks=len(chunked_data)
+    )
+    print(f"✅ FAISS index ({args.index_type}) güncellendi: {len(added_rows)} eklendi, {len(removed)} silindi, toplam {index.ntotal}")
+    print(f"🏷️  Sürüm: {stamp['version']}")
+
+
+if __name__ == "__main__":
+    main()
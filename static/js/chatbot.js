@@ -2,6 +2,7 @@
 class FinansChatbot {
     constructor() {
         this.isTyping = false;
+        this.isStreaming = false;
         this.messageHistory = [];
         this.init();
     }
@@ -96,7 +97,7 @@ class FinansChatbot {
         const messageInput = document.getElementById('messageInput');
         const message = messageInput.value.trim();
         
-        if (!message || this.isTyping) return;
+        if (!message || this.isTyping || this.isStreaming) return;
 
         // Clear input
         messageInput.value = '';
@@ -110,33 +111,85 @@ class FinansChatbot {
         // Show typing indicator
         this.showTypingIndicator();
 
-        try {
-            const response = await fetch('/chat', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ message })
-            });
-
-            const data = await response.json();
+        this.isStreaming = true;
 
-            if (data.success) {
-                // Hide typing indicator
-                this.hideTypingIndicator();
-                
-                // Add bot response
-                this.addMessage(data.response, 'bot');
-            } else {
-                throw new Error(data.error || 'Bilinmeyen hata');
-            }
+        try {
+            await this.streamResponse(message);
         } catch (error) {
             console.error('Chat error:', error);
             this.hideTypingIndicator();
             this.addMessage(`Üzgünüm, bir hata oluştu: ${error.message}`, 'error');
+        } finally {
+            this.isStreaming = false;
         }
     }
 
+    async streamResponse(message) {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message })
+        });
+
+        if (!response.ok || !response.body) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Bilinmeyen hata');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+        let textElement = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            // Events are separated by a blank line; keep the unfinished tail
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const rawEvent of events) {
+                const { event, data } = this.parseEvent(rawEvent);
+                if (event === 'error') {
+                    throw new Error(data.error || 'Bilinmeyen hata');
+                }
+                if (!data.token) continue;
+
+                // Replace the typing indicator with the answer on the first token
+                if (!textElement) {
+                    this.hideTypingIndicator();
+                    textElement = this.addMessage('', 'bot');
+                }
+                answer += data.token;
+                textElement.innerHTML = this.formatMessage(answer);
+                this.scrollToBottom();
+            }
+        }
+
+        if (!textElement) {
+            throw new Error('Boş yanıt alındı');
+        }
+        this.messageHistory[this.messageHistory.length - 1].content = answer;
+    }
+
+    parseEvent(rawEvent) {
+        let event = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data += line.slice(5).trim();
+            }
+        });
+        return { event, data: data ? JSON.parse(data) : {} };
+    }
+
     addMessage(content, type) {
         // Hide welcome message if this is the first message
         const welcomeMessage = document.getElementById('welcomeMessage');
@@ -184,6 +237,8 @@ class FinansChatbot {
         
         // Add to history
         this.messageHistory.push({ content, type, timestamp });
+
+        return messageDiv.querySelector('.message-text');
     }
 
     formatMessage(content) {
@@ -0,0 +1,430 @@
+# tests/test_app.py
+
+"""
+test_app.py
+
+Amaç:
+- Flask endpoint'lerinin Groq'a gitmeden kontrolü
+- Aynı endpoint'lerin asyncio (Quart) sürümünün kontrolü
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import app as chatbot_app
+import asgi
+from finans import aio, config, conversation, language, llm, resources, sessions, warmup, web
+from finans.encoder import query_encoder
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions; streams the answer word by word"""
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def create(self, stream=False, **kwargs):
+        if not stream:
+            message = SimpleNamespace(content=self.answer)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return (
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+            for word in self.answer.split()
+        )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions("Vadeli mevduat bir hesap türüdür.")))
+    monkeypatch.setattr(resources, "_client", fake)
+    # No index means the keyword fallback, so no embedding model is needed
+    # Token counts are estimated instead of downloading the tokenizer
+    monkeypatch.setattr(resources, "_tokenizer_loaded", True)
+    monkeypatch.setattr(resources, "_snapshot", {"index": None, "metadata": None, "bm25": None, "version": None})
+    chatbot_app.app.config["TESTING"] = True
+    return chatbot_app.app.test_client()
+
+
+def test_chat_stream_sends_tokens(client):
+    """
+    /chat/stream her token'ı ayrı bir SSE olayı olarak göndermeli.
+    """
+    response = client.post("/chat/stream", json={"message": "vadeli mevduat nedir"})
+    body = response.get_data(as_text=True)
+    events = [event for event in body.split("\n\n") if event]
+
+    assert response.mimetype == "text/event-stream"
+    tokens = [json.loads(event[len("data: "):])["token"] for event in events if event.startswith("data: ")]
+    assert "".join(tokens).strip() == "Vadeli mevduat bir hesap türüdür.", "❌ Token'lar eksik"
+    assert events[-1].startswith("event: done"), "❌ Akış done olayı ile bitmedi"
+
+
+def test_chat_updates_summary_in_background(client):
+    """
+    /chat cevabı döndükten sonra oturum özeti arka planda güncellenmeli.
+    """
+    response = client.post("/chat", json={"message": "vadeli mevduat nedir"})
+    assert response.get_json()["success"], "❌ /chat başarısız"
+
+    with client.session_transaction() as session:
+        session_id = session["session_id"]
+
+    for _ in range(100):  # the update runs on the summary thread pool
+        if conversation.get_summary(session_id):
+            break
+        time.sleep(0.01)
+    assert conversation.get_summary(session_id) == "Vadeli mevduat bir hesap türüdür.", "❌ Özet güncellenmedi"
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    """Async client.chat.completions for asgi.py"""
+
+    async def create(self, stream=False, **kwargs):
+        result = FakeCompletions.create(self, stream=stream, **kwargs)
+        if not stream:
+            return result
+
+        async def chunks():
+            for chunk in result:
+                yield chunk
+
+        return chunks()
+
+
+class LoopCheckingStore(sessions.SessionStore):
+    """Records session store calls made on the event loop, where SQLite or Redis would block it"""
+
+    def __init__(self):
+        super().__init__()
+        self.on_loop = []
+
+    def _check(self, name):
+        try:
+            asyncio.get_running_loop()
+            self.on_loop.append(name)
+        except RuntimeError:
+            pass
+
+    def get(self, session_id, field, default=None):
+        self._check(f"get {field}")
+        return super().get(session_id, field, default)
+
+    def set(self, session_id, **fields):
+        self._check(f"set {sorted(fields)}")
+        return super().set(session_id, **fields)
+
+
+def run_asgi(monkeypatch, requests):
+    """requests(client) ile Quart uygulamasına istek atar; (sonuç, oturum deposu, session_id) döner"""
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeAsyncCompletions("Vadeli mevduat bir hesap türüdür.")))
+    monkeypatch.setattr(resources, "_async_client", fake)
+    monkeypatch.setattr(resources, "_llm_semaphore", None)
+    monkeypatch.setattr(resources, "_tokenizer_loaded", True)
+    monkeypatch.setattr(resources, "_snapshot", {"index": None, "metadata": None, "bm25": None, "version": None})
+    monkeypatch.setattr(aio, "_session_locks", None)
+    store = LoopCheckingStore()
+    monkeypatch.setattr(sessions, "_store", store)
+    asgi.app.config["TESTING"] = True
+
+    async def run():
+        client = asgi.app.test_client()
+        result = await requests(client)
+        # Summary updates run as background tasks after the response
+        await asyncio.gather(*asgi.app.background_tasks)
+        async with client.session_transaction() as session:
+            return result, session["session_id"]
+
+    result, session_id = asyncio.run(run())
+    return result, store, session_id
+
+
+def test_asgi_chat(monkeypatch):
+    """
+    Quart /chat cevabı döndürmeli, mesajları ve özeti saklamalı; oturum deposu event loop'u bloklamamalı.
+    """
+    async def requests(client):
+        response = await client.post("/chat", json={"message": "vadeli mevduat nedir"})
+        return response.status_code, await response.get_json()
+
+    (status, body), store, session_id = run_asgi(monkeypatch, requests)
+    assert status == 200 and body["response"] == "Vadeli mevduat bir hesap türüdür.", "❌ Cevap dönmedi"
+    assert conversation.get_history(session_id) == [
+        "Kullanıcı: vadeli mevduat nedir", "Asistan: Vadeli mevduat bir hesap türüdür."
+    ], "❌ Mesajlar saklanmadı"
+    assert conversation.get_summary(session_id) == "Vadeli mevduat bir hesap türüdür.", "❌ Özet güncellenmedi"
+    assert store.on_loop == [], f"❌ Oturum deposu event loop üzerinde çağrıldı: {store.on_loop}"
+
+
+def test_asgi_chat_stream(monkeypatch):
+    """
+    Quart /chat/stream her token'ı ayrı SSE olayı olarak göndermeli, bitince mesajları saklamalı.
+    """
+    async def requests(client):
+        response = await client.post("/chat/stream", json={"message": "vadeli mevduat nedir"})
+        return response.mimetype, (await response.get_data()).decode()
+
+    (mimetype, body), store, session_id = run_asgi(monkeypatch, requests)
+    events = [event for event in body.split("\n\n") if event]
+    tokens = [json.loads(event[len("data: "):])["token"] for event in events if event.startswith("data: ")]
+    assert mimetype == "text/event-stream"
+    assert "".join(tokens).strip() == "Vadeli mevduat bir hesap türüdür.", "❌ Token'lar eksik"
+    assert events[-1].startswith("event: done"), "❌ Akış done olayı ile bitmedi"
+    assert conversation.get_history(session_id)[-1].strip() == "Asistan: Vadeli mevduat bir hesap türüdür.", "❌ Cevap saklanmadı"
+    assert store.on_loop == [], f"❌ Oturum deposu event loop üzerinde çağrıldı: {store.on_loop}"
+
+
+def test_session_state_on_server(client, tmp_path):
+    """
+    Cookie'de sadece session_id olmalı; geçmiş sunucuda tutulmalı ve SQLite ile worker'lar arasında paylaşılmalı.
+    """
+    client.post("/chat", json={"message": "vadeli mevduat nedir"})
+    with client.session_transaction() as session:
+        assert set(session.keys()) == {"session_id"}, "❌ Cookie'de session_id dışında veri var"
+        session_id = session["session_id"]
+    assert conversation.get_history(session_id) == [
+        "Kullanıcı: vadeli mevduat nedir", "Asistan: Vadeli mevduat bir hesap türüdür."
+    ], "❌ Mesajlar sunucu tarafında saklanmadı"
+
+    path = str(tmp_path / "sessions.db")
+    worker_a = sessions.SessionStore(sessions.SQLiteBackend(path, ttl=60), cache_ttl=0)
+    worker_b = sessions.SessionStore(sessions.SQLiteBackend(path, ttl=60), cache_ttl=0)
+    worker_a.set("s1", history=["Kullanıcı: merhaba"], language="Türkçe")
+    worker_b.set("s1", summary="Kullanıcı selam verdi.")
+    assert worker_a.get("s1", "summary") == "Kullanıcı selam verdi.", "❌ Özet diğer worker'a ulaşmadı"
+    assert worker_b.get("s1", "history") == ["Kullanıcı: merhaba"], "❌ Bir alanın yazılması diğerini sildi"
+
+
+def test_session_concurrent_field_writes(tmp_path):
+    """
+    Aynı oturumun farklı alanlarını aynı anda yazan thread'ler birbirinin alanını silmemeli.
+    """
+    stores = {
+        "memory": sessions.SessionStore(),
+        "sqlite": sessions.SessionStore(sessions.SQLiteBackend(str(tmp_path / "sessions.db"), ttl=60)),
+    }
+    switch_interval = sys.getswitchinterval()
+    # Switch threads as often as possible, so the writes really interleave
+    sys.setswitchinterval(1e-6)
+    try:
+        for name, store in stores.items():
+            write_concurrently(name, store)
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+
+def write_concurrently(name, store):
+    """8 thread'in her biri kendi alanını 200 kez yazar; sonunda hepsi yerinde olmalı"""
+    barrier = threading.Barrier(8)
+
+    def write(i):
+        barrier.wait()
+        for n in range(200):
+            store.set(name, **{f"field{i}": n})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(8):
+        assert store.get(name, f"field{i}") == 199, f"❌ {name}: eşzamanlı yazma field{i} alanını düşürdü"
+
+
+def test_record_messages_concurrently(monkeypatch):
+    """
+    Aynı oturuma aynı anda mesaj ekleyen istekler birbirinin mesajını kaybetmemeli.
+    """
+    monkeypatch.setattr(sessions, "_store", sessions.SessionStore())
+    monkeypatch.setattr(web, "MAX_HISTORY_MESSAGES", 10000)
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        barrier = threading.Barrier(8)
+
+        def record(i):
+            barrier.wait()
+            for n in range(100):
+                conversation.record_messages("s1", f"Kullanıcı: {i}-{n}", f"Asistan: {i}-{n}")
+
+        threads = [threading.Thread(target=record, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert len(conversation.get_history("s1")) == 8 * 100 * 2, "❌ Eşzamanlı eklenen mesajlar kayboldu"
+
+
+def test_session_language_for_short_followups():
+    """
+    Dil tespiti deterministik olmalı; kısa takip sorusu oturumun dilini korumalı.
+    """
+    question = "What is the difference between a loan and a mortgage?"
+    assert len({language.detect_language(question) for _ in range(5)}) == 1, "❌ Dil tespiti deterministik değil"
+
+    assert conversation.session_language("dil-testi", question) == "İngilizce"
+    assert conversation.session_language("dil-testi", "and why?") == "İngilizce", "❌ Kısa soru oturum dilini almadı"
+    assert conversation.session_language("yeni-oturum", "and why?") == "Türkçe", "❌ Yeni oturumda varsayılan dil Türkçe değil"
+
+
+def test_metrics_endpoint(client):
+    """
+    /metrics aşama sürelerini ve istek sayılarını Prometheus formatında göstermeli, request id korunmalı.
+    """
+    response = client.post("/chat/stream", json={"message": "vadeli mevduat nedir"}, headers={"X-Request-ID": "abc123"})
+    response.get_data()
+    assert response.headers["X-Request-ID"] == "abc123", "❌ Request id yanıta eklenmedi"
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'finans_stage_seconds_count{stage="llm_answer"}' in body, "❌ LLM aşama süresi ölçülmedi"
+    assert 'finans_stage_seconds_count{stage="search"}' in body, "❌ Arama aşama süresi ölçülmedi"
+    assert 'finans_requests_total{endpoint="/chat/stream",status="200"}' in body, "❌ İstek sayılmadı"
+
+
+def test_health_probes(client, monkeypatch):
+    """
+    Liveness hemen 200 dönmeli; readiness ısınma bitene kadar 503, sonra 200 olmalı.
+    """
+    monkeypatch.setattr(warmup, "_state", {"warmed": False, "seconds": None, "error": None})
+    assert client.get("/health/live").status_code == 200, "❌ Liveness başarısız"
+
+    for _ in range(200):  # the first probe starts the warm-up in the background
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            break
+        assert response.status_code == 503, "❌ Isınmamış süreç 503 dönmedi"
+        time.sleep(0.01)
+    assert response.get_json()["status"] == "ready", "❌ Readiness ısınmadan sonra hazır olmadı"
+
+
+class FakeEmbedder:
+    def encode(self, texts, batch_size=None):
+        return np.ones((len(texts), 4), dtype="float32")
+
+
+def test_encoder_after_fork(monkeypatch):
+    """
+    Master'da başlamış encoder thread'i fork'tan sağ çıkmaz; worker kendi thread'ini başlatmalı.
+    """
+    monkeypatch.setattr(resources, "_embedder", FakeEmbedder())
+    query_encoder.encode("fork öncesi soru")
+    assert query_encoder._worker is not None
+
+    pid = os.fork()
+    if pid == 0:
+        # Child: hangs here if it waits on the parent's worker thread
+        result = threading.Thread(target=query_encoder.encode, args=("fork sonrası soru",), daemon=True)
+        result.start()
+        result.join(5)
+        os._exit(1 if result.is_alive() else 0)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0, "❌ Fork sonrası encoder cevap vermedi"
+
+
+class RateLimited(Exception):
+    status_code = 429
+    response = None
+
+
+class ThrottledCompletions:
+    """Answers slowly; the model in throttled always gets a 429"""
+
+    def __init__(self, throttled):
+        self.throttled = throttled
+        self.calls = []
+
+    def create(self, model, stream=False, **kwargs):
+        self.calls.append(model)
+        if model == self.throttled:
+            raise RateLimited()
+        time.sleep(0.05)
+        message = SimpleNamespace(content=model)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class AsyncThrottledCompletions(ThrottledCompletions):
+    async def create(self, model, stream=False, **kwargs):
+        return ThrottledCompletions.create(self, model, stream=stream, **kwargs)
+
+
+def test_llm_routing_failover_and_single_flight(monkeypatch):
+    """
+    Kısa tanım soruları küçük modele gitmeli; 429'da diğer modele geçilmeli; aynı anda gelen aynı istek tek çağrı olmalı.
+    """
+    assert llm.route("answer", "Kredi notu nedir?")[0] == config.SMALL_MODEL, "❌ Tanım sorusu küçük modele gitmedi"
+    assert llm.route("answer", "Kredi notu ile kredi skoru arasındaki fark nedir?")[0] == config.LARGE_MODEL
+    assert llm.route("summary")[0] == config.SMALL_MODEL
+
+    completions = ThrottledCompletions(throttled=config.SMALL_MODEL)
+    monkeypatch.setattr(resources, "_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(llm, "_cooldowns", {})
+    request = {"messages": [{"role": "user", "content": "Kredi notu nedir?"}], "max_tokens": 10}
+
+    answers = []
+    threads = [
+        threading.Thread(target=lambda: answers.append(llm.complete("answer", request, "Kredi notu nedir?")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [answer.choices[0].message.content for answer in answers] == [config.LARGE_MODEL] * 4, "❌ 429 sonrası büyük modele geçilmedi"
+    assert completions.calls == [config.SMALL_MODEL, config.LARGE_MODEL], "❌ Aynı istekler birleştirilmedi"
+
+
+def test_llm_busy_when_quota_used_up(monkeypatch):
+    """
+    Tüm modellerin kotası dolunca istek beklememeli, hemen meşgul hatası vermeli.
+    """
+    completions = ThrottledCompletions(throttled=None)
+    monkeypatch.setattr(resources, "_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(llm, "_cooldowns", {})
+    monkeypatch.setattr(llm, "_limiters", {})
+    monkeypatch.setattr(config, "LLM_RATE_LIMITS", {config.SMALL_MODEL: [1, 1000], config.LARGE_MODEL: [1, 1000]})
+    request = {"messages": [{"role": "user", "content": "Kredi kartı aidatı nasıl hesaplanır?"}], "max_tokens": 10}
+
+    llm.complete("answer", request, "soru 1")
+    llm.complete("answer", request, "soru 2")
+    start = time.monotonic()
+    with pytest.raises(llm.LLMBusyError):
+        llm.complete("answer", request, "soru 3")
+    assert time.monotonic() - start < 1, "❌ Kota dolunca istek bekletildi"
+    assert completions.calls == [config.LARGE_MODEL, config.SMALL_MODEL], "❌ Kota dolunca diğer modele geçilmedi"
+
+
+def test_llm_failed_call_gives_tokens_back(monkeypatch):
+    """
+    429 alan çağrı için ayrılan token'lar kovaya geri dönmeli; hizmet vermeyen model kotasını harcamamalı.
+    """
+    completions = ThrottledCompletions(throttled=config.SMALL_MODEL)
+    monkeypatch.setattr(resources, "_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(llm, "_cooldowns", {})
+    monkeypatch.setattr(llm, "_limiters", {})
+    monkeypatch.setattr(config, "LLM_RATE_LIMITS", {config.SMALL_MODEL: [100, 1000], config.LARGE_MODEL: [100, 1000]})
+    request = {"messages": [{"role": "user", "content": "Kredi notu nedir?"}], "max_tokens": 300}
+    cost = llm.estimate_tokens(request)
+
+    llm.complete("answer", request, "Kredi notu nedir?")
+    assert completions.calls == [config.SMALL_MODEL, config.LARGE_MODEL]
+    assert llm.get_limiter(config.SMALL_MODEL).tokens.tokens > 1000 - 1, "❌ 429 alan çağrının token'ları geri verilmedi"
+    assert llm.get_limiter(config.LARGE_MODEL).tokens.tokens < 1000 - cost + 1, "❌ Başarılı çağrının token'ları düşülmedi"
+
+    # Same on the async path
+    monkeypatch.setattr(llm, "_cooldowns", {})
+    monkeypatch.setattr(llm, "_limiters", {})
+    completions = AsyncThrottledCompletions(throttled=config.SMALL_MODEL)
+    monkeypatch.setattr(resources, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    asyncio.run(llm.acomplete("answer", request, "Kredi notu nedir?"))
+    assert completions.calls == [config.SMALL_MODEL, config.LARGE_MODEL]
+    assert llm.get_limiter(config.SMALL_MODEL).tokens.tokens > 1000 - 1, "❌ 429 alan async çağrının token'ları geri verilmedi"
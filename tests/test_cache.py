@@ -0,0 +1,55 @@
+# tests/test_cache.py
+
+"""
+test_cache.py
+
+Amaç:
+- Semantik cevap cache'inin kontrolleri
+"""
+
+import numpy as np
+
+from finans.cache import SemanticCache
+
+
+def vectors():
+    rng = np.random.default_rng(0)
+    question = rng.normal(size=(1, 384)).astype("float32")
+    similar = question + 0.01 * rng.normal(size=(1, 384)).astype("float32")
+    other = rng.normal(size=(1, 384)).astype("float32")
+    return question, similar, other
+
+
+def test_similar_question_hits_cache():
+    """
+    Benzer soru ve aynı bağlam cache'ten dönmeli; farklı soru veya bağlam dönmemeli.
+    """
+    question, similar, other = vectors()
+    cache = SemanticCache(threshold=0.95)
+    cache.store(question, "ctx", "cevap")
+
+    assert cache.lookup(similar, "ctx") == "cevap", "❌ Benzer soru cache'ten dönmedi"
+    assert cache.lookup(similar, "baska-ctx") is None, "❌ Farklı bağlamda cevap tekrar kullanıldı"
+    assert cache.lookup(other, "ctx") is None, "❌ Alakasız soru cache'ten döndü"
+
+
+def test_ttl_lru_and_version():
+    """
+    Süresi dolan, LRU ile atılan ve index versiyonu değişen kayıtlar dönmemeli.
+    """
+    question, similar, other = vectors()
+
+    cache = SemanticCache(ttl=-1)
+    cache.store(question, "ctx", "cevap")
+    assert cache.lookup(question, "ctx") is None, "❌ Süresi dolan kayıt döndü"
+    assert len(cache) == 0, "❌ Süresi dolan kayıt silinmedi"
+
+    cache = SemanticCache(max_entries=1)
+    cache.store(question, "ctx", "cevap")
+    cache.store(other, "ctx", "diger")
+    assert cache.lookup(question, "ctx") is None, "❌ LRU kaydı atılmadı"
+    assert cache.lookup(other, "ctx") == "diger"
+
+    cache = SemanticCache()
+    cache.store(question, "ctx", "cevap", version=1)
+    assert cache.lookup(question, "ctx", version=2) is None, "❌ Index değişince cache temizlenmedi"
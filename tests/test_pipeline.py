@@ -5,9 +5,38 @@ test_pipeline.py
 
 Amaç:
 - Basit test kontrolleri
+- Chunk'lama ve artımlı yeniden çalıştırma kontrolleri (scripts/chunk.py)
+- scrape_clean.py'nin koşullu GET (ETag/Last-Modified, 304) ve hata
+  durumlarının ağa çıkmadan kontrolü
+- Akış halindeki pipeline'ın indirme ve model olmadan kontrolü; yarıda
+  kesilen çalıştırma sayfa kaybetmeden ve tekrarlamadan devam etmeli
+  (scripts/pipeline.py)
 """
 
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
 import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from finans import config
+from finans.dedup import NearDuplicateIndex
+from finans.manifest import load_manifest, save_manifest
+
+import embed
+import pipeline
+import scrape_clean
+import update_index
+from chunk import PageChunker, chunk_text
+from embed import embedding_key
 
 def test_no_empty_rows():
     """
@@ -25,3 +54,512 @@ def test_chunk_length(max_length=500):
         words = str(row['text']).split()
         assert len(words) <= max_length, f"❌ Chunk {i} kelime sınırını aşıyor: {len(words)} kelime"
     
+
+def test_near_duplicate_chunks():
+    """
+    Ortak şablon metni taşıyan chunk'lar yakalanmalı, farklı içerik kalmalı.
+    """
+    boilerplate = " ".join(f"kelime{i}" for i in range(200))
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(("a", 0), boilerplate + " vadeli mevduat faizi")
+
+    original, similarity = index.find(boilerplate + " kredi kartı aidatı")
+    assert original == ("a", 0) and similarity >= 0.8, "❌ Neredeyse aynı chunk bulunamadı"
+    assert index.find("tcmb politika faizini açıkladı ve repo ihalesi yaptı")[0] is None, "❌ Farklı chunk atıldı"
+
+
+def sentence(n, word):
+    return " ".join([word] * (n - 1) + [f"{word}son."])
+
+
+def test_chunk_text_sentence_boundaries():
+    """
+    Chunk'lar cümle sonlarından kesilmeli, overlap tam cümlelerle yapılmalı; çok uzun cümle pencerelere bölünmeli.
+    """
+    sentences = [sentence(10, f"k{i}") for i in range(5)]
+    chunks = chunk_text(" ".join(sentences), max_length=25, overlap=0)
+    assert chunks == [" ".join(sentences[0:2]), " ".join(sentences[2:4]), sentences[4]], "❌ Chunk cümle ortasından kesildi"
+
+    chunks = chunk_text(" ".join(sentences), max_length=25, overlap=10)
+    assert all(chunk.endswith(".") for chunk in chunks), "❌ Chunk cümle sonunda bitmiyor"
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(previous.split(". ")[-1]), "❌ Overlap önceki chunk'ın son cümlesi değil"
+
+    words = [f"w{i}" for i in range(60)]
+    chunks = chunk_text(" ".join(words), max_length=25, overlap=5)
+    assert [len(chunk.split()) for chunk in chunks] == [25, 25, 20], "❌ Uzun cümle sabit pencerelere bölünmedi"
+    assert chunks[1].split()[:5] == words[20:25], "❌ Pencereler overlap kadar örtüşmüyor"
+
+
+def test_chunk_text_paragraph_boundaries():
+    """
+    Yarısı dolmuş chunk, sığmayan paragrafı bölmek yerine paragraf sonunda kapanmalı.
+    """
+    first = " ".join([sentence(8, "a"), sentence(7, "b")])
+    second = " ".join([sentence(8, "c"), sentence(7, "d")])
+    chunks = chunk_text(f"{first}\n\n{second}", max_length=25, overlap=0)
+    assert chunks == [first, second], "❌ Paragraf sınırında kesilmedi"
+
+    # A chunk less than half full keeps filling across the paragraph end
+    short = sentence(5, "e")
+    chunks = chunk_text(f"{short}\n\n{second}", max_length=25, overlap=0)
+    assert chunks == [f"{short} {second}"], "❌ Yarıdan az dolu chunk paragraf sonunda kapandı"
+
+
+def run_chunker(manifest, previous, duplicates, pages):
+    """Sayfaları PageChunker'dan geçirir; sonraki çalıştırma için (satırlar, atılanlar) döner"""
+    chunker = PageChunker(manifest, lambda url: previous.get(url, []), duplicates)
+    rows, dropped = {}, {}
+    for url, content in pages:
+        rows[url], dropped[url] = chunker.chunk_page({"url": url, "content": content, "title": ""})
+    chunker.remove_missing()
+    return chunker, rows, dropped
+
+
+def test_rerun_keeps_vector_ids(tmp_path, monkeypatch):
+    """
+    Değişmeyen sayfalar manifest'teki vector_id'leriyle aynen kalmalı; değişen ve yeni sayfalar hiç kullanılmamış id almalı.
+    """
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    pages = [(f"p{i}", page_text(i)) for i in range(3)]
+    manifest = load_manifest()
+    _, rows, dropped = run_chunker(manifest, {}, {}, pages)
+    first_ids = {url: [row["vector_id"] for row in page_rows] for url, page_rows in rows.items()}
+    assert sorted(sum(first_ids.values(), [])) == list(range(manifest["next_vector_id"])), "❌ Id'ler sıralı verilmedi"
+    save_manifest(manifest)
+    assert [name for name in os.listdir(tmp_path)] == ["manifest.json"], "❌ Geçici manifest dosyası kaldı"
+    with pytest.raises(TypeError):
+        save_manifest({**manifest, "bozuk": object()})  # fails halfway through writing
+    assert load_manifest() == manifest, "❌ Yarıda kalan yazma manifest'i bozdu"
+
+    # Next run: p1 changes, p2 disappears, p3 is new
+    manifest = load_manifest()
+    previous_next = manifest["next_vector_id"]
+    pages = [("p0", page_text(0)), ("p1", page_text(1) + " yeni cümle."), ("p3", page_text(3))]
+    chunker, rows, _ = run_chunker(manifest, rows, dropped, pages)
+    assert chunker.stats["reused"] == 1 and chunker.stats["rechunked"] == 2
+    assert [row["vector_id"] for row in rows["p0"]] == first_ids["p0"], "❌ Değişmeyen sayfanın id'leri değişti"
+    new_ids = [row["vector_id"] for url in ("p1", "p3") for row in rows[url]]
+    assert min(new_ids) >= previous_next and len(set(new_ids)) == len(new_ids), "❌ Eski bir id yeniden kullanıldı"
+    assert "p2" not in manifest["pages"], "❌ Silinen sayfa manifest'te kaldı"
+
+    # The manifest's ids must match the stored rows, otherwise the page is chunked again
+    manifest["pages"]["p0"]["vector_ids"] = first_ids["p0"][:-1]
+    chunker, rows, _ = run_chunker(manifest, rows, {}, [("p0", page_text(0))])
+    assert chunker.stats["rechunked"] == 1, "❌ Manifest'le uyuşmayan satırlar yeniden kullanıldı"
+
+
+def test_rerun_rechecks_dropped_duplicates():
+    """
+    Değişmeyen sayfa, atıldığı chunk'ın sayfası değişince yeniden chunk'lanmalı; metni index'ten kaybolmamalı.
+    """
+    boilerplate = " ".join(f"kelime{i}" for i in range(200))
+    original = boilerplate + " vadeli mevduat faizi"
+    copy = boilerplate + " kredi kartı aidatı"
+    manifest = {"next_vector_id": 0, "pages": {}}
+    _, rows, dropped = run_chunker(manifest, {}, {}, [("y", original), ("x", copy)])
+    assert rows["x"] == [] and dropped["x"][0]["duplicate_of"] == {"url": "y", "chunk_id": 0}, "❌ Kopya sayfa atılmadı"
+
+    chunker, rows, dropped = run_chunker(manifest, rows, dropped, [("y", original), ("x", copy)])
+    assert chunker.stats["reused"] == 2 and rows["x"] == [], "❌ Hiçbir şey değişmediği halde sayfa yeniden chunk'landı"
+
+    changed = "tcmb politika faizini açıkladı ve repo ihalesi yaptı"
+    chunker, rows, dropped = run_chunker(manifest, rows, dropped, [("y", changed), ("x", copy)])
+    assert [row["text"] for row in rows["x"]] == [copy], "❌ Kopyası değişen sayfanın metni index'ten kayboldu"
+    assert dropped["x"] == [] and chunker.stats["rechunked"] == 2, "❌ Sayfa yeniden chunk'lanmadı"
+    assert manifest["pages"]["x"]["vector_ids"] == [row["vector_id"] for row in rows["x"]], "❌ Manifest güncellenmedi"
+
+    # The page it was a copy of disappears from the scrape
+    manifest = {"next_vector_id": 0, "pages": {}}
+    _, rows, dropped = run_chunker(manifest, {}, {}, [("y", original), ("x", copy)])
+    _, rows, dropped = run_chunker(manifest, rows, dropped, [("x", copy)])
+    assert [row["text"] for row in rows["x"]] == [copy], "❌ Kopyası silinen sayfanın metni index'ten kayboldu"
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer; the vector of a text only depends on the text"""
+
+    DIM = 8
+    calls = []
+
+    def __init__(self, name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return self.DIM
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        FakeModel.calls.append(len(texts))
+        return np.stack([fake_vector(text) for text in texts])
+
+
+def fake_vector(text):
+    return np.random.default_rng(list(embedding_key(text))).random(FakeModel.DIM).astype("float32")
+
+
+def page_text(i):
+    return "\n\n".join(
+        " ".join(f"sayfa{i} paragraf{p} cümle{s} " + " ".join(f"kelime{i}x{p}x{s}x{w}" for w in range(40)) + "."
+                 for s in range(6))
+        for p in range(3)
+    )
+
+
+URLS = [f"https://ornek.com/sayfa-{i}" for i in range(12)]
+
+
+@pytest.fixture
+def pipeline_env(tmp_path, monkeypatch):
+    """Pipeline'ı tmp_path'e yazacak şekilde, sahte indirme ve modelle hazırlar"""
+    for name, file_name in (
+        ("SCRAPED_DATA_PATH", "scraped_data.csv"), ("CHUNKED_DATA_PATH", "chunked_data.csv"),
+        ("EMBEDDINGS_PATH", "embeddings.npy"), ("EMBEDDING_IDS_PATH", "embedding_ids.npy"),
+        ("EMBEDDING_KEYS_PATH", "embedding_keys.npy"), ("MANIFEST_PATH", "manifest.json"),
+        ("DEDUP_REPORT_PATH", "dedup_report.json"), ("CHUNK_STORE_PATH", "chunk_store"),
+        ("PIPELINE_CHECKPOINT_DIR", "pipeline_checkpoint"),
+    ):
+        monkeypatch.setattr(config, name, str(tmp_path / file_name))
+    env = {"fetched": [], "status": "ok"}
+
+    def fetch_page(url, page=None):
+        env["fetched"].append(url)
+        if env["status"] != "ok":
+            return env["status"], None, {}
+        # Later pages finish first, so the output order differs from links
+        time.sleep(0.002 * (len(URLS) - URLS.index(url)))
+        return "ok", page_text(URLS.index(url)), {"etag": f"etag-{url}", "last_modified": None}
+
+    monkeypatch.setattr(pipeline, "links", URLS)
+    monkeypatch.setattr(pipeline, "fetch_page", fetch_page)
+    monkeypatch.setattr(pipeline, "extract_clean_text", lambda html: html)
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pipeline, "SentenceTransformer", FakeModel)
+    monkeypatch.setattr(sys, "argv", ["pipeline.py", "--batch-size", "4"])
+    FakeModel.calls.clear()
+    return env
+
+
+def read_outputs():
+    """(url -> chunk texts, id -> vector) of a finished run, after checking the files agree with each other"""
+    scraped = pd.read_csv(config.SCRAPED_DATA_PATH)
+    chunks = pd.read_csv(config.CHUNKED_DATA_PATH)
+    embeddings = np.load(config.EMBEDDINGS_PATH)
+    ids = np.load(config.EMBEDDING_IDS_PATH)
+    keys = np.load(config.EMBEDDING_KEYS_PATH)
+    manifest = load_manifest()
+
+    assert scraped["url"].is_unique, "❌ Bir sayfa scraped_data.csv'ye iki kez yazıldı"
+    assert sorted(scraped["url"]) == sorted(URLS), "❌ Sayfa kayboldu"
+    assert len(embeddings) == len(ids) == len(keys) == len(chunks), "❌ Vektör, id ve chunk sayıları tutmuyor"
+    assert ids.tolist() == chunks["vector_id"].tolist(), "❌ Vektör id'leri chunk'larla aynı sırada değil"
+    assert len(set(ids.tolist())) == len(ids), "❌ Aynı vektör id'si iki kez verildi"
+    for url, group in chunks.groupby("url"):
+        assert manifest["pages"][url]["vector_ids"] == group["vector_id"].tolist(), "❌ Manifest chunk'larla uyuşmuyor"
+    for text, vector, key in zip(chunks["text"], embeddings, keys):
+        assert key == embedding_key(text) and np.allclose(vector, fake_vector(text)), "❌ Vektör başka bir chunk'ın"
+    assert not os.path.exists(config.PIPELINE_CHECKPOINT_DIR), "❌ Checkpoint silinmedi"
+    return {url: group["text"].tolist() for url, group in chunks.groupby("url")}
+
+
+def test_pipeline_resumes_after_kill(pipeline_env, tmp_path, monkeypatch):
+    """
+    Yarıda kesilen çalıştırma, biten sayfaları tekrar indirmeden kaldığı yerden devam etmeli; yarım yazılmış son sayfa baştan yapılmalı.
+    """
+    pipeline.main()
+    expected = read_outputs()
+    for name in ("scraped_data.csv", "chunked_data.csv", "embeddings.npy", "embedding_ids.npy",
+                 "embedding_keys.npy", "manifest.json", "dedup_report.json"):
+        os.remove(tmp_path / name)
+
+    add = pipeline.Checkpoint.add
+
+    def add_then_kill(checkpoint, page, totals):
+        if len(added) == 5:
+            raise KeyboardInterrupt("süreç öldürüldü")
+        added.append(page["entry"]["url"])
+        add(checkpoint, page, totals)
+
+    added = []
+    pipeline_env.update(fetched=[])
+    monkeypatch.setattr(pipeline.Checkpoint, "add", add_then_kill)
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.main()
+    monkeypatch.setattr(pipeline.Checkpoint, "add", add)
+    checkpoint = pipeline.Checkpoint(config.PIPELINE_CHECKPOINT_DIR)
+    with open(checkpoint.file_path("progress.jsonl"), encoding="utf-8") as f:
+        finished = [json.loads(line)["url"] for line in f.readlines()[1:]]
+    assert finished == added, "❌ Kesilmeden önce biten sayfalar checkpoint'e yazılmadı"
+    # Killed while the next page was being written: its bytes are there, its progress line is cut off
+    for name, junk in (("chunks", "https://ornek.com/yarim,Yarim,0,yarım satır"), ("scraped", "https://ornek.com/yarim,"),
+                       ("duplicates", "{\"url\": "), ("progress.jsonl", "{\"url\": \"https://ornek")):
+        with open(checkpoint.file_path(name), "a", encoding="utf-8") as f:
+            f.write(junk)
+    for name in ("vectors", "ids", "keys"):
+        with open(checkpoint.file_path(name), "ab") as f:
+            f.write(b"\x01" * 13)
+
+    pipeline_env.update(fetched=[])
+    pipeline.main()
+    assert sorted(pipeline_env["fetched"] + finished) == sorted(URLS), "❌ Biten sayfalar yeniden indirildi"
+    assert read_outputs() == expected, "❌ Devam eden çalıştırmanın çıktısı kesintisiz çalıştırmanınkiyle aynı değil"
+
+
+def test_pipeline_rerun_reuses_unchanged_pages(pipeline_env):
+    """
+    Değişmeyen (304) sayfalar önceki scrape'ten okunmalı, vektörleri cache'ten gelmeli; model hiç yüklenmemeli.
+    """
+    pipeline.main()
+    expected = read_outputs()
+    assert sum(FakeModel.calls) == sum(len(texts) for texts in expected.values()), "❌ Her chunk bir kez encode edilmedi"
+
+    FakeModel.calls.clear()
+    pipeline_env.update(status="not_modified")
+    pipeline.main()
+    assert read_outputs() == expected, "❌ Değişmeyen sayfaların içeriği değişti"
+    assert FakeModel.calls == [], "❌ Cache'teki chunk'lar yeniden encode edildi"
+
+
+def test_previous_scrape_byte_spans(tmp_path):
+    """
+    Önceki scrape'in satırları, içinde satır sonu, tırnak ve virgül olsa da diskten aynen okunmalı.
+    """
+    rows = [
+        {"url": "https://ornek.com/a", "content": 'ilk satır\n\nikinci "tırnaklı", virgüllü\nson', "title": "A"},
+        {"url": "https://ornek.com/b", "content": "tek satır", "title": "B"},
+        {"url": "https://ornek.com/c", "content": '"""\n,\n"', "title": "C"},
+    ]
+    path = str(tmp_path / "scraped_data.csv")
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    previous = pipeline.PreviousScrape(path)
+    assert "https://ornek.com/d" not in previous
+    for row in rows:
+        assert row["url"] in previous and previous.read(row["url"]) == row, f"❌ {row['url']} satırı bozuk okundu"
+    assert len(pipeline.PreviousScrape(str(tmp_path / "yok.csv")).spans) == 0
+
+
+def test_threaded_errors_and_early_stop():
+    """
+    Üretici thread'in hatası tüketicide yükselmeli; tüketici erken durunca üretici durup generator'ını kapatmalı.
+    """
+    def failing():
+        yield 1
+        raise ValueError("bozuk sayfa")
+
+    results = []
+    with pytest.raises(ValueError):
+        for item in pipeline.threaded(failing()):
+            results.append(item)
+    assert results == [1], "❌ Hatadan önceki sonuç kayboldu"
+
+    state = {"produced": 0, "closed": False}
+
+    def endless():
+        try:
+            while True:
+                state["produced"] += 1
+                yield state["produced"]
+        finally:
+            state["closed"] = True
+
+    items = pipeline.threaded(endless(), maxsize=2)
+    assert [next(items) for _ in range(3)] == [1, 2, 3]
+    items.close()
+    for _ in range(50):
+        if state["closed"]:
+            break
+        time.sleep(0.02)
+    assert state["closed"] and state["produced"] <= 7, "❌ Tüketici durduktan sonra üretici çalışmaya devam etti"
+
+
+def test_embedder_uses_cache(tmp_path, monkeypatch):
+    """
+    Embedder sadece cache'te olmayan chunk'ları tek çağrıda encode etmeli; hepsi cache'teyse modeli yüklememeli.
+    """
+    monkeypatch.setattr(config, "EMBEDDINGS_PATH", str(tmp_path / "embeddings.npy"))
+    monkeypatch.setattr(config, "EMBEDDING_KEYS_PATH", str(tmp_path / "embedding_keys.npy"))
+    monkeypatch.setattr(pipeline, "SentenceTransformer", FakeModel)
+    FakeModel.calls.clear()
+    np.save(config.EMBEDDINGS_PATH, np.stack([fake_vector("eski")]))
+    np.save(config.EMBEDDING_KEYS_PATH, np.array([embedding_key("eski")], dtype="S40"))
+
+    embedder = pipeline.Embedder("float16", batch_size=2)
+    pages = [{"rows": [{"text": "eski"}, {"text": "yeni"}]}, {"rows": [{"text": "başka"}]}, {"rows": []}]
+    embedded = list(pipeline.embed_pages(iter(pages), embedder))
+    assert FakeModel.calls == [2], "❌ Cache dışındaki chunk'lar tek çağrıda encode edilmedi"
+    assert [page["encoded"] for page in embedded] == [1, 1, 0]
+    assert embedded[0]["vectors"].dtype == np.float16 and embedded[2]["vectors"].shape == (0, FakeModel.DIM)
+    for page in embedded:
+        for row, vector in zip(page["rows"], page["vectors"]):
+            assert np.allclose(vector, fake_vector(row["text"]), atol=1e-3), "❌ Vektör yanlış chunk'a yazıldı"
+
+    embedder = pipeline.Embedder("float32", batch_size=2)
+    list(pipeline.embed_pages(iter([{"rows": [{"text": "eski"}]}]), embedder))
+    assert embedder.model is None and embedder.dimension() == FakeModel.DIM, "❌ Her şey cache'teyken model yüklendi"
+
+
+def test_embed_cache(tmp_path, monkeypatch):
+    """
+    embed.py sadece metni yeni olan chunk'ları encode etmeli; cache anahtarı model adına da bağlı olmalı.
+    vector_id sütunu olmayan eski chunked_data.csv'de id'ler satır sırasından verilmeli.
+    """
+    for name, file_name in (("CHUNKED_DATA_PATH", "chunked_data.csv"), ("EMBEDDINGS_PATH", "embeddings.npy"),
+                            ("EMBEDDING_IDS_PATH", "embedding_ids.npy"), ("EMBEDDING_KEYS_PATH", "embedding_keys.npy")):
+        monkeypatch.setattr(config, name, str(tmp_path / file_name))
+    monkeypatch.setattr(embed, "SentenceTransformer", FakeModel)
+    monkeypatch.setattr(sys, "argv", ["embed.py"])
+    FakeModel.calls.clear()
+    texts = ["vadeli mevduat", "kredi kartı", "repo faizi"]
+    pd.DataFrame({"url": "u", "title": "t", "chunk_id": range(3), "text": texts}).to_csv(config.CHUNKED_DATA_PATH, index=False)
+
+    embed.main()
+    assert FakeModel.calls == [3]
+    assert np.load(config.EMBEDDING_IDS_PATH).tolist() == [0, 1, 2], "❌ vector_id'siz chunk'lara satır sırası verilmedi"
+
+    FakeModel.calls.clear()
+    pd.DataFrame({
+        "url": "u", "title": "t", "chunk_id": range(3), "text": ["kredi kartı", "yeni metin", "vadeli mevduat"],
+        "vector_id": [7, 9, 3]
+    }).to_csv(config.CHUNKED_DATA_PATH, index=False)
+    embed.main()
+    assert FakeModel.calls == [1], "❌ Metni değişmeyen chunk'lar yeniden encode edildi"
+    embeddings = np.load(config.EMBEDDINGS_PATH)
+    assert np.load(config.EMBEDDING_IDS_PATH).tolist() == [7, 9, 3]
+    for text, vector in zip(["kredi kartı", "yeni metin", "vadeli mevduat"], embeddings):
+        assert np.allclose(vector, fake_vector(text)), "❌ Cache'ten gelen vektör başka bir chunk'ın"
+    assert embedding_key("kredi kartı", "baska-model") != embedding_key("kredi kartı"), "❌ Cache anahtarı modele bağlı değil"
+
+
+def test_update_index_without_embedding_ids(tmp_path, monkeypatch):
+    """
+    embedding_ids.npy yoksa id'ler satır sırasından verilmeli; satır sayısı tutmuyorsa anlaşılır bir hata verilmeli.
+    """
+    monkeypatch.setattr(config, "EMBEDDING_IDS_PATH", str(tmp_path / "embedding_ids.npy"))
+    chunks = [{"url": "u", "title": "t", "chunk_id": i, "text": f"metin {i}"} for i in range(3)]
+    assert update_index.load_embedding_ids(chunks, 3).tolist() == [0, 1, 2]
+    assert [chunk["vector_id"] for chunk in chunks] == [0, 1, 2], "❌ Chunk'lara vector_id verilmedi"
+    with pytest.raises(SystemExit):
+        update_index.load_embedding_ids(chunks, 4)
+
+
+class FakeSession:
+    """Stands in for the requests.Session of a fetch thread; answers come from responses[url]"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.active = 0
+        self.most_active = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.requests.append((url, dict(headers or {})))
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        try:
+            time.sleep(0.01)
+            answer = self.responses[url]
+            if isinstance(answer, Exception):
+                raise answer
+            status, headers, content = answer
+            return SimpleNamespace(status_code=status, headers=headers, content=content)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_fetch_page_statuses(monkeypatch):
+    """
+    fetch_page 200'de içerik ve doğrulayıcıları, 304'te not_modified, 4xx'te gone, 429/5xx ve ağ hatasında error dönmeli.
+    """
+    session = FakeSession({
+        "https://a.com/ok": (200, {"ETag": '"v2"', "Last-Modified": "Mon, 01 Jan 2026 00:00:00 GMT"}, b"<p>metin</p>"),
+        "https://a.com/ayni": (304, {}, b""),
+        "https://a.com/yok": (404, {}, b""),
+        "https://a.com/yogun": (429, {}, b""),
+        "https://a.com/bozuk": (503, {}, b""),
+        "https://a.com/kopuk": ConnectionError("bağlantı koptu"),
+    })
+    monkeypatch.setattr(scrape_clean, "get_session", lambda: session)
+
+    assert scrape_clean.fetch_page("https://a.com/ok") == (
+        "ok", b"<p>metin</p>", {"etag": '"v2"', "last_modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+    ), "❌ 200 cevabının içeriği ya da doğrulayıcıları alınmadı"
+    assert scrape_clean.fetch_page("https://a.com/ayni", {"etag": '"v1"'}) == ("not_modified", None, {})
+    assert scrape_clean.fetch_page("https://a.com/yok")[0] == "gone"
+    assert scrape_clean.fetch_page("https://a.com/yogun")[0] == "error"
+    assert scrape_clean.fetch_page("https://a.com/bozuk")[0] == "error"
+    assert scrape_clean.fetch_page("https://a.com/kopuk") == ("error", None, {}), "❌ Ağ hatası yakalanmadı"
+
+
+def test_fetch_page_sends_validators(monkeypatch):
+    """
+    Manifest'teki ETag/Last-Modified koşullu GET başlıkları olarak geri gönderilmeli; olmayanlar gönderilmemeli.
+    """
+    session = FakeSession({"https://a.com/sayfa": (304, {}, b"")})
+    monkeypatch.setattr(scrape_clean, "get_session", lambda: session)
+
+    scrape_clean.fetch_page("https://a.com/sayfa", {"etag": '"v1"', "last_modified": "Sun, 01 Feb 2026 00:00:00 GMT"})
+    scrape_clean.fetch_page("https://a.com/sayfa", {"etag": None, "last_modified": "Sun, 01 Feb 2026 00:00:00 GMT"})
+    scrape_clean.fetch_page("https://a.com/sayfa")
+    assert [headers for _, headers in session.requests] == [
+        {"If-None-Match": '"v1"', "If-Modified-Since": "Sun, 01 Feb 2026 00:00:00 GMT"},
+        {"If-Modified-Since": "Sun, 01 Feb 2026 00:00:00 GMT"},
+        {},
+    ], "❌ Doğrulayıcılar koşullu GET başlıkları olarak gönderilmedi"
+
+
+def test_fetch_page_per_host_limit(monkeypatch):
+    """
+    Aynı siteye aynı anda en fazla PER_HOST_LIMIT istek gitmeli; oturum thread başına bir kez kurulmalı ve 429/5xx'i tekrar denemeli.
+    """
+    urls = [f"https://a.com/{i}" for i in range(12)]
+    session = FakeSession({url: (304, {}, b"") for url in urls})
+    monkeypatch.setattr(scrape_clean, "get_session", lambda: session)
+    monkeypatch.setattr(scrape_clean, "_host_slots", {})
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(scrape_clean.fetch_page, urls))
+    assert session.most_active <= scrape_clean.PER_HOST_LIMIT, "❌ Aynı siteye sınırdan fazla eşzamanlı istek gitti"
+    monkeypatch.undo()
+
+    session = scrape_clean.get_session()
+    assert scrape_clean.get_session() is session, "❌ Oturum her istekte yeniden kuruldu"
+    retry = session.get_adapter("https://a.com").max_retries
+    assert {429, 503}.issubset(retry.status_forcelist) and retry.total == 3, "❌ 429/5xx tekrar denenmiyor"
+
+
+def test_scrape_keeps_unchanged_pages(tmp_path, monkeypatch):
+    """
+    scrape_clean.main: değişen sayfa yeniden çıkarılmalı, 304 ve erişilemeyen sayfa eski içeriğiyle kalmalı, silinen sayfa çıkmalı.
+    """
+    monkeypatch.setattr(config, "SCRAPED_DATA_PATH", str(tmp_path / "scraped_data.csv"))
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    urls = ["https://a.com/degisen", "https://a.com/ayni", "https://a.com/kopuk", "https://a.com/silinen", "https://a.com/yeni"]
+    pd.DataFrame([
+        {"url": url, "content": f"eski {url}", "title": "Eski"} for url in urls[:4]
+    ]).to_csv(config.SCRAPED_DATA_PATH, index=False)
+    save_manifest({"next_vector_id": 0, "pages": {url: {"etag": f'"{i}"'} for i, url in enumerate(urls[:4])}})
+    session = FakeSession({
+        "https://a.com/degisen": (200, {"ETag": '"yeni"'}, "yeni içerik."),
+        "https://a.com/ayni": (304, {}, b""),
+        "https://a.com/kopuk": ConnectionError("bağlantı koptu"),
+        "https://a.com/silinen": (404, {}, b""),
+        "https://a.com/yeni": (200, {}, "ilk içerik."),
+    })
+    monkeypatch.setattr(scrape_clean, "get_session", lambda: session)
+    monkeypatch.setattr(scrape_clean, "links", urls)
+    monkeypatch.setattr(scrape_clean, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(scrape_clean, "extract_clean_text", lambda html: html)
+
+    scrape_clean.main()
+    scraped = pd.read_csv(config.SCRAPED_DATA_PATH)
+    assert scraped["url"].tolist() == ["https://a.com/degisen", "https://a.com/ayni", "https://a.com/kopuk", "https://a.com/yeni"], \
+        "❌ Sayfalar all_links.csv sırasıyla yazılmadı ya da silinen sayfa kaldı"
+    assert scraped["content"].tolist() == [
+        "yeni içerik.", "eski https://a.com/ayni", "eski https://a.com/kopuk", "ilk içerik."
+    ], "❌ Değişmeyen sayfa eski içeriğiyle kalmadı"
+    sent = dict(session.requests)
+    assert sent["https://a.com/ayni"] == {"If-None-Match": '"1"'} and sent["https://a.com/yeni"] == {}, \
+        "❌ Doğrulayıcı eski içeriği olan sayfaya gönderilmedi ya da yeni sayfaya gönderildi"
+    assert load_manifest()["pages"]["https://a.com/degisen"]["etag"] == '"yeni"', "❌ Yeni ETag manifest'e yazılmadı"
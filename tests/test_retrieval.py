@@ -0,0 +1,278 @@
+# tests/test_retrieval.py
+
+"""
+test_retrieval.py
+
+Amaç:
+- finans paketindeki retrieval fonksiyonlarının kontrolleri
+"""
+
+import csv
+import os
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from finans import config, packing, resources
+from finans.ann import INDEX_TYPES, build_index, index_type_of, set_search_params
+from finans.artifacts import atomic_write_dir, atomic_write_file, read_version, write_version
+from finans.bm25 import BM25Index, reciprocal_rank_fusion
+from finans.chunk_store import ChunkStore, write_chunk_store
+from finans.encoder import QueryEncoder
+from finans.packing import pack_context, trim_to_tokens
+from finans.rerank import rerank
+from finans.retrieval import search_context
+
+
+class StoredVectorEncoder:
+    """Returns a vector already in the index instead of running the model"""
+
+    def __init__(self, row):
+        self.row = row
+
+    def encode(self, texts, **kwargs):
+        embeddings = np.load("data/embeddings.npy")
+        return embeddings[self.row:self.row + len(texts)]
+
+
+class CountingEncoder:
+    """Records the batches it was asked to encode"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype="float32")
+
+
+def test_search_context_uses_index(monkeypatch):
+    """
+    Soru vektörü index'teki bir satırla aynıysa o chunk ilk sırada dönmeli.
+    """
+    monkeypatch.setattr(resources, "_embedder", StoredVectorEncoder(5))
+    results = search_context("bileşik faiz nedir", top_k=3)
+    metadata = resources.get_metadata()
+
+    assert len(results) == 3, "❌ top_k kadar sonuç dönmedi"
+    assert results[0]["text"] == metadata.get(5)["text"], "❌ En yakın chunk ilk sırada değil"
+    assert results[0]["url"] and "title" in results[0], "❌ url/title eksik"
+    assert results[0]["score"] >= results[-1]["score"], "❌ Sonuçlar skora göre sıralı değil"
+
+
+def test_chunk_store_roundtrip(tmp_path):
+    """
+    Chunk store'a yazılan satırlar vector_id ile aynen okunmalı.
+    """
+    chunks = [
+        {"vector_id": 7, "url": "https://a", "title": "A", "chunk_id": 0, "text": "vadeli mevduat"},
+        {"vector_id": 3, "url": "https://a", "title": "A", "chunk_id": 1, "text": "faiz oranı şöyle"},
+        {"vector_id": 12, "url": "https://b", "title": "B", "chunk_id": 0, "text": "enflasyon"},
+    ]
+    write_chunk_store(str(tmp_path), chunks, [2, 4, 1], "estimate")
+    store = ChunkStore(str(tmp_path))
+
+    assert len(store) == 3
+    assert store.get(3) == {"text": "faiz oranı şöyle", "url": "https://a", "title": "A", "chunk_id": 1, "tokens": 4}
+    assert store.tokenizer == "estimate", "❌ Token sayılarının tokenizer'ı kaydedilmedi"
+    assert store.get(12)["url"] == "https://b"
+    assert store.get(5) is None and store.get(99) is None, "❌ Olmayan id için sonuç döndü"
+
+
+def test_bm25_turkish_terms():
+    """
+    BM25 tam terimleri bulmalı; İ/ı ve Türkçe karakterler eşleşmeli.
+    """
+    texts = [
+        "kur korumalı mevduat kkm hesapları",
+        "i̇ş bankası kredi kartı aidatı",  # str.lower() of "İş Bankası"
+        "tcmb repo ihalesi ve politika faizi",
+    ]
+    bm25 = BM25Index.build(texts, [10, 20, 30])
+
+    assert bm25.search("KKM nedir?")[0][0] == 10, "❌ KKM bulunamadı"
+    assert bm25.search("İş Bankası kredi karti")[0][0] == 20, "❌ Türkçe karakterler eşleşmedi"
+    assert bm25.search("TCMB repo")[0][0] == 30
+    assert bm25.search("nedir") == [], "❌ Stopword eşleşti"
+
+
+def test_eval_questions_point_to_chunks():
+    """
+    Benchmark soru setindeki her ilgili URL chunk deposunda olmalı.
+    """
+    urls = {url for url, _ in ChunkStore(config.CHUNK_STORE_PATH).sources}
+    with open(config.EVAL_QUESTIONS_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for url in row["relevant_urls"].split("|"):
+                assert url in urls, f"❌ '{row['question']}' bilinmeyen bir URL'ye işaret ediyor: {url}"
+
+
+def test_reciprocal_rank_fusion():
+    """
+    İki listede de üst sıralarda olan id en önde olmalı.
+    """
+    fused = reciprocal_rank_fusion([[1, 2, 3], [2, 4]])
+    assert [idx for idx, _ in fused] == [2, 1, 4, 3]
+
+
+def test_atomic_artifacts(tmp_path):
+    """
+    Yeni chunk store eskisinin yerine geçmeli, geçici klasör kalmamalı, sürüm damgası okunabilmeli.
+    """
+    path = str(tmp_path / "chunk_store")
+    write_chunk_store(path, [{"vector_id": 1, "url": "u", "title": "t", "chunk_id": 0, "text": "eski"}])
+    atomic_write_dir(path, lambda tmp: write_chunk_store(
+        tmp, [{"vector_id": 2, "url": "u", "title": "t", "chunk_id": 0, "text": "yeni"}]
+    ))
+    stamp = write_version(str(tmp_path / "index_version.json"), vectors=1)
+
+    assert ChunkStore(path).get(2)["text"] == "yeni", "❌ Yeni chunk store yerine geçmedi"
+    assert ChunkStore(path).get(1) is None, "❌ Eski chunk store hâlâ okunuyor"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chunk_store", "index_version.json"], "❌ Geçici dosya kaldı"
+    assert read_version(str(tmp_path / "index_version.json")) == stamp, "❌ Sürüm damgası okunamadı"
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert (tmp_path / "index_version.json").stat().st_mode & 0o777 == 0o666 & ~umask, "❌ Dosya izinleri umask'a uymuyor"
+    assert os.stat(path).st_mode & 0o777 == 0o777 & ~umask, "❌ Klasör izinleri umask'a uymuyor"
+
+
+def test_ann_index_variants():
+    """
+    Her index tipi id'lerle kurulmalı ve bir vektörün kendisini ilk sırada bulmalı.
+    """
+    embeddings = np.load("data/embeddings.npy", mmap_mode="r")[:400]
+    vector_ids = np.arange(1000, 1400)
+
+    for index_type in INDEX_TYPES:
+        index = build_index(embeddings, vector_ids, index_type)
+        set_search_params(index, nprobe=64, ef_search=64)
+        _, found = index.search(np.asarray(embeddings[7:8], dtype="float32"), 3)
+
+        assert index_type_of(index) == index_type, f"❌ {index_type} tipi tanınmadı"
+        assert index.ntotal == 400, f"❌ {index_type} tüm vektörleri içermiyor"
+        assert found[0][0] == 1007, f"❌ {index_type} en yakın vektörü bulamadı"
+
+
+def test_hot_reload_keeps_old_snapshot(tmp_path, monkeypatch):
+    """
+    Yeni sürüm yüklenince yeni istekler onu görmeli, eski snapshot'ı tutan istek bozulmamalı.
+    """
+    for name, file_name in [("INDEX_PATH", "faiss_index.index"), ("CHUNK_STORE_PATH", "chunk_store"),
+                            ("BM25_PATH", "bm25"), ("INDEX_VERSION_PATH", "index_version.json")]:
+        monkeypatch.setattr(config, name, str(tmp_path / file_name))
+    monkeypatch.setattr(config, "INDEX_RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(resources, "_snapshot", None)
+    embeddings = np.load("data/embeddings.npy", mmap_mode="r")
+
+    def build(vector_ids, text):
+        chunks = [{"vector_id": i, "url": "u", "title": "t", "chunk_id": 0, "text": text} for i in vector_ids]
+        atomic_write_dir(config.CHUNK_STORE_PATH, lambda path: write_chunk_store(path, chunks))
+        atomic_write_file(config.INDEX_PATH, lambda path: faiss.write_index(
+            build_index(embeddings[:len(vector_ids)], vector_ids), path
+        ))
+        write_version(config.INDEX_VERSION_PATH)
+
+    build([1, 2, 3], "eski")
+    old = resources.get_snapshot()
+    assert resources.reload_if_changed() is False, "❌ Sürüm değişmeden yeniden yüklendi"
+
+    build([4, 5], "yeni")
+    assert resources.reload_if_changed() is True, "❌ Yeni sürüm yüklenmedi"
+    new = resources.get_snapshot()
+
+    assert new["version"] != old["version"] and new["index"].ntotal == 2, "❌ Yeni snapshot kullanılmıyor"
+    assert old["index"].ntotal == 3 and old["metadata"].get(1)["text"] == "eski", "❌ Eski snapshot bozuldu"
+    assert new["metadata"].get(4)["text"] == "yeni", "❌ Yeni chunk store okunmuyor"
+
+    # A broken build must not replace the snapshot being served
+    with open(config.INDEX_PATH, "wb") as f:
+        f.write(b"bozuk")
+    write_version(config.INDEX_VERSION_PATH)
+    assert resources.reload_if_changed() is False, "❌ Bozuk index yüklendi"
+    assert resources.reload_if_changed() is False, "❌ Bozuk index ikinci denemede yüklendi"
+    assert resources.get_snapshot() is new, "❌ Bozuk index eski snapshot'ın yerine geçti"
+
+
+def test_pack_context_budget(monkeypatch):
+    """
+    Bağlam token bütçesini aşmamalı, tekrar eden chunk'ı atlamalı, sığmayanı cümle sonundan kırpmalı.
+    """
+    monkeypatch.setattr(resources, "_tokenizer", None)
+    monkeypatch.setattr(resources, "_tokenizer_loaded", True)
+    monkeypatch.setattr(config, "CONTEXT_MIN_TRIM_TOKENS", 10)
+    first = "Mevduat faizi yıllık olarak hesaplanır ve vade sonunda ödenir."
+    second = "Kredi kartı aidatı bankaya göre değişir. Bazı kartlarda aidat alınmaz. İade talep edilebilir."
+    results = [
+        {"text": first, "tokens": 20},
+        {"text": first.lower(), "tokens": None},
+        {"text": second, "tokens": None},
+    ]
+    context = pack_context(results, budget=50)
+
+    assert context.count("ödenir") == 1, "❌ Tekrar eden chunk atlanmadı"
+    assert context.endswith("Bazı kartlarda aidat alınmaz."), "❌ Sığmayan chunk cümle sonundan kırpılmadı"
+    assert "İade" not in context, "❌ Bütçe aşıldı"
+
+    words = " ".join(f"kelime{i}" for i in range(1000))
+    counted = []
+    monkeypatch.setattr(packing, "count_tokens", lambda texts: [counted.append(len(t.split())) or counted[-1] for t in texts])
+    assert trim_to_tokens(words, 437) == " ".join(words.split()[:437]), "❌ Kelime sınırından doğru kırpılmadı"
+    assert sum(counted) <= 20 * 1000, "❌ Kırpma her öneki ayrı ayrı token'lıyor"
+
+
+def test_query_encoder_batches_and_caches(monkeypatch):
+    """
+    Eşzamanlı sorular tek batch'te encode edilmeli, aynı soru tekrar modele gitmemeli.
+    """
+    model = CountingEncoder()
+    monkeypatch.setattr(resources, "_embedder", model)
+    encoder = QueryEncoder(max_wait=0.2)
+    questions = ["faiz nedir", "kredi nedir", "Faiz  nedir", "repo nedir"]
+    vectors = {}
+
+    threads = [threading.Thread(target=lambda q=q: vectors.setdefault(q, encoder.encode(q))) for q in questions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    encoder.encode("FAIZ NEDIR")
+
+    assert len(model.batches) == 1, "❌ Eşzamanlı sorular tek batch'te birleşmedi"
+    assert sorted(model.batches[0]) == ["faiz nedir", "kredi nedir", "repo nedir"], "❌ Aynı soru iki kez encode edildi"
+    assert vectors["Faiz  nedir"][0, 0] == len("faiz nedir"), "❌ Normalize soru yanlış vektörü aldı"
+    assert encoder.hits == 1 and len(encoder) == 3, "❌ Tekrarlanan soru cache'ten dönmedi"
+
+
+class KeywordCrossEncoder:
+    """Scores a pair by how often the chunk mentions "kkm"; optionally slow"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [text.count("kkm") for _, text in pairs]
+
+
+def test_rerank_budget_fallback(monkeypatch):
+    """
+    Cross-encoder en alakalı chunk'ı öne almalı; bütçe aşılırsa arama sırası korunmalı.
+    """
+    monkeypatch.setattr(config, "RERANK_BATCH_SIZE", 2)
+    results = [{"id": i, "text": "kkm " * i} for i in range(5)]
+
+    model = KeywordCrossEncoder()
+    monkeypatch.setattr(resources, "_reranker", model)
+    monkeypatch.setattr(resources, "_reranker_loaded", True)
+    ranked = rerank("kkm nedir", results, top_k=2, budget_ms=1000)
+    assert [r["id"] for r in ranked] == [4, 3], "❌ Cross-encoder sırası uygulanmadı"
+    assert model.calls == 3, "❌ Çiftler batch'ler halinde puanlanmadı"
+
+    monkeypatch.setattr(resources, "_reranker", KeywordCrossEncoder(delay=0.05))
+    ranked = rerank("kkm nedir", results, top_k=2, budget_ms=10)
+    assert [r["id"] for r in ranked] == [0, 1], "❌ Bütçe aşılınca arama sırasına dönülmedi"